@@ -0,0 +1,121 @@
+"""
+Benchmark how much searching files delays other work on an asyncio event loop.
+
+A ticker coroutine wakes up every millisecond while files are searched, once by
+calling SearchSession.search_files from a coroutine (blocking the loop) and once
+through AsyncApplication with a thread pool and with a process pool. Reports the
+longest time the ticker had to wait and the total search time. All searches must
+give the same results.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_async_search.py [--files N] [--lines N]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Awaitable, Callable, List
+
+from codegrep.async_application import AsyncApplication
+from codegrep.config.config import Config
+from codegrep.search_session import SearchSession
+
+PATTERN = "value \\* [0-9]+"
+TICK_SECONDS = 0.001
+
+
+def generate_source(num_lines: int) -> str:
+    lines = []
+    method = 0
+    while len(lines) < num_lines:
+        lines.append(f"class Generated{method}:")
+        lines.append(f"    def method_{method}(self, value):")
+        lines.append(f"        if value > {method}:")
+        lines.append(f"            return value * {method}")
+        lines.append("        return None")
+        lines.append("")
+        method += 1
+    return "\n".join(lines[:num_lines]) + "\n"
+
+
+async def measure(search: Callable[[], Awaitable[List[str]]]) -> tuple:
+    """Run `search` next to a ticker, return (outputs, seconds, longest tick delay)."""
+    longest_delay = 0.0
+    done = False
+
+    async def tick() -> None:
+        nonlocal longest_delay
+        while not done:
+            before = time.perf_counter()
+            await asyncio.sleep(TICK_SECONDS)
+            longest_delay = max(longest_delay, time.perf_counter() - before)
+
+    ticker = asyncio.create_task(tick())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    outputs = await search()
+    elapsed = time.perf_counter() - start
+    done = True
+    await ticker
+    return outputs, elapsed, longest_delay
+
+
+async def run_benchmark(files: List[Path], jobs: int) -> None:
+    options = Config()
+
+    async def blocking_search() -> List[str]:
+        session = SearchSession(options)
+        return [r.output for r in session.search_files(files, PATTERN)]
+
+    def async_search(app: AsyncApplication) -> Callable[[], Awaitable[List[str]]]:
+        async def search() -> List[str]:
+            return [r.output async for r in app.search(files, PATTERN)]
+
+        return search
+
+    with ThreadPoolExecutor(jobs) as threads, ProcessPoolExecutor(jobs) as processes:
+        thread_app = AsyncApplication(options, executor=threads)
+        process_app = AsyncApplication(options, executor=processes)
+        # Warm up worker sessions so every run measures searching alone
+        await async_search(thread_app)()
+        await async_search(process_app)()
+
+        runs = [
+            ("Blocking SearchSession", blocking_search),
+            (f"AsyncApplication, {jobs} threads", async_search(thread_app)),
+            (f"AsyncApplication, {jobs} processes", async_search(process_app)),
+        ]
+        expected = None
+        print(f"{'':36} {'Total':>9} {'Longest loop stall':>20}")
+        for name, search in runs:
+            outputs, elapsed, longest_delay = await measure(search)
+            if expected is None:
+                expected = outputs
+            assert outputs == expected, f"Results differ for {name}"
+            print(f"{name:36} {elapsed:>7.2f} s {longest_delay * 1000:>17.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--lines", type=int, default=2_000)
+    parser.add_argument("--jobs", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = []
+        source = generate_source(args.lines)
+        for i in range(args.files):
+            path = Path(directory) / f"generated_{i}.py"
+            path.write_text(source)
+            files.append(path)
+
+        print(f"Corpus: {args.files} files x {args.lines} lines")
+        asyncio.run(run_benchmark(files, args.jobs))
+
+
+if __name__ == "__main__":
+    main()
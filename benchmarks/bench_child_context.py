@@ -0,0 +1,125 @@
+"""
+Benchmark child scope context for matches on the first line of a large class.
+
+Compares HierarchicalContextExtractor against the previous child collection (kept
+here as a reference), which gathered every node below the matched line, once per
+node starting on it, and sorted them all. Both must select the same lines.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_child_context.py [--lines N]
+"""
+
+import argparse
+import time
+from typing import Any, Callable, List, Set
+
+from codegrep.contracts.IScopeIndex import IScopeIndex
+from codegrep.HierarchicalContextExtractor import HierarchicalContextExtractor
+from codegrep.SyntaxTreeAnalyzer import SyntaxTreeAnalyzer
+from codegrep.TreeSitterCodeParser import TreeSitterCodeParser
+
+
+def generate_class(num_lines: int) -> str:
+    lines = ["class Generated:"]
+    method = 0
+    while len(lines) < num_lines:
+        lines.append(f"    def method_{method}(self, values):")
+        lines.append("        total = 0")
+        lines.append("        for value in values:")
+        lines.append(f"            if value > {method}:")
+        lines.append(f"                total += value * {method}")
+        lines.append("        return total")
+        lines.append("")
+        method += 1
+    return "\n".join(lines[:num_lines]) + "\n"
+
+
+class LegacyChildContextExtractor(HierarchicalContextExtractor):
+    """Child context as collected before, from the nodes starting on each line."""
+
+    def __init__(self, ast_nodes_by_line: List[List[Any]]) -> None:
+        super().__init__()
+        self._ast_nodes_by_line = ast_nodes_by_line
+
+    def _add_child_context(
+        self,
+        line: int,
+        syntax_result: IScopeIndex,
+        lines_to_show: Set[int],
+    ) -> None:
+        nodes = self._ast_nodes_by_line[line]
+        if not nodes:
+            return
+
+        last_line = max(node.end_point[0] for node in nodes)
+        scope_size = last_line - line
+        if scope_size < 5:
+            lines_to_show.update(range(line, last_line + 1))
+            return
+
+        children = []
+        for node in nodes:
+            children.extend(self._collect_children(node))
+
+        children.sort(key=lambda n: n.end_point[0] - n.start_point[0], reverse=True)
+        max_to_add = max(min(scope_size * 0.10, 25), 5)
+        count_before = len(lines_to_show)
+
+        for child in children:
+            if len(lines_to_show) - count_before > max_to_add:
+                break
+            self._add_parent_context(child.start_point[0], syntax_result, lines_to_show)
+
+    def _collect_children(self, node: Any) -> List[Any]:
+        result = [node]
+        for child in node.children:
+            result.extend(self._collect_children(child))
+        return result
+
+
+def best_time(runner: Callable[[], Set[int]], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        runner()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    code = generate_class(args.lines)
+    lines = code.splitlines()
+    root_node = TreeSitterCodeParser().parse(code, "python").root_node
+    analyzer = SyntaxTreeAnalyzer(verbose=False)
+    scope_intervals = analyzer.analyze_intervals(root_node, lines)
+    ast_nodes_by_line = analyzer.analyze(root_node, lines).ast_nodes_by_line
+
+    # The class line and the first line of its body
+    lines_of_interest = {0, 1}
+    legacy = LegacyChildContextExtractor(ast_nodes_by_line)
+    current = HierarchicalContextExtractor()
+
+    expected = legacy.extract_context(scope_intervals, lines_of_interest)
+    assert current.extract_context(scope_intervals, lines_of_interest) == expected
+
+    legacy_time = best_time(
+        lambda: legacy.extract_context(scope_intervals, lines_of_interest), args.repeat
+    )
+    current_time = best_time(
+        lambda: current.extract_context(scope_intervals, lines_of_interest),
+        args.repeat,
+    )
+
+    print(f"Class: {len(lines)} lines, {len(expected)} lines of context")
+    print(f"Legacy child collection: {legacy_time * 1000:.1f} ms")
+    print(f"Heap of nested scopes:   {current_time * 1000:.1f} ms")
+    print(f"Speedup: {legacy_time / current_time:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark `codegrep` commands answered by a `codegrep serve` daemon.
+
+Runs the same search as separate `python -m codegrep` processes, once searching in
+the process (--no-daemon, analysis cache off) and once forwarded to a daemon with
+warm caches, started for the benchmark on its own socket. Both must give the same
+output. Process timings include interpreter startup, as in editor integrations;
+the round trip of a request sent from this process is measured too.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_daemon.py [--files N] [--lines N]
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from codegrep.daemon.DaemonClient import DaemonClient
+from codegrep.daemon.protocol import SearchRequest
+
+PATTERN = "RARE_\\w+ = [0-9]+"
+# Output lines that differ between runs
+VOLATILE_PREFIXES = ("Total time taken", "Time to first result")
+
+
+def generate_source(num_lines: int, file_number: int) -> str:
+    lines = []
+    method = 0
+    while len(lines) < num_lines:
+        lines.append(f"class Generated{method}:")
+        lines.append(f"    def method_{method}(self, value):")
+        lines.append(f"        if value > {method}:")
+        lines.append(f"            return value * {method}")
+        lines.append("        return None")
+        lines.append("")
+        method += 1
+    if file_number % 5 == 0:
+        lines[num_lines // 2 + 3] = f"            RARE_MARKER = {file_number}"
+    return "\n".join(lines[:num_lines]) + "\n"
+
+
+def run_codegrep(arguments: List[str], env: dict) -> str:
+    completed = subprocess.run(
+        [sys.executable, "-m", "codegrep", *arguments],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return "\n".join(
+        line
+        for line in completed.stdout.splitlines()
+        if not line.startswith(VOLATILE_PREFIXES)
+    )
+
+
+def wait_for_socket(path: Path, timeout: float = 30.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(str(path))
+                return
+            except OSError:
+                time.sleep(0.05)
+    raise TimeoutError(f"No daemon listening on {path}")
+
+
+def best_time(runner: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        runner()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--lines", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = Path(directory) / "corpus"
+        corpus.mkdir()
+        for i in range(args.files):
+            (corpus / f"generated_{i}.py").write_text(generate_source(args.lines, i))
+
+        socket_path = Path(directory) / "codegrep.sock"
+        env = {**os.environ, "CODEGREP_SOCKET": str(socket_path)}
+        daemon = subprocess.Popen(
+            [sys.executable, "-m", "codegrep", "serve"],
+            env=env,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_socket(socket_path)
+            local = ["--no-daemon", "--no-cache", PATTERN, str(corpus)]
+            forwarded = [PATTERN, str(corpus)]
+
+            # The first forwarded search warms the daemon up
+            assert run_codegrep(forwarded, env) == run_codegrep(local, env)
+
+            local_time = best_time(lambda: run_codegrep(local, env), args.repeat)
+            daemon_time = best_time(lambda: run_codegrep(forwarded, env), args.repeat)
+
+            client = DaemonClient(socket_path)
+            request = SearchRequest(
+                search_pattern=PATTERN, paths=[str(corpus)], cwd=os.getcwd()
+            )
+            round_trip_time = best_time(
+                lambda: list(client.search(request, report=print)), args.repeat
+            )
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+    print(f"Corpus: {args.files} files x {args.lines} lines, pattern {PATTERN!r}")
+    print(f"  In process:   {local_time * 1000:.0f} ms")
+    print(f"  Warm daemon:  {daemon_time * 1000:.0f} ms")
+    print(f"  Speedup: {local_time / daemon_time:.1f}x")
+    print(
+        f"  Daemon round trip, without process startup: {round_trip_time * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark reading and matching files on disk that do not match.
+
+Compares the bytes pipeline (SearchSession.search_files: read or mmap the file,
+match the raw bytes, decode only displayed lines) against the text pipeline (decode
+every file, then SearchSession.search_file). Files without matches are never parsed,
+so this is the cost of reading and matching alone. Both pipelines must give the same
+output on a few files with matches.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_file_pipeline.py [--files N] [--lines N]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from codegrep.config.config import Config
+from codegrep.contracts.FileSearchResult import FileSearchResult
+from codegrep.search_session import SearchSession
+
+PATTERNS = ["RARE_MARKER", "RARE_\\w+ = [0-9]+"]
+NO_MATCH_PATTERNS = ["NOT_IN_ANY_FILE", "NOT_\\w+ = [0-9]+"]
+
+
+def generate_source(num_lines: int, file_number: int) -> str:
+    lines = []
+    method = 0
+    while len(lines) < num_lines:
+        lines.append(f"class Generated{method}:")
+        lines.append(f"    def method_{method}(self, value):")
+        lines.append(f"        if value > {method}:")
+        lines.append(f"            return value * {method}")
+        lines.append("        return None")
+        lines.append("")
+        method += 1
+    if file_number % 50 == 0:
+        lines[num_lines // 2] = f"RARE_MARKER = {file_number}"
+    return "\n".join(lines[:num_lines]) + "\n"
+
+
+def search_text(
+    session: SearchSession, files: List[Path], pattern: str
+) -> List[FileSearchResult]:
+    results = []
+    for filename in files:
+        try:
+            code = filename.read_text(encoding="utf-8")
+        except UnicodeDecodeError:
+            continue
+        results.append(session.search_file(str(filename), code, pattern))
+    return results
+
+
+def search_bytes(
+    session: SearchSession, files: List[Path], pattern: str
+) -> List[FileSearchResult]:
+    return list(session.search_files(files, pattern))
+
+
+def best_time(runner: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        runner()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--lines", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    session = SearchSession(Config())
+    with tempfile.TemporaryDirectory() as directory:
+        files = []
+        for i in range(args.files):
+            path = Path(directory) / f"generated_{i}.py"
+            path.write_text(generate_source(args.lines, i))
+            files.append(path)
+        # Binary files are rejected by the first bytes, not by a failed decode
+        binary = Path(directory) / "data.bin"
+        binary.write_bytes(bytes(range(256)) * 4096)
+        files.append(binary)
+
+        for pattern in PATTERNS:
+            expected = [
+                (r.filename, r.output)
+                for r in search_text(session, files, pattern)
+                if r.has_matches
+            ]
+            actual = [
+                (r.filename, r.output)
+                for r in search_bytes(session, files, pattern)
+                if r.has_matches
+            ]
+            assert actual == expected, f"Results differ for {pattern!r}"
+
+        print(f"Corpus: {args.files} files x {args.lines} lines, one binary file")
+        for pattern in NO_MATCH_PATTERNS:
+            text_time = best_time(
+                lambda: search_text(session, files, pattern), args.repeat
+            )
+            bytes_time = best_time(
+                lambda: search_bytes(session, files, pattern), args.repeat
+            )
+            print(f"Pattern {pattern!r}, no matches")
+            print(f"  Text pipeline:  {text_time:.3f} s")
+            print(f"  Bytes pipeline: {bytes_time:.3f} s")
+            print(f"  Speedup: {text_time / bytes_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
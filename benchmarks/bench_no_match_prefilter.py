@@ -0,0 +1,75 @@
+"""
+Benchmark the regex-first prefilter on a corpus where no file matches.
+
+Compares the current lazy pipeline (parse only files with matches) against an
+eager run that forces syntax analysis before matching, as the pipeline did
+before the prefilter.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_no_match_prefilter.py [--files N] [--lines N]
+"""
+
+import argparse
+import time
+from typing import Callable
+
+from codegrep.application import Application
+from codegrep.config.config import Config
+
+SEARCH_PATTERN = "THIS_PATTERN_DOES_NOT_OCCUR"
+
+
+def generate_source(num_lines: int) -> str:
+    lines = []
+    method = 0
+    while len(lines) < num_lines:
+        lines.append(f"class Generated{method}:")
+        lines.append(f"    def method_{method}(self, value):")
+        lines.append(f"        if value > {method}:")
+        lines.append(f"            return value * {method}")
+        lines.append("        return None")
+        lines.append("")
+        method += 1
+    return "\n".join(lines[:num_lines]) + "\n"
+
+
+def run_lazy(config: Config) -> str:
+    return Application(config).run(SEARCH_PATTERN)
+
+
+def run_eager(config: Config) -> str:
+    application = Application(config)
+    application._analyzer._ensure_is_analyzed()
+    return application.run(SEARCH_PATTERN)
+
+
+def time_corpus(corpus: list[Config], runner: Callable[[Config], str]) -> float:
+    start = time.perf_counter()
+    for config in corpus:
+        runner(config)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--lines", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    code = generate_source(args.lines)
+    corpus = [
+        Config(filename=f"generated_{i}.py", code=code) for i in range(args.files)
+    ]
+
+    eager = min(time_corpus(corpus, run_eager) for _ in range(args.repeat))
+    lazy = min(time_corpus(corpus, run_lazy) for _ in range(args.repeat))
+
+    print(f"Corpus: {args.files} files x {args.lines} lines, no matches")
+    print(f"Eager (parse every file):   {eager:.3f} s")
+    print(f"Lazy (parse on match only): {lazy:.3f} s")
+    print(f"Speedup: {eager / lazy:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
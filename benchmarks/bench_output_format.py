@@ -0,0 +1,97 @@
+"""
+Benchmark recovering matched line numbers from text output vs structured records.
+
+The text pipeline searches with colors and line numbers, then strips ANSI codes and
+gutter markers with regexes to find the matched lines, as scripts reading the text
+output do. The record pipeline searches with `output_format="ndjson"` and
+serializes each record. Both must find the same line numbers. Syntax analysis is
+served from a warm analysis cache, so the timings are matching and output alone.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_output_format.py [--files N] [--lines N]
+"""
+
+import argparse
+import json
+import re
+import tempfile
+import time
+from typing import Callable, List
+
+from codegrep.config.config import Config
+from codegrep.search_session import SearchSession
+
+PATTERN = "return value"
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+MATCHED_LINE = re.compile(r"^\s*(\d+) █ ")
+
+
+def generate_source(num_lines: int) -> str:
+    lines = []
+    method = 0
+    while len(lines) < num_lines:
+        lines.append(f"class Generated{method}:")
+        lines.append(f"    def method_{method}(self, value):")
+        lines.append(f"        if value > {method}:")
+        lines.append(f"            return value * {method}")
+        lines.append("        return None")
+        lines.append("")
+        method += 1
+    return "\n".join(lines[:num_lines]) + "\n"
+
+
+def text_pipeline(codes: List[str], cache_dir: str) -> List[List[int]]:
+    session = SearchSession(Config(colors=True, line_numbers=True, cache_dir=cache_dir))
+    found = []
+    for i, code in enumerate(codes):
+        output = session.search(f"generated_{i}.py", code, PATTERN)
+        lines = []
+        for line in ANSI_ESCAPE.sub("", output).splitlines():
+            matched = MATCHED_LINE.match(line)
+            if matched:
+                lines.append(int(matched.group(1)))
+        found.append(lines)
+    return found
+
+
+def record_pipeline(codes: List[str], cache_dir: str) -> List[List[int]]:
+    session = SearchSession(Config(output_format="ndjson", cache_dir=cache_dir))
+    found = []
+    for i, code in enumerate(codes):
+        result = session.search_file(f"generated_{i}.py", code, PATTERN)
+        record = json.loads(json.dumps(result.record))
+        found.append([match["line"] for match in record["matches"]])
+    return found
+
+
+def best_time(runner: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        runner()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Every file differs, so each has its own analysis cache entry
+    codes = [f"# File {i}\n" + generate_source(args.lines) for i in range(args.files)]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        assert text_pipeline(codes, cache_dir) == record_pipeline(codes, cache_dir)
+
+        text_time = best_time(lambda: text_pipeline(codes, cache_dir), args.repeat)
+        record_time = best_time(lambda: record_pipeline(codes, cache_dir), args.repeat)
+    print(f"Corpus: {args.files} files x {args.lines} lines, pattern {PATTERN!r}")
+    print(f"  Text output + regexes: {text_time:.3f} s")
+    print(f"  NDJSON records:        {record_time:.3f} s")
+    print(f"  Speedup: {text_time / record_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
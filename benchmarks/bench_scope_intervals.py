@@ -0,0 +1,79 @@
+"""
+Benchmark the memory and time of the two syntax analysis result types.
+
+Compares SyntaxAnalysisResult (per-line sets and live tree-sitter nodes) against
+ScopeIntervals (flat int arrays) on one large generated file.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_scope_intervals.py [--lines N]
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from codegrep.SyntaxTreeAnalyzer import SyntaxTreeAnalyzer
+from codegrep.TreeSitterCodeParser import TreeSitterCodeParser
+
+
+def generate_source(num_lines: int) -> str:
+    lines = []
+    block = 0
+    while len(lines) < num_lines:
+        lines.append(f"class Generated{block}:")
+        lines.append(f"    def method_{block}(self, values):")
+        lines.append("        for value in values:")
+        lines.append(f"            if value > {block}:")
+        lines.append("                yield {")
+        lines.append(f"                    'value': value * {block},")
+        lines.append("                    'items': [value, value + 1],")
+        lines.append("                }")
+        lines.append("")
+        block += 1
+    return "\n".join(lines[:num_lines]) + "\n"
+
+
+def measure(build: Callable[[], Any]) -> tuple[float, int]:
+    """Return the build time in seconds and the bytes still held by its result."""
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+
+    # Tracing slows allocation down a lot, so memory is measured in a second run
+    tracemalloc.start()
+    result = build()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, retained
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100_000)
+    args = parser.parse_args()
+
+    code = generate_source(args.lines)
+    lines = code.splitlines()
+    root_node = TreeSitterCodeParser().parse(code, "python").root_node
+    analyzer = SyntaxTreeAnalyzer(verbose=False)
+
+    per_line_time, per_line_bytes = measure(lambda: analyzer.analyze(root_node, lines))
+    interval_time, interval_bytes = measure(
+        lambda: analyzer.analyze_intervals(root_node, lines)
+    )
+
+    mib = 1024 * 1024
+    print(f"File: {len(lines)} lines, {root_node.descendant_count} nodes")
+    print(
+        f"SyntaxAnalysisResult: {per_line_time:.3f} s, {per_line_bytes / mib:.1f} MiB"
+    )
+    print(
+        f"ScopeIntervals:       {interval_time:.3f} s, {interval_bytes / mib:.1f} MiB"
+    )
+    print(f"Memory reduction: {per_line_bytes / interval_bytes:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
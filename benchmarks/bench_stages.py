@@ -0,0 +1,545 @@
+"""
+Benchmark every stage of a search on its own, per language and size class.
+
+Generated files in every supported language and size class are written to a
+temporary tree, then each stage is timed on the output of the one before it:
+walk (FileWalker), read (SourceBuffer.from_file), match (RegexPatternMatcher),
+parse (TreeSitterCodeParser), filter (SyntaxKindIndex, as for `--only code`),
+analyze (SyntaxTreeAnalyzer.analyze_intervals), extract
+(HierarchicalContextExtractor) and format (AnsiCodeFormatter). Files of a real tree
+can be added with `--corpus`, grouped by language. Stages that need a parser are
+skipped for languages without one (plain text).
+
+Results can be saved as JSON with `--output`, and two saved runs compared with
+`--compare`, which lists the stages that got slower and exits with status 1 if any
+did by more than the threshold.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_stages.py [--sizes small,medium]
+        [--languages python,go] [--corpus DIR] [--output results.json]
+    PYTHONPATH=src python benchmarks/bench_stages.py --compare old.json new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+from codegrep.AnsiCodeFormatter import AnsiCodeFormatter
+from codegrep.cli.FileWalker import FileWalker
+from codegrep.config.config import Config
+from codegrep.contracts.CodeLine import CodeLine
+from codegrep.HierarchicalContextExtractor import HierarchicalContextExtractor
+from codegrep.language_detection.LanguageCode import LanguageCode
+from codegrep.language_detection.LanguageCodeDetector import LanguageCodeDetector
+from codegrep.pattern_matching.contracts.models import PatternMatchResult
+from codegrep.pattern_matching.RegexPatternMatcher import RegexPatternMatcher
+from codegrep.SourceBuffer import SourceBuffer
+from codegrep.SyntaxKindIndex import SyntaxKindIndex
+from codegrep.SyntaxTreeAnalyzer import SyntaxTreeAnalyzer
+from codegrep.TreeSitterCodeParser import TreeSitterCodeParser
+
+RESULTS_VERSION = 1
+STAGES = ("walk", "read", "match", "parse", "filter", "analyze", "extract", "format")
+# Matches the needle of one generated unit in ten
+PATTERN = r"needle_\d*7\b"
+
+# Files per size class and lines per file
+SIZE_CLASSES: Dict[str, tuple[int, int]] = {
+    "small": (50, 100),
+    "medium": (10, 1_000),
+    "large": (2, 10_000),
+}
+
+# File name suffix, file header and repeated unit of the generated files; `{i}`
+# is the unit number
+LANGUAGE_TEMPLATES: Dict[LanguageCode, tuple[str, str, str]] = {
+    LanguageCode.BASH: (
+        ".sh",
+        "#!/bin/sh\n",
+        'handle_{i}() {\n  local value="$1"\n  if [ "$value" -gt {i} ]; then\n'
+        '    echo "needle_{i} $value"\n  fi\n}\n\n',
+    ),
+    LanguageCode.C: (
+        ".c",
+        "#include <stdio.h>\n\n",
+        "int handle_{i}(int value) {\n    if (value > {i}) {\n"
+        "        return needle_{i}(value);\n    }\n    return 0;\n}\n\n",
+    ),
+    LanguageCode.CPP: (
+        ".cpp",
+        "#include <vector>\n\n",
+        "class Service{i} {\npublic:\n    int handle(int value) {\n"
+        "        if (value > {i}) {\n            return needle_{i}(value);\n"
+        "        }\n        return 0;\n    }\n};\n\n",
+    ),
+    LanguageCode.CSHARP: (
+        ".cs",
+        "using System;\n\n",
+        "public class Service{i}\n{\n    public int Handle(int value)\n    {\n"
+        "        if (value > {i})\n        {\n"
+        "            return Needles.needle_{i}(value);\n        }\n"
+        "        return 0;\n    }\n}\n\n",
+    ),
+    LanguageCode.CSV: (
+        ".csv",
+        "id,name,value,ratio\n",
+        "{i},needle_{i},value_{i},{i}.5\n",
+    ),
+    LanguageCode.DOCKERFILE: (
+        ".dockerfile",
+        "",
+        "FROM python:3.{i} AS stage{i}\nRUN apt-get update \\\n"
+        "    && apt-get install -y needle_{i} \\\n"
+        "    && rm -rf /var/lib/apt/lists/*\nENV VALUE_{i}={i}\n\n",
+    ),
+    LanguageCode.GO: (
+        ".go",
+        "package main\n\n",
+        "func handle{i}(value int) int {\n\tif value > {i} {\n"
+        "\t\treturn needle_{i}(value)\n\t}\n\treturn 0\n}\n\n",
+    ),
+    LanguageCode.JAVA: (
+        ".java",
+        "package generated;\n\n",
+        "class Service{i} {\n    int handle(int value) {\n"
+        "        if (value > {i}) {\n            return Needles.needle_{i}(value);\n"
+        "        }\n        return 0;\n    }\n}\n\n",
+    ),
+    LanguageCode.JAVASCRIPT: (
+        ".js",
+        '"use strict";\n\n',
+        "function handle{i}(value) {\n  if (value > {i}) {\n"
+        "    return needle_{i}(value);\n  }\n  return null;\n}\n\n",
+    ),
+    LanguageCode.MARKDOWN: (
+        ".md",
+        "# Generated\n\n",
+        "## Section {i}\n\nSome text about needle_{i} and its value.\n\n"
+        "- item {i}\n- another item\n\n",
+    ),
+    LanguageCode.PYTHON: (
+        ".py",
+        "import os\n\n",
+        "class Service{i}:\n    def handle(self, value):\n"
+        "        if value > {i}:\n            result = needle_{i}(value)\n"
+        "            return result\n        return None\n\n",
+    ),
+    LanguageCode.PHP: (
+        ".php",
+        "<?php\n\n",
+        "function handle_{i}($value) {\n    if ($value > {i}) {\n"
+        "        return needle_{i}($value);\n    }\n    return null;\n}\n\n",
+    ),
+    LanguageCode.RUBY: (
+        ".rb",
+        "require 'json'\n\n",
+        "class Service{i}\n  def handle(value)\n    if value > {i}\n"
+        "      needle_{i}(value)\n    end\n  end\nend\n\n",
+    ),
+    LanguageCode.RUST: (
+        ".rs",
+        "use std::io;\n\n",
+        "fn handle_{i}(value: i64) -> i64 {\n    if value > {i} {\n"
+        "        return needle_{i}(value);\n    }\n    0\n}\n\n",
+    ),
+    LanguageCode.TOML: (
+        ".toml",
+        'title = "generated"\n\n',
+        '[section_{i}]\nname = "needle_{i}"\nvalues = [{i}, 2, 3]\n\n',
+    ),
+    LanguageCode.TYPESCRIPT: (
+        ".ts",
+        'import { needles } from "./needles";\n\n',
+        "export class Service{i} {\n  handle(value: number): number {\n"
+        "    if (value > {i}) {\n      return needles.needle_{i}(value);\n"
+        "    }\n    return 0;\n  }\n}\n\n",
+    ),
+    LanguageCode.TXT: (
+        ".txt",
+        "",
+        "Line {i} mentions needle_{i} in plain text.\n",
+    ),
+    LanguageCode.YAML: (
+        ".yaml",
+        "---\n",
+        "service_{i}:\n  name: needle_{i}\n  replicas: {i}\n  ports:\n    - 80\n",
+    ),
+}
+
+
+def generate_source(language: LanguageCode, num_lines: int, file_number: int) -> str:
+    _, header, unit = LANGUAGE_TEMPLATES[language]
+    lines = header.splitlines()
+    i = file_number * num_lines
+    while len(lines) < num_lines:
+        lines.extend(unit.replace("{i}", str(i)).splitlines())
+        i += 1
+    return "\n".join(lines[:num_lines]) + "\n"
+
+
+def generate_corpus(
+    root: Path, languages: Sequence[LanguageCode], sizes: Sequence[str]
+) -> Dict[tuple[str, str], List[Path]]:
+    """Write the generated files under root/<size>/<language>/, grouped by case."""
+    cases: Dict[tuple[str, str], List[Path]] = {}
+    for size in sizes:
+        num_files, num_lines = SIZE_CLASSES[size]
+        for language in languages:
+            directory = root / size / language.value
+            directory.mkdir(parents=True)
+            suffix = LANGUAGE_TEMPLATES[language][0]
+            files = []
+            for file_number in range(num_files):
+                path = directory / f"generated_{file_number}{suffix}"
+                path.write_text(generate_source(language, num_lines, file_number))
+                files.append(path)
+            cases[(language.value, size)] = files
+    return cases
+
+
+def collect_corpus(directory: str) -> Dict[tuple[str, str], List[Path]]:
+    """Group the files of a real tree by language, skipping unknown ones."""
+    detector = LanguageCodeDetector()
+    files_by_language: Dict[str, List[Path]] = defaultdict(list)
+    for path in FileWalker().walk([directory]):
+        language = detector.detect_language(str(path))
+        if language != LanguageCode.UNKNOWN:
+            files_by_language[language.value].append(path)
+    name = f"corpus:{Path(directory).resolve().name}"
+    return {
+        (language, name): files for language, files in sorted(files_by_language.items())
+    }
+
+
+def best_time(runner: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        runner()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+class StageRunner:
+    """Times the stages of one case, each on the output of the stage before it."""
+
+    def __init__(self, repeat: int) -> None:
+        self._repeat = repeat
+        self._config = Config(colors=True, line_numbers=True)
+        self._matcher = RegexPatternMatcher()
+        self._parser = TreeSitterCodeParser()
+        self._analyzer = SyntaxTreeAnalyzer(verbose=False)
+        self._extractor = HierarchicalContextExtractor(
+            header_max=self._config.header_max,
+            child_scopes=self._config.child_scopes,
+            last_line=self._config.last_line,
+            parent_scopes=self._config.parent_scopes,
+            loi_pad=self._config.loi_pad,
+            show_top_scope=self._config.show_top_scope,
+            margin=self._config.margin,
+        )
+        self._formatter = AnsiCodeFormatter(self._config)
+
+    def walk(self, paths: Sequence[Path]) -> float:
+        return best_time(lambda: list(FileWalker().walk(paths)), self._repeat)
+
+    def run_case(self, language: str, files: List[Path]) -> Dict[str, float]:
+        timings: Dict[str, float] = {}
+
+        def read() -> List[SourceBuffer]:
+            sources = []
+            for path in files:
+                try:
+                    sources.append(SourceBuffer.from_file(path))
+                except (OSError, ValueError):
+                    continue
+            return sources
+
+        timings["read"] = best_time(read, self._repeat)
+        sources = read()
+        if not sources:
+            return timings
+
+        def match() -> List[PatternMatchResult]:
+            return [
+                self._matcher.match_source(PATTERN, source, False) for source in sources
+            ]
+
+        timings["match"] = best_time(match, self._repeat)
+        results = match()
+        lines_of_interest = [
+            {m.line_number for m in result.matches} for result in results
+        ]
+
+        try:
+            self._parser.parse(b"", language)
+        except ValueError:
+            # No parser, so files of this language are never analyzed
+            return timings
+
+        def parse() -> List[Any]:
+            return [self._parser.parse(source.view, language) for source in sources]
+
+        timings["parse"] = best_time(parse, self._repeat)
+        trees = parse()
+
+        def filter_matches() -> List[Any]:
+            return [
+                SyntaxKindIndex(
+                    tree, [match.line_number for match in result.matches]
+                ).filter_matches(result.matches, "code", source)
+                for tree, result, source in zip(trees, results, sources)
+            ]
+
+        timings["filter"] = best_time(filter_matches, self._repeat)
+
+        def analyze() -> List[Any]:
+            return [
+                self._analyzer.analyze_intervals(tree.root_node, source)
+                for tree, source in zip(trees, sources)
+            ]
+
+        timings["analyze"] = best_time(analyze, self._repeat)
+        scope_indexes = analyze()
+
+        def extract() -> List[set[int]]:
+            return [
+                self._extractor.extract_context(
+                    syntax_result=scope_index, lines_of_interest=lines
+                )
+                for scope_index, lines in zip(scope_indexes, lines_of_interest)
+            ]
+
+        timings["extract"] = best_time(extract, self._repeat)
+        lines_to_show = extract()
+
+        code_lines = [
+            [
+                CodeLine(line_number=i, content=line, is_of_interest=i in lines)
+                for i, line in enumerate(source)
+            ]
+            for source, lines in zip(sources, lines_of_interest)
+        ]
+
+        def format_output() -> List[str]:
+            return [
+                self._formatter.format(shown, lines)
+                for shown, lines in zip(lines_to_show, code_lines)
+            ]
+
+        timings["format"] = best_time(format_output, self._repeat)
+        return timings
+
+
+def environment() -> Dict[str, Any]:
+    versions = {}
+    for package in ("codegrep", "tree-sitter", "tree-sitter-language-pack"):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions,
+    }
+
+
+def case_size(files: List[Path]) -> tuple[int, int]:
+    """Total lines and bytes of the files of a case."""
+    lines = size = 0
+    for path in files:
+        data = path.read_bytes()
+        lines += data.count(b"\n")
+        size += len(data)
+    return lines, size
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    languages = [LanguageCode(name) for name in args.languages.split(",")]
+    sizes = args.sizes.split(",") if args.sizes else []
+    stages = set(args.stages.split(","))
+    runner = StageRunner(args.repeat)
+    results: List[Dict[str, Any]] = []
+
+    def report(
+        stage: str, language: str, size: str, files: List[Path], seconds: float
+    ) -> None:
+        lines, num_bytes = case_size(files)
+        results.append(
+            {
+                "stage": stage,
+                "language": language,
+                "size": size,
+                "files": len(files),
+                "lines": lines,
+                "bytes": num_bytes,
+                "seconds": seconds,
+            }
+        )
+        throughput = num_bytes / seconds / 1e6 if seconds else float("inf")
+        print(
+            f"{stage:8} {language:11} {size:16} {len(files):>6} {lines:>8}"
+            f" {seconds * 1000:>10.2f} ms {throughput:>9.1f} MB/s"
+        )
+
+    print(
+        f"{'Stage':8} {'Language':11} {'Size':16} {'Files':>6} {'Lines':>8}"
+        f" {'Best time':>13} {'Throughput':>14}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory)
+        cases = generate_corpus(root, languages, sizes)
+        if args.corpus:
+            cases.update(collect_corpus(args.corpus))
+
+        # Walking is timed per tree, over every language at once
+        trees = [(size, [root / size]) for size in sizes]
+        if args.corpus:
+            trees.append((f"corpus:{Path(args.corpus).resolve().name}", [args.corpus]))
+        for size, paths in trees:
+            if "walk" in stages:
+                walked = list(FileWalker().walk(paths))
+                report("walk", "all", size, walked, runner.walk(paths))
+
+        for (language, size), files in cases.items():
+            timings = runner.run_case(language, files)
+            for stage in STAGES:
+                if stage in stages and stage in timings:
+                    report(stage, language, size, files, timings[stage])
+
+    return {
+        "version": RESULTS_VERSION,
+        "pattern": PATTERN,
+        "repeat": args.repeat,
+        "environment": environment(),
+        "results": results,
+    }
+
+
+def compare(old_path: str, new_path: str, threshold: float, min_delta: float) -> int:
+    """Print how every stage changed between two runs, return 1 on regressions."""
+    with open(old_path, encoding="utf8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf8") as f:
+        new = json.load(f)
+    for run in (old, new):
+        if run.get("version") != RESULTS_VERSION:
+            raise SystemExit(f"Unsupported results version: {run.get('version')}")
+
+    def key(result: Dict[str, Any]) -> tuple[str, str, str]:
+        return result["stage"], result["language"], result["size"]
+
+    old_results = {key(result): result for result in old["results"]}
+    regressions = 0
+    print(
+        f"{'Stage':8} {'Language':11} {'Size':16} {'Old':>12} {'New':>12} {'Change':>8}"
+    )
+    for result in new["results"]:
+        previous = old_results.pop(key(result), None)
+        if previous is None:
+            print(
+                f"{result['stage']:8} {result['language']:11} {result['size']:16}"
+                f" {'-':>12} {result['seconds'] * 1000:>9.2f} ms {'new':>8}"
+            )
+            continue
+        if (previous["files"], previous["lines"]) != (result["files"], result["lines"]):
+            note = "  (different input)"
+        else:
+            note = ""
+        old_seconds, new_seconds = previous["seconds"], result["seconds"]
+        change = new_seconds / old_seconds - 1 if old_seconds else 0.0
+        is_regression = (
+            change > threshold and new_seconds - old_seconds > min_delta and not note
+        )
+        regressions += is_regression
+        print(
+            f"{result['stage']:8} {result['language']:11} {result['size']:16}"
+            f" {old_seconds * 1000:>9.2f} ms {new_seconds * 1000:>9.2f} ms"
+            f" {change:>+8.1%}{'  REGRESSION' if is_regression else ''}{note}"
+        )
+    for stage, language, size in old_results:
+        print(f"{stage:8} {language:11} {size:16} missing from {new_path}")
+
+    if old["environment"] != new["environment"]:
+        print("Note: the runs were made in different environments")
+    print(f"{regressions} regression(s) over {threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--languages",
+        default=",".join(language.value for language in LANGUAGE_TEMPLATES),
+        help="Comma-separated languages of the generated files (default: all)",
+    )
+    parser.add_argument(
+        "--sizes",
+        default=",".join(SIZE_CLASSES),
+        help="Comma-separated size classes of the generated files, or empty for "
+        f"none (default: all of {', '.join(SIZE_CLASSES)})",
+    )
+    parser.add_argument(
+        "--stages",
+        default=",".join(STAGES),
+        help="Comma-separated stages to report (default: all)",
+    )
+    parser.add_argument("--corpus", help="Also benchmark the files of this directory")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Save the results as JSON to this file")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("OLD", "NEW"),
+        help="Compare two saved runs instead of running the benchmark",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Slowdown reported as a regression, as a fraction (default: 0.10)",
+    )
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=0.5,
+        help="Ignore slowdowns smaller than this, as timer noise (default: 0.5)",
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold, args.min_delta_ms / 1000))
+
+    for size in args.sizes.split(",") if args.sizes else []:
+        if size not in SIZE_CLASSES:
+            parser.error(f"Unknown size class: {size}")
+    known_languages = {language.value for language in LANGUAGE_TEMPLATES}
+    for name in args.languages.split(","):
+        if name not in known_languages:
+            parser.error(f"Unknown language: {name}")
+    for stage in args.stages.split(","):
+        if stage not in STAGES:
+            parser.error(f"Unknown stage: {stage}")
+
+    run = run_benchmark(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as f:
+            json.dump(run, f, indent=2)
+            f.write("\n")
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark the cold start of a `codegrep` search that finds nothing.
+
+Runs the CLI in fresh processes on a generated file without a match, as scripts
+running it in a loop do, and reports the wall time next to that of a bare
+`python -c pass`. One more run with `python -X importtime` shows the slowest
+imports and checks that modules only needed to parse, color or search in parallel
+(tree-sitter, pathspec, colorama, asyncio...) are not imported.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_startup.py [--runs N] [--top N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+PATTERN = "NOT_IN_THE_FILE"
+# Modules a search without matches has no use for
+LAZY_MODULES = (
+    "tree_sitter",
+    "tree_sitter_language_pack",
+    "pathspec",
+    "colorama",
+    "asyncio",
+    "concurrent.futures",
+)
+
+
+def generate_source(num_lines: int) -> str:
+    lines = []
+    method = 0
+    while len(lines) < num_lines:
+        lines.append(f"class Generated{method}:")
+        lines.append(f"    def method_{method}(self, value):")
+        lines.append(f"        if value > {method}:")
+        lines.append(f"            return value * {method}")
+        lines.append("        return None")
+        lines.append("")
+        method += 1
+    return "\n".join(lines[:num_lines]) + "\n"
+
+
+def run_times(command: List[str], runs: int, env: Dict[str, str]) -> List[float]:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def import_times(command: List[str], env: Dict[str, str]) -> tuple[Dict[str, int], int]:
+    """
+    Run with `-X importtime`, return the cumulative microseconds per module and
+    the total of the top-level imports.
+    """
+    completed = subprocess.run(
+        [command[0], "-X", "importtime", *command[1:]],
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    cumulative = {}
+    top_level_total = 0
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, total, name = line[len("import time:") :].split("|")
+        cumulative[name.strip()] = int(total)
+        # Nested imports are indented by two more spaces per level
+        if not name.startswith("  "):
+            top_level_total += int(total)
+    return cumulative, top_level_total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=2_000)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    src = str(Path(__file__).resolve().parent.parent / "src")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src, env.get("PYTHONPATH")]))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "generated.py"
+        path.write_text(generate_source(args.lines))
+        search = [sys.executable, "-m", "codegrep", PATTERN, str(path), "--no-daemon"]
+
+        bare = run_times([sys.executable, "-c", "pass"], args.runs, env)
+        searches = run_times(search, args.runs, env)
+        imports, import_total = import_times(search, env)
+
+    print(f"Search for {PATTERN!r} in {args.lines} lines, {args.runs} runs")
+    print(f"{'':24} {'Best':>9} {'Median':>9}")
+    for name, timings in (("python -c pass", bare), ("codegrep", searches)):
+        print(
+            f"{name:24} {min(timings) * 1000:>6.1f} ms"
+            f" {statistics.median(timings) * 1000:>6.1f} ms"
+        )
+    print(
+        f"{'codegrep minus python':24}"
+        f" {(min(searches) - min(bare)) * 1000:>6.1f} ms"
+        f" {(statistics.median(searches) - statistics.median(bare)) * 1000:>6.1f} ms"
+    )
+
+    # Measured with -X importtime, which slows imports down
+    print(f"\nImport time: {import_total / 1000:.1f} ms, slowest:")
+    for name, us in sorted(imports.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"  {us / 1000:>7.1f} ms  {name}")
+
+    loaded = [name for name in LAZY_MODULES if name in imports]
+    print(f"\nModules loaded needlessly: {', '.join(loaded) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
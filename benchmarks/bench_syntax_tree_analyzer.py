@@ -0,0 +1,125 @@
+"""
+Benchmark SyntaxTreeAnalyzer on a single large file.
+
+Compares the TreeCursor walk against the previous recursive walker (kept here as a
+reference) on a generated file with deep nesting, and checks that both produce the
+same SyntaxAnalysisResult.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_syntax_tree_analyzer.py [--lines N]
+"""
+
+import argparse
+import sys
+import time
+from typing import Any, Callable, List
+
+from codegrep.contracts.ScopeHeader import ScopeHeader
+from codegrep.contracts.SyntaxAnalysisResult import SyntaxAnalysisResult
+from codegrep.SyntaxTreeAnalyzer import SyntaxTreeAnalyzer
+from codegrep.TreeSitterCodeParser import TreeSitterCodeParser
+
+
+def generate_source(num_lines: int, nesting: int) -> str:
+    """Classes with nested methods, long elif chains and deeply nested literals."""
+    lines: list[str] = []
+    block = 0
+    while len(lines) < num_lines:
+        lines.append(f"class Generated{block}:")
+        lines.append(f"    def method_{block}(self, value):")
+        lines.append("        if value == 0:")
+        lines.append("            return 0")
+        for branch in range(1, nesting):
+            lines.append(f"        elif value == {branch}:")
+            lines.append(f"            return value * {branch}")
+        lines.append("        return None")
+        lines.append("")
+        lines.append(f"TABLE_{block} = (")
+        for depth in range(nesting):
+            lines.append("    " * (depth + 1) + "[")
+        for depth in reversed(range(nesting)):
+            lines.append("    " * (depth + 1) + f"{depth}],")
+        lines.append(")")
+        lines.append("")
+        block += 1
+    return "\n".join(lines[:num_lines]) + "\n"
+
+
+def analyze_recursively(root_node: Any, lines: List[str]) -> SyntaxAnalysisResult:
+    """The walker SyntaxTreeAnalyzer used before the TreeCursor rewrite."""
+    scopes_by_line: List[set[int]] = [set() for _ in lines]
+    scope_headers: List[List[ScopeHeader]] = [[] for _ in lines]
+    ast_nodes_by_line: List[List[Any]] = [[] for _ in lines]
+
+    def walk(node: Any) -> None:
+        start_line = node.start_point[0]
+        end_line = node.end_point[0]
+        size = end_line - start_line
+
+        if start_line < len(ast_nodes_by_line):
+            ast_nodes_by_line[start_line].append(node)
+
+        if size > 0 and start_line < len(scope_headers):
+            scope_headers[start_line].append(
+                ScopeHeader(
+                    scope_size=size,
+                    scope_start_line=start_line,
+                    scope_end_line=end_line,
+                )
+            )
+
+        for i in range(start_line, min(end_line + 1, len(scopes_by_line))):
+            scopes_by_line[i].add(start_line)
+
+        for child in node.children:
+            walk(child)
+
+    walk(root_node)
+    return SyntaxAnalysisResult(
+        scopes_by_line=scopes_by_line,
+        scope_headers=scope_headers,
+        ast_nodes_by_line=ast_nodes_by_line,
+    )
+
+
+def best_time(runner: Callable[[], SyntaxAnalysisResult], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        runner()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=50_000)
+    parser.add_argument("--nesting", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # The recursive walker needs a frame per tree level
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10 * args.nesting))
+
+    code = generate_source(args.lines, args.nesting)
+    lines = code.splitlines()
+    root_node = TreeSitterCodeParser().parse(code, "python").root_node
+    analyzer = SyntaxTreeAnalyzer(verbose=False)
+
+    cursor_result = analyzer.analyze(root_node, lines)
+    recursive_result = analyze_recursively(root_node, lines)
+    assert cursor_result.scopes_by_line == recursive_result.scopes_by_line
+    assert cursor_result.scope_headers == recursive_result.scope_headers
+    assert cursor_result.ast_nodes_by_line == recursive_result.ast_nodes_by_line
+
+    recursive = best_time(lambda: analyze_recursively(root_node, lines), args.repeat)
+    cursor = best_time(lambda: analyzer.analyze(root_node, lines), args.repeat)
+
+    print(f"File: {len(lines)} lines, nesting depth {args.nesting}")
+    print(f"Recursive walker:  {recursive:.3f} s")
+    print(f"TreeCursor walker: {cursor:.3f} s")
+    print(f"Speedup: {recursive / cursor:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark re-searching a file after a one-line edit, for growing file sizes.
+
+Compares WatchSession (incremental reparse against the previous tree, scopes looked
+up on demand) against a fresh SearchSession search (full parse and analysis) of the
+edited file. Both must give the same output.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_watch_reparse.py [--sizes N,N,...]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from codegrep.config.config import Config
+from codegrep.search_session import SearchSession
+from codegrep.watch_session import WatchSession
+
+SEARCH_PATTERN = "EDITED_VALUE"
+
+
+def generate_lines(num_lines: int) -> List[str]:
+    lines = []
+    method = 0
+    while len(lines) < num_lines:
+        lines.append(f"class Generated{method}:")
+        lines.append(f"    def method_{method}(self, value):")
+        lines.append(f"        if value > {method}:")
+        lines.append(f"            return value * {method}")
+        lines.append("        return None")
+        lines.append("")
+        method += 1
+    return lines[:num_lines]
+
+
+def best_time(runner: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        runner()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'Lines':>8} {'Full search':>12} {'Watch search':>13}")
+    for num_lines in map(int, args.sizes.split(",")):
+        lines = generate_lines(num_lines)
+        # The edited line sits inside a method in the middle of the file
+        edited = num_lines // 2 - num_lines // 2 % 6 + 3
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "generated.py"
+            path.write_text("\n".join(lines) + "\n")
+
+            watch = WatchSession(Config())
+            full = SearchSession(Config())
+            watch.search(path, SEARCH_PATTERN)
+
+            version = 0
+
+            def edit_file() -> None:
+                nonlocal version
+                version += 1
+                lines[edited] = f"            return EDITED_VALUE * {version}"
+                path.write_text("\n".join(lines) + "\n")
+
+            def run_watch() -> str:
+                edit_file()
+                return watch.search(path, SEARCH_PATTERN).output
+
+            def run_full() -> str:
+                edit_file()
+                return full.search_file(
+                    str(path), path.read_text(), SEARCH_PATTERN
+                ).output
+
+            assert (
+                run_watch()
+                == full.search_file(str(path), path.read_text(), SEARCH_PATTERN).output
+            )
+
+            # Editing the file is part of both timings and takes the same time
+            watch_time = best_time(run_watch, args.repeat)
+            full_time = best_time(run_full, args.repeat)
+
+        print(
+            f"{num_lines:>8} {full_time * 1000:>9.1f} ms {watch_time * 1000:>10.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
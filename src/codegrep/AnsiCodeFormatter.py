@@ -1,4 +1,4 @@
-from typing import List, Set
+from typing import Iterator, Sequence, Set
 
 from codegrep.config.config import Config
 from codegrep.contracts.CodeLine import CodeLine
@@ -17,19 +17,24 @@ class AnsiCodeFormatter:
     def __init__(self, config: Config) -> None:
         self._config = config
 
-    def format(self, lines_to_show: Set[int], code_lines: List[CodeLine]) -> str:
+    def format(self, lines_to_show: Set[int], code_lines: Sequence[CodeLine]) -> str:
         """
         Format a subset of lines for display, including color, numbering, and markers.
         """
+        return "\n".join(self.format_lines(lines_to_show, code_lines))
+
+    def format_lines(
+        self, lines_to_show: Set[int], code_lines: Sequence[CodeLine]
+    ) -> Iterator[str]:
+        """Yield the output lines of `format` one by one, without joining them."""
         if not lines_to_show or not code_lines:
-            return ""
+            return
 
         lines_to_show_sorted = sorted(lines_to_show)
-        output_lines: List[str] = []
         last_shown = -2  # Tracks previous line to decide when to insert "⋮"
 
         if self._config.colors:
-            output_lines.append(AnsiForeground.RESET.value)  # Reset ANSI state at start
+            yield AnsiForeground.RESET.value  # Reset ANSI state at start
 
         for line_index in lines_to_show_sorted:
             if line_index >= len(code_lines):
@@ -39,20 +44,17 @@ class AnsiCodeFormatter:
             if line_index > last_shown + 1:
                 gap_marker = "⋮"
                 if self._config.line_numbers:
-                    output_lines.append(f"   {gap_marker}")
+                    yield f"   {gap_marker}"
                 else:
-                    output_lines.append(gap_marker)
+                    yield gap_marker
 
-            formatted = self._format_single_line(code_lines[line_index])
-            output_lines.append(formatted)
+            yield self._format_single_line(code_lines[line_index])
             last_shown = line_index
 
         # Reset color at the end (safe for terminal output)
         if self._config.colors:
             # output_lines.append("\033[0m")
-            output_lines.append(AnsiForeground.RESET.value)
-
-        return "\n".join(output_lines)
+            yield AnsiForeground.RESET.value
 
     def _format_single_line(self, code_line: CodeLine) -> str:
         """
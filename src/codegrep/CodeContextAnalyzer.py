@@ -1,18 +1,57 @@
-from typing import Set
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Sequence, Set, overload
 
 from .AnsiCodeFormatter import AnsiCodeFormatter
 from .config.config import Config
 from .contracts.CodeLine import CodeLine
+from .contracts.IAnalysisCache import IAnalysisCache
 from .contracts.ICodeParser import ICodeParser
-from .contracts.SyntaxAnalysisResult import SyntaxAnalysisResult
+from .contracts.IScopeIndex import IScopeIndex
+from .contracts.IStatsRecorder import IStatsRecorder
 from .formating.contracts.ISpanHighlighter import ISpanHighlighter
 from .HierarchicalContextExtractor import HierarchicalContextExtractor
+from .JsonRecordFormatter import JsonRecordFormatter
 from .language_detection.LanguageCode import LanguageCode
 from .language_detection.LanguageCodeDetector import LanguageCodeDetector
-from .pattern_matching.contracts.IPatternMatcher import IPatternMatcher
-from .pattern_matching.contracts.models import PatternMatchResult
+from .OnDemandScopeIndex import OnDemandScopeIndex
+from .pattern_matching.contracts.IPatternMatcher import IPatternMatcher, first_lines
+from .pattern_matching.contracts.ITreePatternMatcher import ITreePatternMatcher
+from .pattern_matching.contracts.models import MatchSpan, PatternMatchResult
+from .SourceBuffer import SourceBuffer
+from .SyntaxKindIndex import SyntaxKindIndex
 from .SyntaxTreeAnalyzer import SyntaxTreeAnalyzer
 
+if TYPE_CHECKING:
+    from tree_sitter import Tree
+
+
+class _CodeLines(Sequence[CodeLine]):
+    """Code lines of a source buffer, each created (and decoded) on first access."""
+
+    def __init__(self, source: SourceBuffer) -> None:
+        self._source = source
+        self._code_lines: dict[int, CodeLine] = {}
+
+    def __len__(self) -> int:
+        return len(self._source)
+
+    @overload
+    def __getitem__(self, index: int) -> CodeLine: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[CodeLine]: ...
+
+    def __getitem__(self, index: int | slice) -> CodeLine | list[CodeLine]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+        if index < 0:
+            index += len(self)
+        code_line = self._code_lines.get(index)
+        if code_line is None:
+            code_line = CodeLine(line_number=index, content=self._source[index])
+            self._code_lines[index] = code_line
+        return code_line
+
 
 class CodeContextAnalyzer:
     def __init__(
@@ -23,13 +62,25 @@ class CodeContextAnalyzer:
         pattern_matcher: IPatternMatcher,
         span_highlighter: ISpanHighlighter,
         code_formatter: AnsiCodeFormatter,
+        analysis_cache: IAnalysisCache | None = None,
+        source: SourceBuffer | None = None,
+        record_formatter: JsonRecordFormatter | None = None,
+        stats: IStatsRecorder | None = None,
+        tree_pattern_matcher: ITreePatternMatcher | None = None,
     ) -> None:
         self._config = config
+        # The code of `config` is only encoded when no source buffer is given
+        self._given_source = source
         self._language_detector = language_detector
         self._code_parser = code_parser
         self._pattern_matcher = pattern_matcher
+        # Matches patterns against syntax trees instead of `pattern_matcher`
+        self._tree_pattern_matcher = tree_pattern_matcher
         self._span_highlighter = span_highlighter
         self._code_formatter = code_formatter
+        self._analysis_cache = analysis_cache
+        self._record_formatter = record_formatter or JsonRecordFormatter()
+        self._stats = stats
 
         self._syntax_tree_analyzer = SyntaxTreeAnalyzer(verbose=self._config.verbose)
         self._context_extractor = HierarchicalContextExtractor(
@@ -43,69 +94,225 @@ class CodeContextAnalyzer:
             verbose=self._config.verbose,
         )
 
-        self._highlight_spans: dict[int, list[tuple[int, int]]] = {}
-        self._syntax_tree_analysis_result: SyntaxAnalysisResult | None = None
+        self._match_spans: dict[int, list[MatchSpan]] = {}
+        self._syntax_tree_analysis_result: IScopeIndex | None = None
 
-    def grep(self, search_pattern: str, ignore_case: bool = False) -> Set[int]:
-        self._ensure_is_analyzed()
+    def grep(
+        self,
+        search_pattern: str | Sequence[str],
+        ignore_case: bool = False,
+        max_count: int | None = None,
+    ) -> Set[int]:
+        """
+        Find the lines matching `search_pattern`, or any of several patterns, which
+        are all matched in the same scan; their spans tell which pattern matched.
+        With a tree pattern matcher, the file is parsed first and the patterns are
+        matched against its syntax tree. With `config.only`, matches outside the
+        kind of code it names are dropped before any context is looked up.
+
+        Only the first `max_count` (or `config.max_count`, if lower) matching lines
+        are kept, and the scan stops there. With `config.matches_only` nothing else
+        is done once a matching file is known to be parsable: the file is not
+        analyzed and there is no output to get.
+        """
+        self._ensure_lines_are_split()
 
-        result: PatternMatchResult = self._pattern_matcher.match(
-            search_pattern, self._lines, ignore_case
+        self._patterns = (
+            [search_pattern]
+            if isinstance(search_pattern, str)
+            else list(search_pattern)
         )
+        max_lines = min(
+            (
+                limit
+                for limit in (max_count, self._config.max_count)
+                if limit is not None
+            ),
+            default=None,
+        )
+        if self._tree_pattern_matcher is not None:
+            result = self._match_tree()
+        else:
+            # Matches dropped by `only` must not count towards the limit
+            result = self._match(
+                ignore_case, max_lines if self._config.only is None else None
+            )
+        if self._config.only is not None and result.matches:
+            result = self._keep_only(result)
+        result = first_lines(result, max_lines)
 
         matched_line_numbers = {m.line_number for m in result.matches}
+        if self._stats is not None:
+            self._stats.add_count("files_searched")
+            self._stats.add_count("lines_scanned", len(self._source))
+            if matched_line_numbers:
+                self._stats.add_count("files_matched")
 
         self._lines_of_interest = matched_line_numbers
 
-        if self._config.colors:
-            for match in result.matches:
-                self._highlight_spans[match.line_number] = match.spans
+        # Parsing, scope analysis and highlighting are only paid for files with matches
+        if not matched_line_numbers:
+            return matched_line_numbers
+        if self._config.matches_only:
+            # Files that can not be parsed are rejected as in any other search
+            self._ensure_language_is_detected()
+            self._code_parser.check_language(self._language.value)
+            return matched_line_numbers
+
+        self._ensure_is_analyzed()
+
+        for match in result.matches:
+            self._match_spans[match.line_number] = match.spans
+        # Structured output carries the spans instead of highlighted text
+        if self._config.colors and self._config.output_format == "text":
+            start = time.perf_counter()
             self._apply_highlighting()
+            if self._stats is not None:
+                self._stats.add_time("format", time.perf_counter() - start)
 
         return matched_line_numbers
 
+    def _match(self, ignore_case: bool, max_lines: int | None) -> PatternMatchResult:
+        start = time.perf_counter()
+        if len(self._patterns) == 1:
+            result = self._pattern_matcher.match_source(
+                self._patterns[0], self._source, ignore_case, max_lines
+            )
+        else:
+            result = self._pattern_matcher.match_patterns(
+                self._patterns, self._source, ignore_case, max_lines
+            )
+        if self._stats is not None:
+            self._stats.add_time("match", time.perf_counter() - start)
+        return result
+
+    def _match_tree(self) -> PatternMatchResult:
+        assert self._tree_pattern_matcher is not None
+        try:
+            self._ensure_is_parsed()
+        except ValueError:
+            # Files of unknown languages, or without a grammar, have no syntax to match
+            return PatternMatchResult(pattern="\n".join(self._patterns), matches=[])
+
+        start = time.perf_counter()
+        if len(self._patterns) == 1:
+            result = self._tree_pattern_matcher.match_tree(
+                self._patterns[0], self._syntax_tree, self._language.value, self._source
+            )
+        else:
+            result = self._tree_pattern_matcher.match_tree_patterns(
+                self._patterns, self._syntax_tree, self._language.value, self._source
+            )
+        if self._stats is not None:
+            self._stats.add_time("match", time.perf_counter() - start)
+        return result
+
+    def _keep_only(self, result: PatternMatchResult) -> PatternMatchResult:
+        assert self._config.only is not None
+        self._ensure_is_parsed()
+        start = time.perf_counter()
+        kind_index = SyntaxKindIndex(
+            self._syntax_tree, [match.line_number for match in result.matches]
+        )
+        matches = kind_index.filter_matches(
+            result.matches, self._config.only, self._source
+        )
+        if self._stats is not None:
+            self._stats.add_time("filter", time.perf_counter() - start)
+        return PatternMatchResult(pattern=result.pattern, matches=matches)
+
     def get_formatted_output(self) -> str:
         """Return the formatted code output with context (auto-applies context if needed)."""
+        return "\n".join(self.iter_formatted_lines())
+
+    def iter_formatted_lines(self) -> Iterator[str]:
+        """Yield the lines of `get_formatted_output` as they are formatted."""
+        if not self._lines_of_interest or self._config.matches_only:
+            return
+        self._ensure_context_is_extracted()
+        start = time.perf_counter()
+        yield from self._format_output()
+        if self._stats is not None:
+            self._stats.add_time("format", time.perf_counter() - start)
+
+    def get_record(self) -> Dict[str, Any] | None:
+        """
+        Return the matches with their context and scopes as a JSON-ready record
+        (see JsonRecordFormatter), or None if nothing matched.
+        """
+        if not self._lines_of_interest or self._config.matches_only:
+            return None
+        self._ensure_context_is_extracted()
+        assert self._syntax_tree_analysis_result is not None
+        start = time.perf_counter()
+        record = self._record_formatter.format_record(
+            filename=self._config.filename,
+            language=self._language.value,
+            match_spans=self._match_spans,
+            lines_to_show=self._lines_of_interest_with_context,
+            scope_index=self._syntax_tree_analysis_result,
+            lines=self._source,
+            patterns=self._patterns,
+        )
+        if self._stats is not None:
+            self._stats.add_time("format", time.perf_counter() - start)
+        return record
+
+    def _ensure_context_is_extracted(self) -> None:
         if not hasattr(self, "_lines_of_interest_with_context"):
+            start = time.perf_counter()
             self._lines_of_interest_with_context = (
                 self._context_extractor.extract_context(
                     syntax_result=self._syntax_tree_analysis_result,
                     lines_of_interest=self._lines_of_interest,
                 )
             )
-        return self._format_output()
+            if self._stats is not None:
+                self._stats.add_time("extract", time.perf_counter() - start)
 
     def _apply_highlighting(self) -> None:
         """Internal. Apply syntax highlighting to matched lines."""
-        for i, code_line in enumerate(self._code_lines):
-            if i in self._highlight_spans:
-                spans = self._highlight_spans[i]
-                code_line.highlighted_content = self._span_highlighter.highlight(
-                    text=code_line.content,
-                    spans=spans,
-                )
-            else:
-                code_line.highlighted_content = code_line.content
+        # Lines without highlighting are shown with their plain content
+        for i, spans in self._match_spans.items():
+            code_line = self._code_lines[i]
+            code_line.highlighted_content = self._span_highlighter.highlight(
+                text=code_line.content,
+                spans=spans,
+            )
 
-    def _format_output(self) -> str:
+    def _format_output(self) -> Iterator[str]:
         """Internal. Format the code lines (context + highlighting)."""
-        for i, code_line in enumerate(self._code_lines):
-            code_line.is_of_interest = i in self._lines_of_interest
-            if not self._config.colors:
-                # ensure raw content if no color
-                # TODO: Refactor to avoid duplication with _apply_highlighting
-                code_line.highlighted_content = code_line.content
-
-        return self._code_formatter.format(
+        # Code lines are only created (and decoded) for the lines shown
+        for i in self._lines_of_interest:
+            self._code_lines[i].is_of_interest = True
+
+        return self._code_formatter.format_lines(
             lines_to_show=self._lines_of_interest_with_context,
             code_lines=self._code_lines,
         )
 
+    def _ensure_lines_are_split(self) -> None:
+        if not hasattr(self, "_source"):
+            self._split_lines()
+
+    def _split_lines(self) -> None:
+        self._source: SourceBuffer = (
+            self._given_source
+            if self._given_source is not None
+            else SourceBuffer.from_text(self._config.code)
+        )
+        self._code_lines: _CodeLines = _CodeLines(self._source)
+        self._lines_of_interest: Set[int] = set()
+
     def _ensure_is_analyzed(self) -> None:
         if self._syntax_tree_analysis_result is None:
             self._perform_syntax_tree_analysis()
 
-    def _perform_syntax_tree_analysis(self) -> None:
+    def _ensure_language_is_detected(self) -> None:
+        if not hasattr(self, "_language"):
+            self._detect_language()
+
+    def _detect_language(self) -> None:
         language_code: LanguageCode = self._language_detector.detect_language(
             filename=self._config.filename
         )
@@ -115,18 +322,61 @@ class CodeContextAnalyzer:
             )
         self._language: LanguageCode = language_code
 
-        # TODO: move to appropriate place
-        code = self._config.code.strip()
+    def _ensure_is_parsed(self) -> None:
+        if not hasattr(self, "_syntax_tree"):
+            self._parse()
 
-        self._lines: list[str] = code.splitlines()
-        self._code_lines: list[CodeLine] = [
-            CodeLine(line_number=i, content=line) for i, line in enumerate(self._lines)
-        ]
-        self._lines_of_interest: Set[int] = set()
-
-        self._syntax_tree = self._code_parser.parse(
-            code=code, language=self._language.value
+    def _parse(self) -> None:
+        self._ensure_language_is_detected()
+        start = time.perf_counter()
+        self._syntax_tree: "Tree" = self._code_parser.parse(
+            code=self._source.view, language=self._language.value
         )
-        self._syntax_tree_analysis_result = self._syntax_tree_analyzer.analyze(
-            self._syntax_tree.root_node, self._lines
+        if self._stats is not None:
+            self._stats.add_time("parse", time.perf_counter() - start)
+
+    def _perform_syntax_tree_analysis(self) -> None:
+        self._ensure_lines_are_split()
+        self._ensure_language_is_detected()
+
+        cache_key = None
+        if self._analysis_cache is not None:
+            cache_key = self._analysis_cache.make_key(
+                filename=self._config.filename,
+                code=self._source.view,
+                language=self._language.value,
+            )
+            start = time.perf_counter()
+            cached_result = self._analysis_cache.load(cache_key)
+            if self._stats is not None:
+                # Loading a cached analysis replaces parsing and analyzing
+                self._stats.add_time("analyze", time.perf_counter() - start)
+                self._stats.add_count(
+                    "cache_misses" if cached_result is None else "cache_hits"
+                )
+            if cached_result is not None:
+                self._syntax_tree_analysis_result = cached_result
+                return
+
+        self._ensure_is_parsed()
+
+        if self._config.on_demand_context:
+            # Nothing is analyzed up front, so there is nothing to cache either
+            self._syntax_tree_analysis_result = OnDemandScopeIndex(
+                self._syntax_tree, self._source
+            )
+            return
+
+        start = time.perf_counter()
+        scope_intervals = self._syntax_tree_analyzer.analyze_intervals(
+            self._syntax_tree.root_node, self._source
         )
+        self._syntax_tree_analysis_result = scope_intervals
+        if self._stats is not None:
+            self._stats.add_time("analyze", time.perf_counter() - start)
+            self._stats.add_count(
+                "nodes_visited", len(scope_intervals.node_start_lines)
+            )
+
+        if self._analysis_cache is not None and cache_key is not None:
+            self._analysis_cache.store(cache_key, scope_intervals)
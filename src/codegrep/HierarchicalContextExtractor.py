@@ -1,6 +1,7 @@
-from typing import Any, List, Set
+import heapq
+from typing import Iterator, Set
 
-from codegrep.contracts.SyntaxAnalysisResult import SyntaxAnalysisResult
+from codegrep.contracts.IScopeIndex import IScopeIndex
 
 
 class HierarchicalContextExtractor:
@@ -9,7 +10,7 @@ class HierarchicalContextExtractor:
     and user-defined configurations.
 
     This class is designed to be stateless with respect to code analysis results —
-    it uses the SyntaxAnalysisResult per call, while configuration is injected once.
+    it uses the IScopeIndex per call, while configuration is injected once.
     """
 
     def __init__(
@@ -36,7 +37,7 @@ class HierarchicalContextExtractor:
 
     def extract_context(
         self,
-        syntax_result: SyntaxAnalysisResult,
+        syntax_result: IScopeIndex,
         lines_of_interest: Set[int],
     ) -> Set[int]:
         """
@@ -56,7 +57,7 @@ class HierarchicalContextExtractor:
 
         # Add the last line if configured
         if self._include_last_line:
-            last_line = len(syntax_result.scopes_by_line) - 1
+            last_line = syntax_result.line_count - 1
             if last_line >= 0:
                 lines_to_show.add(last_line)
                 if self._include_parent_context:
@@ -87,12 +88,12 @@ class HierarchicalContextExtractor:
     def _add_padding(
         self,
         lines: Set[int],
-        syntax_result: SyntaxAnalysisResult,
+        syntax_result: IScopeIndex,
     ) -> Set[int]:
         """Add configurable padding around each line of interest."""
         padded = set(lines)
         padding = self._line_of_interest_padding
-        total_lines = len(syntax_result.scopes_by_line)
+        total_lines = syntax_result.line_count
 
         for line in list(lines):
             for new_line in range(line - padding, line + padding + 1):
@@ -103,7 +104,7 @@ class HierarchicalContextExtractor:
     def _add_parent_context(
         self,
         line: int,
-        syntax_result: SyntaxAnalysisResult,
+        syntax_result: IScopeIndex,
         lines_to_show: Set[int],
     ) -> None:
         """Add parent scope context for the given line."""
@@ -111,40 +112,27 @@ class HierarchicalContextExtractor:
             return
         self._processed_parent_scopes.add(line)
 
-        if line >= len(syntax_result.scopes_by_line):
+        if line >= syntax_result.line_count:
             return
 
-        for scope_start in syntax_result.scopes_by_line[line]:
-            if scope_start < len(syntax_result.scope_headers):
-                headers = syntax_result.scope_headers[scope_start]
-                if not headers:
-                    continue
+        for head_start, scope_end in syntax_result.enclosing_scopes(line):
+            head_end = min(scope_end, head_start + self._header_max_lines)
 
-                header = headers[0]
-                head_start = header.scope_start_line
-                head_end = min(
-                    header.scope_end_line,
-                    head_start + self._header_max_lines,
-                )
-
-                if head_start > 0 or self._show_top_of_file_parent_scope:
-                    lines_to_show.update(range(head_start, head_end + 1))
+            if head_start > 0 or self._show_top_of_file_parent_scope:
+                lines_to_show.update(range(head_start, head_end + 1))
 
     def _add_child_context(
         self,
         line: int,
-        syntax_result: SyntaxAnalysisResult,
+        syntax_result: IScopeIndex,
         lines_to_show: Set[int],
     ) -> None:
         """Add context lines for child scopes under the given line."""
-        if line >= len(syntax_result.ast_nodes_by_line):
-            return
-
-        nodes = syntax_result.ast_nodes_by_line[line]
-        if not nodes:
+        # Without a multi-line scope only the line itself would be added, and as a
+        # line of interest it is shown already
+        last_line = syntax_result.scope_end(line)
+        if last_line is None:
             return
-
-        last_line = max(node.end_point[0] for node in nodes)
         scope_size = last_line - line
 
         # If small scope, include fully
@@ -153,26 +141,39 @@ class HierarchicalContextExtractor:
             return
 
         # Otherwise, selectively add larger child scopes
-        children = []
-        for node in nodes:
-            children.extend(self._collect_children(node))
-
-        children.sort(key=lambda n: n.end_point[0] - n.start_point[0], reverse=True)
         max_to_add = max(min(scope_size * 0.10, 25), 5)
         count_before = len(lines_to_show)
 
-        for child in children:
+        for child_start in self._child_scope_starts(line, syntax_result):
             if len(lines_to_show) - count_before > max_to_add:
                 break
-            child_start = child.start_point[0]
             self._add_parent_context(child_start, syntax_result, lines_to_show)
 
-    def _collect_children(self, node: Any) -> List[Any]:
-        """Recursively collect all children of a node."""
-        result = [node]
-        for child in getattr(node, "children", []):
-            result.extend(self._collect_children(child))
-        return result
+    def _child_scope_starts(
+        self,
+        line: int,
+        syntax_result: IScopeIndex,
+    ) -> Iterator[int]:
+        """
+        Yield the start lines of the nodes in the scope starting on `line`, largest
+        node first and in line order among equal sizes.
+
+        Parent context is added once per line, so each line is yielded only for its
+        largest node: first the multi-line scopes from a heap, then the lines holding
+        only single-line nodes.
+        """
+        scopes = [
+            (start_line - end_line, start_line)
+            for start_line, end_line in syntax_result.nested_scopes(line)
+        ]
+        scope_starts = {start_line for _, start_line in scopes}
+        heapq.heapify(scopes)
+        while scopes:
+            yield heapq.heappop(scopes)[1]
+
+        for node_line in syntax_result.node_lines(line):
+            if node_line not in scope_starts:
+                yield node_line
 
     def _close_gaps(self, lines: Set[int]) -> Set[int]:
         """Fill in small one-line gaps to smooth context."""
@@ -0,0 +1,138 @@
+from typing import TYPE_CHECKING, NamedTuple
+
+from codegrep.contracts.ICodeParser import ICodeParser
+
+if TYPE_CHECKING:
+    from tree_sitter import Tree
+
+# Equal prefixes and suffixes are skipped a chunk at a time, then bisected
+_COMPARE_CHUNK = 4096
+
+
+class TextEdit(NamedTuple):
+    """
+    A single replacement turning one version of a file into the next.
+
+    Points are plain (row, column) tuples: the installed bindings crash at garbage
+    collection when `Tree.edit` is given `tree_sitter.Point` objects.
+    """
+
+    start_byte: int
+    old_end_byte: int
+    new_end_byte: int
+    start_point: tuple[int, int]
+    old_end_point: tuple[int, int]
+    new_end_point: tuple[int, int]
+
+
+def compute_edit(old: bytes, new: bytes) -> TextEdit | None:
+    """
+    Describe the change from `old` to `new` as the replacement of everything between
+    their common prefix and common suffix, or return None if they are equal.
+    """
+    if old == new:
+        return None
+
+    prefix = _common_prefix_length(old, new)
+    suffix = _common_suffix_length(old, new, min(len(old), len(new)) - prefix)
+    old_end = len(old) - suffix
+    new_end = len(new) - suffix
+    return TextEdit(
+        start_byte=prefix,
+        old_end_byte=old_end,
+        new_end_byte=new_end,
+        start_point=_point_at(old, prefix),
+        old_end_point=_point_at(old, old_end),
+        new_end_point=_point_at(new, new_end),
+    )
+
+
+class IncrementalCodeParser(ICodeParser):
+    """
+    Parses successive versions of one file, each against the tree of the last one.
+
+    - The change between versions is found from their common prefix and suffix,
+      applied to the previous tree with `Tree.edit`, and tree-sitter reparses only
+      around it
+    - Versions that are never parsed are skipped over: the next edit is computed
+      from the last version that was
+    """
+
+    def __init__(self, code_parser: ICodeParser) -> None:
+        self._code_parser = code_parser
+        self._source: bytes | None = None
+        self._language: str | None = None
+        self._tree: "Tree | None" = None
+
+    def parse(
+        self,
+        code: str | bytes | memoryview,
+        language: str,
+        old_tree: "Tree | None" = None,
+    ) -> "Tree":
+        # A snapshot, the next version is diffed against it
+        source = code.encode("utf8") if isinstance(code, str) else bytes(code)
+
+        if old_tree is None and self._tree is not None and language == self._language:
+            assert self._source is not None
+            edit = compute_edit(self._source, source)
+            if edit is None:
+                return self._tree
+            old_tree = self._tree
+            old_tree.edit(*edit)
+
+        tree = self._code_parser.parse(source, language, old_tree)
+        self._source, self._language, self._tree = source, language, tree
+        return tree
+
+    def check_language(self, language: str) -> None:
+        self._code_parser.check_language(language)
+
+
+def _common_prefix_length(a: bytes, b: bytes) -> int:
+    view_a, view_b = memoryview(a), memoryview(b)
+    limit = min(len(a), len(b))
+    low = 0
+    while (
+        low + _COMPARE_CHUNK <= limit
+        and view_a[low : low + _COMPARE_CHUNK] == view_b[low : low + _COMPARE_CHUNK]
+    ):
+        low += _COMPARE_CHUNK
+
+    high = min(low + _COMPARE_CHUNK, limit)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if view_a[low:middle] == view_b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _common_suffix_length(a: bytes, b: bytes, limit: int) -> int:
+    """Length of the common suffix of `a` and `b`, at most `limit`."""
+    view_a, view_b = memoryview(a), memoryview(b)
+    len_a, len_b = len(a), len(b)
+    low = 0
+    while (
+        low + _COMPARE_CHUNK <= limit
+        and view_a[len_a - low - _COMPARE_CHUNK : len_a - low]
+        == view_b[len_b - low - _COMPARE_CHUNK : len_b - low]
+    ):
+        low += _COMPARE_CHUNK
+
+    high = min(low + _COMPARE_CHUNK, limit)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if view_a[len_a - middle : len_a - low] == view_b[len_b - middle : len_b - low]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _point_at(source: bytes, offset: int) -> tuple[int, int]:
+    """Row and byte column of an offset, as tree-sitter counts them."""
+    row = source.count(b"\n", 0, offset)
+    column = offset - (source.rfind(b"\n", 0, offset) + 1)
+    return row, column
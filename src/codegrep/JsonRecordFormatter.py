@@ -0,0 +1,80 @@
+from typing import Any, Dict, Iterator, List, Sequence, Set
+
+from codegrep.contracts.IScopeIndex import IScopeIndex
+from codegrep.pattern_matching.contracts.models import MatchSpan
+
+
+class JsonRecordFormatter:
+    """
+    Describes the matches of one file as a JSON-ready record, for machine-readable
+    output (`--format json|ndjson`).
+
+    - Line numbers are 1-based and ranges include both ends, as shown with
+      `--line-numbers`; spans are 0-based, end-exclusive character offsets
+    - Every match lists the patterns found on its line, for multi-pattern searches
+    - Only matched lines and scope headers are decoded, nothing is highlighted
+    """
+
+    def format_record(
+        self,
+        filename: str,
+        language: str,
+        match_spans: Dict[int, List[MatchSpan]],
+        lines_to_show: Set[int],
+        scope_index: IScopeIndex,
+        lines: Sequence[str],
+        patterns: Sequence[str],
+    ) -> Dict[str, Any]:
+        """
+        Return the record of a file: its matches with the scopes enclosing them,
+        the line ranges shown as context, and the header line of every scope.
+        `patterns` are the searched patterns, in the order of span pattern indexes.
+        """
+        matches = []
+        scope_ends: Dict[int, int] = {}
+        for line in sorted(match_spans):
+            # Outermost first, like the headers shown above a match
+            enclosing = sorted(scope_index.enclosing_scopes(line))
+            scope_ends.update(enclosing)
+            spans = match_spans[line]
+            pattern_indexes = sorted({span.pattern_index for span in spans})
+            matches.append(
+                {
+                    "line": line + 1,
+                    "text": lines[line],
+                    "spans": [[span.start, span.end] for span in spans],
+                    "patterns": [patterns[index] for index in pattern_indexes],
+                    "scopes": [start + 1 for start, _ in enclosing],
+                }
+            )
+
+        return {
+            "file": filename,
+            "language": language,
+            "matches": matches,
+            "context": [
+                [start + 1, end + 1] for start, end in _line_ranges(lines_to_show)
+            ],
+            "scopes": [
+                {
+                    "start": start + 1,
+                    "end": end + 1,
+                    "header": lines[start],
+                }
+                for start, end in sorted(scope_ends.items())
+            ],
+        }
+
+
+def _line_ranges(lines: Set[int]) -> Iterator[tuple[int, int]]:
+    """Split lines into runs of consecutive lines, as (first, last) pairs."""
+    start = end = None
+    for line in sorted(lines):
+        if end is not None and line == end + 1:
+            end = line
+            continue
+        if start is not None and end is not None:
+            yield start, end
+        start = end = line
+    if start is not None and end is not None:
+        yield start, end
@@ -0,0 +1,114 @@
+from typing import TYPE_CHECKING, Any, Iterator, List, Sequence
+
+from codegrep.contracts.IScopeIndex import IScopeIndex
+
+if TYPE_CHECKING:
+    from tree_sitter import Tree
+
+# A column past the end of any line: (line, _END_OF_LINE) sorts right before line + 1
+_END_OF_LINE = 1 << 30
+
+
+class OnDemandScopeIndex(IScopeIndex):
+    """
+    Answers scope queries straight from a parsed tree, without analyzing it up front.
+
+    - The scopes covering a line are the nodes spanning the line break before or
+      after it: the innermost one is found with `descendant_for_point_range`, the
+      rest by walking up `parent`
+    - Cost grows with the number of queried lines and their depth, not the file size
+    - Results are the same as those of the full analysis (ScopeIntervals)
+    """
+
+    def __init__(self, tree: "Tree", lines: Sequence[str]) -> None:
+        self._root_node = tree.root_node
+        self.line_count = len(lines)
+        # Nested scopes and node lines of the scopes visited so far, by start line
+        self._outlines: dict[int, tuple[List[tuple[int, int]], List[int]]] = {}
+
+    def enclosing_scopes(self, line: int) -> Iterator[tuple[int, int]]:
+        # Start line -> end line; parents come later, so the outermost node wins
+        scope_ends: dict[int, int] = {}
+        if line > 0:
+            for node in self._nodes_spanning_break_after(line - 1):
+                scope_ends[node.start_point[0]] = node.end_point[0]
+
+        outermost = self._outermost_scope_node(line)
+        if outermost is not None:
+            scope_ends[line] = outermost.end_point[0]
+
+        yield from scope_ends.items()
+
+    def scope_end(self, line: int) -> int | None:
+        outermost = self._outermost_scope_node(line)
+        return None if outermost is None else outermost.end_point[0]
+
+    def nested_scopes(self, line: int) -> Iterator[tuple[int, int]]:
+        yield from self._scope_outline(line)[0]
+
+    def node_lines(self, line: int) -> Iterator[int]:
+        yield from self._scope_outline(line)[1]
+
+    def _scope_outline(self, line: int) -> tuple[List[tuple[int, int]], List[int]]:
+        """
+        Return the nested scopes and node lines of the scope starting on `line`,
+        from one cursor walk over it.
+        """
+        if line in self._outlines:
+            return self._outlines[line]
+
+        scopes: List[tuple[int, int]] = []
+        node_lines: List[int] = []
+        outermost = self._outermost_scope_node(line)
+        if outermost is not None:
+            cursor = outermost.walk()
+            while True:
+                node = cursor.node
+                start_line = node.start_point[0]
+                end_line = node.end_point[0]
+                if not node_lines or node_lines[-1] != start_line:
+                    node_lines.append(start_line)
+                # Pre-order meets the outermost multi-line node of each line first
+                if start_line < end_line and (
+                    not scopes or scopes[-1][0] != start_line
+                ):
+                    scopes.append((start_line, end_line))
+
+                # Everything below a single-line node starts on the same line
+                if start_line < end_line and cursor.goto_first_child():
+                    continue
+                if not self._goto_next_subtree(cursor):
+                    break
+
+        self._outlines[line] = (scopes, node_lines)
+        return scopes, node_lines
+
+    def _goto_next_subtree(self, cursor: Any) -> bool:
+        """Move to the next sibling of the cursor node or of its closest ancestor."""
+        while not cursor.goto_next_sibling():
+            if not cursor.goto_parent():
+                return False
+        return True
+
+    def _outermost_scope_node(self, line: int) -> Any | None:
+        """Return the outermost multi-line node starting on `line`, if any."""
+        outermost = None
+        for node in self._nodes_spanning_break_after(line):
+            if node.start_point[0] != line:
+                break
+            outermost = node
+        return outermost
+
+    def _nodes_spanning_break_after(self, line: int) -> Iterator[Any]:
+        """Yield the nodes covering the line break after `line`, innermost first."""
+        if not 0 <= line < self.line_count:
+            return
+
+        node = self._root_node.descendant_for_point_range(
+            (line, _END_OF_LINE), (line + 1, 0)
+        )
+        while node is not None:
+            # Only the root is returned when no node spans the line break
+            if node.start_point[0] <= line < node.end_point[0]:
+                yield node
+            node = node.parent
@@ -0,0 +1,65 @@
+from typing import Any, Dict
+
+from codegrep.contracts.IStatsRecorder import IStatsRecorder
+
+# Stages in pipeline order, as reported
+STAGES = ("walk", "read", "match", "parse", "filter", "analyze", "extract", "format")
+
+
+class SearchStats(IStatsRecorder):
+    """
+    Sums the stage timings and counters of a search, for `--stats`.
+
+    - Timings of files searched in parallel add up, so stages may total more than
+      the wall time of the search
+    - Stats of other processes are added with `merge` from their `to_dict`
+    """
+
+    def __init__(self) -> None:
+        self.times: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add_time(self, stage: str, seconds: float) -> None:
+        self.times[stage] = self.times.get(stage, 0.0) + seconds
+
+    def add_count(self, counter: str, amount: int = 1) -> None:
+        self.counts[counter] = self.counts.get(counter, 0) + amount
+
+    def merge(self, stats: Dict[str, Any]) -> None:
+        """Add stats in the form returned by `to_dict`."""
+        for stage, seconds in stats["times"].items():
+            self.add_time(stage, seconds)
+        for counter, amount in stats["counts"].items():
+            self.add_count(counter, amount)
+
+    def clear(self) -> None:
+        self.times.clear()
+        self.counts.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the stats as a JSON-ready dict, stages in pipeline order."""
+        stages = sorted(self.times, key=_stage_order)
+        return {
+            "times": {stage: self.times[stage] for stage in stages},
+            "counts": dict(sorted(self.counts.items())),
+        }
+
+    def format_text(self) -> str:
+        """Return the stats as a table, with the share of time of every stage."""
+        stats = self.to_dict()
+        total = sum(stats["times"].values())
+        lines = [f"{'Stage':10} {'Time':>10} {'Share':>7}"]
+        for stage, seconds in stats["times"].items():
+            share = seconds / total if total else 0.0
+            lines.append(f"{stage:10} {seconds:>8.3f} s {share:>7.1%}")
+        lines.append(f"{'total':10} {total:>8.3f} s")
+        lines.append("")
+        lines.append(f"{'Counter':16} {'Value':>12}")
+        for counter, amount in stats["counts"].items():
+            lines.append(f"{counter:16} {amount:>12}")
+        return "\n".join(lines)
+
+
+def _stage_order(stage: str) -> tuple[int, str]:
+    # Stages of other recorders come after the known ones
+    return (STAGES.index(stage) if stage in STAGES else len(STAGES), stage)
@@ -0,0 +1,193 @@
+import mmap
+import os
+from pathlib import Path
+from typing import Sequence, overload
+
+from codegrep.pattern_matching.LineOffsetIndex import (
+    LazyLineOffsetIndex,
+    LineOffsetIndex,
+)
+
+# Files at least this large are memory-mapped instead of read
+_MMAP_THRESHOLD = 64 * 1024
+# Like git, a NUL byte near the start of a file marks it as binary
+_BINARY_SNIFF_BYTES = 8000
+# Whitespace removed from both ends of the code, as `bytes.strip` does
+_WHITESPACE = b" \t\n\r\x0b\x0c"
+# Plain text needs the same matching as bytes and as text: ASCII without carriage
+# returns (stripped from displayed lines) or separators (`\s` only as text)
+_NON_PLAIN_ASCII_BYTES = (b"\r", b"\x1c", b"\x1d", b"\x1e", b"\x1f")
+_PLAIN_CHECK_CHUNK = 1024 * 1024
+
+
+class BinaryFileError(ValueError):
+    """Raised for files that look binary."""
+
+
+class FileTooLargeError(ValueError):
+    """Raised for files over the size limit."""
+
+
+class SourceBuffer(Sequence[str]):
+    """
+    The code of one file as raw UTF-8 bytes, decoded a line at a time.
+
+    - Files are read as bytes, large ones are memory-mapped; binary files are
+      rejected from their first bytes, before anything is decoded
+    - `view` is the code without surrounding whitespace and is what matchers
+      search and tree-sitter parses, without copies
+    - Lines are split on `\\n` only, like tree-sitter rows; they are split on
+      first use and each line is decoded when it is accessed
+    - Searches that may stop at their first matches map offsets to lines with
+      `lazy_line_index`, which does not split the rest of the code
+    - `close` (or leaving a `with` block) unmaps a memory-mapped file, so a file
+      truncated later can not fault the process; the buffer is unusable afterwards
+    """
+
+    def __init__(self, data: bytes | mmap.mmap) -> None:
+        self._data = data
+        start, end = 0, len(data)
+        while start < end and data[start] in _WHITESPACE:
+            start += 1
+        while end > start and data[end - 1] in _WHITESPACE:
+            end -= 1
+        self._start, self._end = start, end
+        self.view = memoryview(data)[start:end]
+
+        self._raw_lines: list[bytes] | None = None
+        self._line_index: LineOffsetIndex | None = None
+        self._lazy_line_index: LazyLineOffsetIndex | None = None
+        self._is_plain_ascii: bool | None = None
+
+    @classmethod
+    def from_text(cls, code: str) -> "SourceBuffer":
+        return cls(code.encode("utf8"))
+
+    @classmethod
+    def from_file(
+        cls,
+        filename: str | Path,
+        max_bytes: int | None = None,
+        memory_map: bool = True,
+    ) -> "SourceBuffer":
+        """
+        Read a file, raising BinaryFileError for binary files and FileTooLargeError
+        for files over `max_bytes`. Without `memory_map` the buffer is a snapshot
+        that does not change if the file is written to.
+        """
+        with open(filename, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if max_bytes is not None and size > max_bytes:
+                raise FileTooLargeError(
+                    f"File {filename} has {size} bytes, the limit is {max_bytes}"
+                )
+            if memory_map and size >= _MMAP_THRESHOLD:
+                data: bytes | mmap.mmap = mmap.mmap(
+                    f.fileno(), 0, access=mmap.ACCESS_READ
+                )
+            else:
+                data = f.read()
+
+        if data.find(b"\0", 0, _BINARY_SNIFF_BYTES) != -1:
+            if isinstance(data, mmap.mmap):
+                data.close()
+            raise BinaryFileError(f"File {filename} looks binary")
+        return cls(data)
+
+    def close(self) -> None:
+        """Release the code, unmapping it if the file was memory-mapped."""
+        self.view.release()
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def __enter__(self) -> "SourceBuffer":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @property
+    def size(self) -> int:
+        """Size of the code in bytes, including the surrounding whitespace."""
+        return len(self._data)
+
+    @property
+    def raw_lines(self) -> list[bytes]:
+        """The undecoded lines of `view`."""
+        if self._raw_lines is None:
+            self._raw_lines = bytes(self.view).split(b"\n") if self.view else []
+        return self._raw_lines
+
+    @property
+    def line_index(self) -> LineOffsetIndex:
+        """Maps offsets in `view` to line numbers."""
+        if self._line_index is None:
+            self._line_index = LineOffsetIndex(self.raw_lines)
+        return self._line_index
+
+    @property
+    def lazy_line_index(self) -> LineOffsetIndex:
+        """Like `line_index`, but only splits the code up to the offsets looked up."""
+        if self._lazy_line_index is None:
+            self._lazy_line_index = LazyLineOffsetIndex(self.view)
+        return self._lazy_line_index
+
+    def raw_line(self, line_number: int) -> bytes:
+        """One undecoded line of `view`, the others are only split if they were."""
+        if self._raw_lines is not None:
+            return self._raw_lines[line_number]
+        line_index = self.lazy_line_index
+        start = line_index.line_start(line_number)
+        return bytes(self.view[start : start + line_index.line_length(line_number)])
+
+    @property
+    def is_plain_ascii(self) -> bool:
+        """Whether bytes and text patterns are guaranteed to match alike."""
+        if self._is_plain_ascii is None:
+            self._is_plain_ascii = all(
+                self._is_plain_ascii_chunk(bytes(self.view[i : i + _PLAIN_CHECK_CHUNK]))
+                for i in range(0, len(self.view), _PLAIN_CHECK_CHUNK)
+            )
+        return self._is_plain_ascii
+
+    def find(self, sub: bytes, start: int = 0) -> int:
+        """Return the offset in `view` of the first `sub` from `start`, or -1."""
+        position = self._data.find(sub, self._start + start, self._end)
+        return position if position == -1 else position - self._start
+
+    def byte_to_char_offset(self, line_number: int, offset: int) -> int:
+        """Convert a byte offset within a line to a character offset."""
+        raw_line = self.raw_line(line_number)
+        if raw_line.isascii():
+            return offset
+        return len(raw_line[:offset].decode("utf8", errors="replace"))
+
+    def char_to_byte_offset(self, line_number: int, offset: int) -> int:
+        """Convert a character offset within a line to a byte offset."""
+        raw_line = self.raw_line(line_number)
+        if raw_line.isascii():
+            return offset
+        return len(self._decode(raw_line)[:offset].encode("utf8"))
+
+    def __len__(self) -> int:
+        return len(self.raw_lines)
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[str]: ...
+
+    def __getitem__(self, index: int | slice) -> str | list[str]:
+        if isinstance(index, slice):
+            return [self._decode(raw_line) for raw_line in self.raw_lines[index]]
+        return self._decode(self.raw_lines[index])
+
+    def _decode(self, raw_line: bytes) -> str:
+        # Invalid UTF-8 is shown as replacement characters instead of failing
+        return raw_line.decode("utf8", errors="replace").removesuffix("\r")
+
+    def _is_plain_ascii_chunk(self, chunk: bytes) -> bool:
+        return chunk.isascii() and not any(
+            byte in chunk for byte in _NON_PLAIN_ASCII_BYTES
+        )
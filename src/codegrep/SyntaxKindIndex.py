@@ -0,0 +1,111 @@
+from bisect import bisect_left, bisect_right
+from typing import TYPE_CHECKING, Iterable, List, Sequence
+
+from codegrep.pattern_matching.contracts.models import LineMatch
+from codegrep.SourceBuffer import SourceBuffer
+
+if TYPE_CHECKING:
+    from tree_sitter import Node, Tree
+
+# Values of `--only`, and the kinds of code each keeps
+ONLY_CHOICES = ("code", "comments", "strings", "identifiers")
+_KEPT_KINDS = {
+    "code": ("code", "identifier"),
+    "comments": ("comment",),
+    "strings": ("string",),
+    "identifiers": ("identifier",),
+}
+# Node type suffixes of string and character literals across grammars (string,
+# template_string, string_literal, raw_string_literal, char_literal...)
+_STRING_SUFFIXES = ("string", "string_literal", "char_literal", "character_literal")
+
+
+class SyntaxKindIndex:
+    """
+    Tells whether a position of a file is in a comment, a string, an identifier or
+    other code, from a table of the comment, string and identifier node ranges.
+
+    - The table is built with one cursor walk over the tree and sorted by start;
+      nothing inside a comment or string is visited, so ranges never overlap and
+      each lookup is a bisection
+    - Given the lines to look up, subtrees away from them are not walked, so the
+      cost follows the matched lines rather than the size of the file
+    - Everything inside a literal is string, interpolated code included
+    """
+
+    def __init__(self, tree: "Tree", lines: Sequence[int] | None = None) -> None:
+        self._starts: List[tuple[int, int]] = []
+        self._ends: List[tuple[int, int]] = []
+        self._kinds: List[str] = []
+        self._lines = None if lines is None else sorted(lines)
+        self._add_nodes(tree.root_node)
+
+    def kind_at(self, line: int, column: int) -> str:
+        """
+        Return "comment", "string", "identifier" or "code" for the byte `column` of
+        `line`.
+        """
+        point = (line, column)
+        index = bisect_right(self._starts, point) - 1
+        if index >= 0 and point < self._ends[index]:
+            return self._kinds[index]
+        return "code"
+
+    def filter_matches(
+        self, matches: Iterable[LineMatch], only: str, source: SourceBuffer
+    ) -> list[LineMatch]:
+        """
+        Keep the spans starting in the kind of code `only` asks for (one of
+        ONLY_CHOICES), and the lines left with any.
+        """
+        kept_kinds = _KEPT_KINDS[only]
+        filtered = []
+        for match in matches:
+            line = match.line_number
+            spans = [
+                span
+                for span in match.spans
+                if self.kind_at(line, source.char_to_byte_offset(line, span.start))
+                in kept_kinds
+            ]
+            if spans:
+                filtered.append(LineMatch(line_number=line, spans=spans))
+        return filtered
+
+    def _add_nodes(self, root_node: "Node") -> None:
+        # Pre-order, so ranges are appended sorted by start
+        cursor = root_node.walk()
+        while True:
+            node = cursor.node
+            if self._covers_a_line(node):
+                kind = _kind_of(node)
+                if kind is not None:
+                    self._starts.append(tuple(node.start_point))
+                    self._ends.append(tuple(node.end_point))
+                    self._kinds.append(kind)
+                elif cursor.goto_first_child():
+                    continue
+
+            while not cursor.goto_next_sibling():
+                if not cursor.goto_parent():
+                    return
+
+    def _covers_a_line(self, node: "Node") -> bool:
+        if self._lines is None:
+            return True
+        index = bisect_left(self._lines, node.start_point[0])
+        return index < len(self._lines) and self._lines[index] <= node.end_point[0]
+
+
+def _kind_of(node: "Node") -> str | None:
+    # Anonymous nodes are keywords and punctuation, like TypeScript's `string` type
+    if not node.is_named:
+        return None
+    node_type = node.type
+    if "comment" in node_type:
+        return "comment"
+    if node_type.endswith(_STRING_SUFFIXES):
+        return "string"
+    if "identifier" in node_type:
+        return "identifier"
+    return None
@@ -1,7 +1,10 @@
-from typing import Any, List
+from array import array
+from bisect import bisect_left
+from typing import Any, Iterator, List, Sequence
 
 from codegrep.contracts.ISyntaxTreeAnalyzer import ISyntaxTreeAnalyzer
 from codegrep.contracts.ScopeHeader import ScopeHeader
+from codegrep.contracts.ScopeIntervals import ScopeIntervals
 from codegrep.contracts.SyntaxAnalysisResult import SyntaxAnalysisResult
 
 
@@ -24,8 +27,6 @@ class SyntaxTreeAnalyzer(ISyntaxTreeAnalyzer):
 
         self._walk_tree(
             root_node,
-            lines,
-            0,
             scopes_by_line,
             scope_headers,
             ast_nodes_by_line,
@@ -42,48 +43,120 @@ class SyntaxTreeAnalyzer(ISyntaxTreeAnalyzer):
 
     def _walk_tree(
         self,
-        node: Any,
-        lines: List[str],
-        depth: int,
+        root_node: Any,
         scopes_by_line: List[set[int]],
         scope_headers: List[List[ScopeHeader]],
         ast_nodes_by_line: List[List[Any]],
-    ) -> tuple[int, int]:
+    ) -> None:
+        num_lines = len(scopes_by_line)
+        # Last line already tagged with each scope start, to skip repeated fills
+        # for nested nodes starting on the same line
+        filled_until = [-1] * num_lines
+
+        for node, depth in self._walk_preorder(root_node):
+            start_line = node.start_point[0]
+            end_line = node.end_point[0]
+            size = end_line - start_line
+
+            if start_line < num_lines:
+                ast_nodes_by_line[start_line].append(node)
+
+                if size > 0:
+                    scope_headers[start_line].append(
+                        ScopeHeader(
+                            scope_size=size,
+                            scope_start_line=start_line,
+                            scope_end_line=end_line,
+                        )
+                    )
+
+                fill_start = filled_until[start_line] + 1
+                if fill_start <= end_line:
+                    if fill_start < start_line:
+                        fill_start = start_line
+                    for line_scopes in scopes_by_line[fill_start : end_line + 1]:
+                        line_scopes.add(start_line)
+                    filled_until[start_line] = end_line
+
+            if self._verbose and node.is_named:
+                self._print_node(node, depth)
+
+    def analyze_intervals(self, root_node: Any, lines: Sequence[str]) -> ScopeIntervals:
+        """Like `analyze`, but returns the compact interval representation."""
+        num_lines = len(lines)
+
+        if self._verbose:
+            print(f"Analyzing {len(lines)} lines...")
+
+        node_start_lines = array("i")
+        node_end_lines = array("i")
+        subtree_sizes = array("i")
+        scope_start_lines = array("i")
+        scope_end_lines = array("i")
+        scope_parents = array("i")
+        # Scopes that may still enclose the next one, innermost last
+        open_scopes: List[int] = []
+
+        for node, depth in self._walk_preorder(root_node):
+            start_line = node.start_point[0]
+            end_line = node.end_point[0]
+            node_start_lines.append(start_line)
+            node_end_lines.append(end_line)
+            subtree_sizes.append(node.descendant_count)
+
+            # Pre-order meets the outermost node of each line first, the one whose
+            # header SyntaxAnalysisResult lists first
+            if (
+                start_line < end_line
+                and start_line < num_lines
+                and (not scope_start_lines or scope_start_lines[-1] != start_line)
+            ):
+                while open_scopes and scope_end_lines[open_scopes[-1]] < end_line:
+                    open_scopes.pop()
+                scope_parents.append(open_scopes[-1] if open_scopes else -1)
+                open_scopes.append(len(scope_start_lines))
+                scope_start_lines.append(start_line)
+                scope_end_lines.append(end_line)
+
+            if self._verbose and node.is_named:
+                self._print_node(node, depth)
+
+        # Pre-order is sorted by start line, so each line's nodes form one run
+        node_offsets = array(
+            "i",
+            (bisect_left(node_start_lines, line) for line in range(num_lines + 1)),
+        )
+
+        return ScopeIntervals(
+            line_count=num_lines,
+            node_start_lines=node_start_lines,
+            node_end_lines=node_end_lines,
+            subtree_sizes=subtree_sizes,
+            node_offsets=node_offsets,
+            scope_start_lines=scope_start_lines,
+            scope_end_lines=scope_end_lines,
+            scope_parents=scope_parents,
+        )
+
+    def _walk_preorder(self, root_node: Any) -> Iterator[tuple[Any, int]]:
+        """
+        Yield (node, depth) for every node in pre-order, walking with a TreeCursor:
+        no recursion, and no `children` lists are materialized along the way.
+        """
+        cursor = root_node.walk()
+        while True:
+            yield cursor.node, cursor.depth
+
+            if cursor.goto_first_child():
+                continue
+            while not cursor.goto_next_sibling():
+                if not cursor.goto_parent():
+                    return
+
+    def _print_node(self, node: Any, depth: int) -> None:
         start_line = node.start_point[0]
         end_line = node.end_point[0]
-        size = end_line - start_line
-
-        if start_line < len(ast_nodes_by_line):
-            ast_nodes_by_line[start_line].append(node)
-
-        if size > 0 and start_line < len(scope_headers):
-            scope_headers[start_line].append(
-                ScopeHeader(
-                    scope_size=size,
-                    scope_start_line=start_line,
-                    scope_end_line=end_line,
-                )
-            )
-
-        for i in range(start_line, min(end_line + 1, len(scopes_by_line))):
-            scopes_by_line[i].add(start_line)
-
-        if self._verbose and getattr(node, "is_named", False):
-            snippet = (
-                node.text.splitlines()[0] if hasattr(node, "text") and node.text else ""
-            )
-            print(
-                f"{'   ' * depth}{node.type} {start_line}-{end_line} ({size + 1} lines) {snippet}"
-            )
-
-        for child in node.children:
-            self._walk_tree(
-                child,
-                lines,
-                depth + 1,
-                scopes_by_line,
-                scope_headers,
-                ast_nodes_by_line,
-            )
-
-        return start_line, end_line
+        snippet = node.text.splitlines()[0] if node.text else ""
+        print(
+            f"{'   ' * depth}{node.type} {start_line}-{end_line} ({end_line - start_line + 1} lines) {snippet}"
+        )
@@ -1,19 +1,45 @@
-from tree_sitter import Parser, Tree
-from tree_sitter_language_pack import get_parser
+from typing import TYPE_CHECKING
 
 from codegrep.contracts.ICodeParser import ICodeParser
 
+if TYPE_CHECKING:
+    from tree_sitter import Parser, Tree
+
 
 class TreeSitterCodeParser(ICodeParser):
 
-    def parse(self, code: str, language: str) -> Tree:
-        parser: Parser = self._resolve_code_parser(language=language)
-        tree: Tree = parser.parse(bytes(code, encoding="utf8"))
+    def __init__(self) -> None:
+        # Parsers are reused across files, one per language
+        self._parsers: dict[str, "Parser"] = {}
+
+    def parse(
+        self,
+        code: str | bytes | memoryview,
+        language: str,
+        old_tree: "Tree | None" = None,
+    ) -> "Tree":
+        parser = self._resolve_code_parser(language=language)
+        # Bytes (including memory-mapped ones) are parsed in place
+        source = bytes(code, encoding="utf8") if isinstance(code, str) else code
+        if old_tree is None:
+            tree = parser.parse(source)
+        else:
+            tree = parser.parse(source, old_tree=old_tree)
         return tree
 
-    def _resolve_code_parser(self, language: str) -> Parser:
+    def check_language(self, language: str) -> None:
+        self._resolve_code_parser(language=language)
+
+    def _resolve_code_parser(self, language: str) -> "Parser":
+        if language in self._parsers:
+            return self._parsers[language]
+        # Imported on first use (it loads a few grammars up front), each grammar is
+        # then loaded the first time a file of its language is parsed
+        from tree_sitter_language_pack import get_parser
+
         try:
-            parser: Parser = get_parser(language_name=language)
+            parser = get_parser(language_name=language)
+            self._parsers[language] = parser
             return parser
         except LookupError as lue:
             raise ValueError(
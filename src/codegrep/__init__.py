@@ -1,13 +1,33 @@
+from typing import TYPE_CHECKING, Any
+
 # from .__version__ import __version__
 from .application import Application
 from .CodeContextAnalyzer import CodeContextAnalyzer
 from .config.config import Config
+from .contracts.FileSearchResult import FileSearchResult
+from .search_session import SearchSession
+
+if TYPE_CHECKING:
+    from .async_application import AsyncApplication
 
 __version__ = "0.1.0"
 
 
+def __getattr__(name: str) -> Any:
+    # Imported on first access: asyncio alone takes longer to import than the
+    # rest of the package, and the CLI never needs it
+    if name == "AsyncApplication":
+        from .async_application import AsyncApplication
+
+        return AsyncApplication
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     "Config",
     "CodeContextAnalyzer",
     "Application",
+    "AsyncApplication",
+    "SearchSession",
+    "FileSearchResult",
 ]
@@ -1,10 +1,24 @@
+import sys
+
 from codegrep.cli.CodeGrepCLI import CodeGrepCLI
 
 
 def main():
+    # `codegrep index ...` manages the trigram index and `codegrep serve` runs the
+    # search daemon; anything else is a search. Use `codegrep -- index` to search
+    # for the word "index".
+    if sys.argv[1:2] == ["index"]:
+        from codegrep.cli.IndexCLI import IndexCLI
+
+        return IndexCLI().run(sys.argv[2:])
+    if sys.argv[1:2] == ["serve"]:
+        from codegrep.cli.ServeCLI import ServeCLI
+
+        return ServeCLI().run(sys.argv[2:])
+
     cli = CodeGrepCLI()
     return cli.run()
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,41 +1,33 @@
+from typing import Sequence
+
 from .AnsiCodeFormatter import AnsiCodeFormatter
-from .CodeContextAnalyzer import CodeContextAnalyzer
-from .components_factory import ComponentFactory
 from .config.config import Config
+from .contracts.IAnalysisCache import IAnalysisCache
 from .contracts.ICodeParser import ICodeParser
+from .contracts.IStatsRecorder import IStatsRecorder
 from .formating.contracts.ISpanHighlighter import ISpanHighlighter
 from .language_detection.LanguageCodeDetector import LanguageCodeDetector
 from .pattern_matching.contracts.IPatternMatcher import IPatternMatcher
+from .search_session import SearchSession
 
 
 class Application:
-    def __init__(self, config: Config) -> None:
-        component_factory = ComponentFactory(config)
-
-        self.language_detector: LanguageCodeDetector = (
-            component_factory.create_language_detector()
-        )
-        self.code_parser: ICodeParser = component_factory.create_code_parser()
-        self.pattern_matcher: IPatternMatcher = (
-            component_factory.create_pattern_matcher()
-        )
-        self.span_highlighter: ISpanHighlighter = (
-            component_factory.create_span_highlighter()
-        )
-        self.code_formatter: AnsiCodeFormatter = (
-            component_factory.create_code_formatter()
-        )
-
-        self._analyzer = CodeContextAnalyzer(
-            config=config,
-            language_detector=self.language_detector,
-            code_parser=self.code_parser,
-            pattern_matcher=self.pattern_matcher,
-            span_highlighter=self.span_highlighter,
-            code_formatter=self.code_formatter,
-        )
-
-    def run(self, search_pattern: str, ignore_case: bool = False) -> str:
+    def __init__(self, config: Config, stats: IStatsRecorder | None = None) -> None:
+        session = SearchSession(config, stats=stats)
+
+        self.language_detector: LanguageCodeDetector = session.language_detector
+        self.code_parser: ICodeParser = session.code_parser
+        self.pattern_matcher: IPatternMatcher = session.pattern_matcher
+        self.span_highlighter: ISpanHighlighter = session.span_highlighter
+        self.code_formatter: AnsiCodeFormatter = session.code_formatter
+        self.analysis_cache: IAnalysisCache | None = session.analysis_cache
+        self.stats: IStatsRecorder | None = stats
+
+        self._analyzer = session.create_analyzer(config.filename, config.code)
+
+    def run(
+        self, search_pattern: str | Sequence[str], ignore_case: bool = False
+    ) -> str:
         result = self._analyzer.grep(search_pattern, ignore_case)
         return self._analyzer.get_formatted_output()
 
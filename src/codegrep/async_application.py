@@ -0,0 +1,159 @@
+import asyncio
+import os
+import threading
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, Deque, Iterable, Sequence
+
+from .config.config import Config
+from .contracts.FileSearchResult import FileSearchResult
+from .search_session import SearchSession
+from .SourceBuffer import SourceBuffer
+
+# Search sessions of the executor thread (or process) running a search, one per set
+# of search options, shared by every search that runs there
+_worker_state = threading.local()
+
+
+class AsyncApplication:
+    """
+    Asyncio front end for searching many files without blocking the event loop.
+
+    - Reading, parsing and analyzing a file all run in an executor: a thread pool
+      by default, or any `concurrent.futures` executor given (a process pool for
+      CPU-bound searches)
+    - Every executor thread (or process) keeps one SearchSession per set of search
+      options, so concurrent searches share its tree-sitter parsers
+    - Results are yielded in input order; at most `max_pending` files are in
+      flight per search, and cancelling a search cancels the files not started yet
+
+    The `filename` and `code` of the options config are ignored.
+    """
+
+    def __init__(
+        self,
+        options: Config,
+        executor: Executor | None = None,
+        max_pending: int | None = None,
+    ) -> None:
+        self._options = options
+        # An executor given by the caller may be shared, it is not shut down here
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(thread_name_prefix="codegrep")
+        self._max_pending = max_pending or (os.cpu_count() or 1) * 4
+
+    async def __aenter__(self) -> "AsyncApplication":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Shut down the executor created for this application, if any."""
+        if self._owns_executor:
+            await asyncio.to_thread(
+                self._executor.shutdown, wait=True, cancel_futures=True
+            )
+
+    async def search_code(
+        self,
+        filename: str,
+        code: str,
+        search_pattern: str | Sequence[str],
+        ignore_case: bool = False,
+    ) -> FileSearchResult:
+        """Search code that is already in memory, `filename` picks the language."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            _search_code_in_worker,
+            self._options,
+            filename,
+            code,
+            search_pattern,
+            ignore_case,
+        )
+
+    async def search(
+        self,
+        filenames: Iterable[str | Path],
+        search_pattern: str | Sequence[str],
+        ignore_case: bool = False,
+    ) -> AsyncIterator[FileSearchResult]:
+        """
+        Search files concurrently, yielding each result in the order of `filenames`.
+
+        Like `SearchSession.search_files`, files that can not be read, look binary,
+        are over the size limit, or whose language is not supported, are skipped.
+        `filenames` is iterated in the event loop, so it should not block.
+        """
+        loop = asyncio.get_running_loop()
+        pending: Deque[asyncio.Future[FileSearchResult | None]] = deque()
+        try:
+            for filename in filenames:
+                if len(pending) >= self._max_pending:
+                    result = await pending.popleft()
+                    if result is not None:
+                        yield result
+
+                pending.append(
+                    loop.run_in_executor(
+                        self._executor,
+                        _search_file_in_worker,
+                        self._options,
+                        str(filename),
+                        search_pattern,
+                        ignore_case,
+                    )
+                )
+
+            while pending:
+                result = await pending.popleft()
+                if result is not None:
+                    yield result
+        finally:
+            # Cancelled or closed early: files not started yet are never searched
+            for future in pending:
+                future.cancel()
+
+
+def _worker_session(options: Config) -> SearchSession:
+    sessions: dict[tuple, SearchSession] | None = getattr(
+        _worker_state, "sessions", None
+    )
+    if sessions is None:
+        sessions = _worker_state.sessions = {}
+
+    key = tuple(vars(options).items())
+    session = sessions.get(key)
+    if session is None:
+        session = SearchSession(options)
+        sessions[key] = session
+    return session
+
+
+def _search_file_in_worker(
+    options: Config,
+    filename: str,
+    search_pattern: str | Sequence[str],
+    ignore_case: bool,
+) -> FileSearchResult | None:
+    session = _worker_session(options)
+    try:
+        with session.read_source(filename) as source:
+            return session.search_source(filename, source, search_pattern, ignore_case)
+    except (OSError, ValueError):
+        return None
+
+
+def _search_code_in_worker(
+    options: Config,
+    filename: str,
+    code: str,
+    search_pattern: str | Sequence[str],
+    ignore_case: bool,
+) -> FileSearchResult:
+    return _worker_session(options).search_source(
+        filename, SourceBuffer.from_text(code), search_pattern, ignore_case
+    )
@@ -0,0 +1,102 @@
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+from codegrep.contracts.IAnalysisCache import IAnalysisCache
+from codegrep.contracts.ScopeIntervals import ScopeIntervals
+
+_Value = TypeVar("_Value")
+
+
+class MemoryCache(Generic[_Value]):
+    """
+    In-memory LRU cache with a budget in bytes.
+
+    - Every entry is stored with its (estimated) size; least recently used entries
+      are evicted once the total is over the budget
+    - A single entry larger than the whole budget is not stored
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, tuple[_Value, int]] = OrderedDict()
+        self._total_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> _Value | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: Hashable, value: _Value, size: int) -> None:
+        self.discard(key)
+        if size > self._max_bytes:
+            return
+
+        self._entries[key] = (value, size)
+        self._total_bytes += size
+        while self._total_bytes > self._max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._total_bytes -= evicted_size
+
+    def discard(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry[1]
+
+
+class MemoryAnalysisCache(IAnalysisCache):
+    """
+    Syntax analysis results kept in a MemoryCache, for a long-running process.
+
+    Entries are keyed by (path, content hash, language): the hash is of the code
+    that was analyzed, so a file written to while it is read can not get the
+    analysis of another version. Only files with matches are analyzed, and hashed.
+    """
+
+    def __init__(self, cache: MemoryCache) -> None:
+        self._cache = cache
+
+    def make_key(
+        self, filename: str, code: str | bytes | memoryview, language: str
+    ) -> str:
+        if isinstance(code, str):
+            code = code.encode("utf8")
+        key_parts = [
+            "analysis",
+            os.path.abspath(filename),
+            hashlib.blake2b(code, digest_size=16).hexdigest(),
+            language,
+        ]
+        return "\0".join(key_parts)
+
+    def load(self, key: str) -> ScopeIntervals | None:
+        return self._cache.get(key)
+
+    def store(self, key: str, result: ScopeIntervals) -> None:
+        self._cache.put(key, result, scope_intervals_size(result))
+
+
+def scope_intervals_size(result: ScopeIntervals) -> int:
+    """Bytes taken by the int arrays of an analysis result."""
+    return sum(
+        len(table) * table.itemsize
+        for table in (
+            result.node_start_lines,
+            result.node_end_lines,
+            result.subtree_sizes,
+            result.node_offsets,
+            result.scope_start_lines,
+            result.scope_end_lines,
+            result.scope_parents,
+        )
+    )
@@ -0,0 +1,215 @@
+import hashlib
+import os
+import struct
+import threading
+import zlib
+from array import array
+from pathlib import Path
+
+from codegrep.contracts.IAnalysisCache import IAnalysisCache
+from codegrep.contracts.ScopeIntervals import ScopeIntervals
+
+_MAGIC = b"CGSA3"
+# magic, number of lines, number of nodes, number of scope intervals
+_HEADER = struct.Struct("<5sIII")
+
+
+def default_cache_dir() -> Path:
+    """Return `$XDG_CACHE_HOME/codegrep` (or `~/.cache/codegrep`)."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "codegrep"
+
+
+class SyntaxAnalysisCache(IAnalysisCache):
+    """
+    Persistent on-disk cache of syntax analysis results.
+
+    - Entries are keyed by (path, mtime, size, content hash, language, codegrep version)
+    - ScopeIntervals are already flat int arrays and are stored zlib-compressed,
+      so a warm run never runs tree-sitter
+    - Total size is capped; least recently used entries are evicted first
+    """
+
+    # Running size of each cache directory, shared by all instances in the process
+    _total_bytes_by_dir: dict[Path, int] = {}
+
+    def __init__(
+        self,
+        cache_dir: str | Path,
+        max_bytes: int = 256 * 1024 * 1024,
+        rebuild: bool = False,
+    ) -> None:
+        self._cache_dir = Path(cache_dir) / "analysis"
+        self._max_bytes = max_bytes
+        self._rebuild = rebuild
+
+    def make_key(
+        self, filename: str, code: str | bytes | memoryview, language: str
+    ) -> str:
+        from codegrep import __version__
+
+        try:
+            stat = os.stat(filename)
+            mtime_ns, size = stat.st_mtime_ns, stat.st_size
+        except OSError:
+            mtime_ns, size = 0, 0
+
+        if isinstance(code, str):
+            code = code.encode("utf8")
+        content_hash = hashlib.blake2b(code, digest_size=16).hexdigest()
+        key_parts = [
+            os.path.abspath(filename),
+            str(mtime_ns),
+            str(size),
+            content_hash,
+            language,
+            __version__,
+        ]
+        return hashlib.sha256("\0".join(key_parts).encode("utf8")).hexdigest()
+
+    def load(self, key: str) -> ScopeIntervals | None:
+        """Return the cached result for `key`, or None on a miss."""
+        if self._rebuild:
+            return None
+
+        entry_path = self._entry_path(key)
+        try:
+            data = entry_path.read_bytes()
+            # Mark as recently used for LRU eviction
+            os.utime(entry_path)
+        except OSError:
+            return None
+
+        try:
+            return self._deserialize(data)
+        except (ValueError, struct.error, zlib.error):
+            # Corrupt or incompatible entry, it will be overwritten on store
+            return None
+
+    def store(self, key: str, result: ScopeIntervals) -> None:
+        """Store an analysis result under `key`."""
+        data = self._serialize(result)
+        entry_path = self._entry_path(key)
+
+        try:
+            entry_path.parent.mkdir(parents=True, exist_ok=True)
+            previous_size = entry_path.stat().st_size if entry_path.exists() else 0
+
+            # Write atomically so concurrent readers never see a partial entry, and
+            # each thread to its own file so concurrent writers never mix theirs
+            temp_path = entry_path.with_suffix(
+                f".{os.getpid()}.{threading.get_ident()}.tmp"
+            )
+            temp_path.write_bytes(data)
+            os.replace(temp_path, entry_path)
+        except OSError:
+            return
+
+        self._account(len(data) - previous_size)
+
+    def _entry_path(self, key: str) -> Path:
+        return self._cache_dir / key[:2] / f"{key}.bin"
+
+    def _account(self, delta: int) -> None:
+        totals = SyntaxAnalysisCache._total_bytes_by_dir
+        if self._cache_dir not in totals:
+            # First store in this process: measure the directory once
+            totals[self._cache_dir] = sum(
+                entry.stat().st_size for entry in self._cache_dir.glob("*/*.bin")
+            )
+        else:
+            totals[self._cache_dir] += delta
+
+        if totals[self._cache_dir] > self._max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until under 90% of the size cap."""
+        entries = []
+        for entry in self._cache_dir.glob("*/*.bin"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = self._max_bytes * 0.9
+
+        for _, size, entry in entries:
+            if total <= target:
+                break
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+            total -= size
+
+        SyntaxAnalysisCache._total_bytes_by_dir[self._cache_dir] = total
+
+    def _serialize(self, result: ScopeIntervals) -> bytes:
+        payload = b"".join(
+            table.tobytes()
+            for table in (
+                result.node_start_lines,
+                result.node_end_lines,
+                result.subtree_sizes,
+                result.node_offsets,
+                result.scope_start_lines,
+                result.scope_end_lines,
+                result.scope_parents,
+            )
+        )
+        header = _HEADER.pack(
+            _MAGIC,
+            result.line_count,
+            len(result.node_start_lines),
+            len(result.scope_start_lines),
+        )
+        return header + zlib.compress(payload)
+
+    def _deserialize(self, data: bytes) -> ScopeIntervals:
+        magic, num_lines, num_nodes, num_scopes = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not a codegrep syntax analysis cache entry")
+
+        payload = array("i")
+        payload.frombytes(zlib.decompress(data[_HEADER.size :]))
+
+        tables: list[array] = []
+        position = 0
+        for length in (
+            num_nodes,
+            num_nodes,
+            num_nodes,
+            num_lines + 1,
+            num_scopes,
+            num_scopes,
+            num_scopes,
+        ):
+            tables.append(payload[position : position + length])
+            position += length
+        if position != len(payload):
+            raise ValueError("Truncated codegrep syntax analysis cache entry")
+
+        (
+            node_start_lines,
+            node_end_lines,
+            subtree_sizes,
+            node_offsets,
+            scope_start_lines,
+            scope_end_lines,
+            scope_parents,
+        ) = tables
+
+        return ScopeIntervals(
+            line_count=num_lines,
+            node_start_lines=node_start_lines,
+            node_end_lines=node_end_lines,
+            subtree_sizes=subtree_sizes,
+            node_offsets=node_offsets,
+            scope_start_lines=scope_start_lines,
+            scope_end_lines=scope_end_lines,
+            scope_parents=scope_parents,
+        )
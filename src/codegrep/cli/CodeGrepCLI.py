@@ -1,164 +1,562 @@
 import argparse
+import json
+import os
 import sys
 import time
 from pathlib import Path
-from typing import Iterable, Iterator
+from typing import TYPE_CHECKING, Any, Callable, Dict, Generator, Iterable, Iterator
 
-import colorama
-import pathspec
-
-from codegrep.application import Application
+from codegrep.caching.SyntaxAnalysisCache import default_cache_dir
+from codegrep.cli.FileSelector import FileSelector
+from codegrep.cli.FileWalker import FileWalker
+from codegrep.cli.ResultWriter import ResultWriter
 from codegrep.config.config import Config
+from codegrep.contracts.FileSearchResult import FileSearchResult
+from codegrep.contracts.IStatsRecorder import IStatsRecorder
+from codegrep.daemon.DaemonClient import DaemonClient
+from codegrep.daemon.protocol import REQUEST_OPTIONS, SearchRequest
+from codegrep.pattern_matching.TreeSitterQueryMatcher import InvalidQueryError
+from codegrep.search_errors import describe_search_error
+from codegrep.search_session import SearchSession
+from codegrep.SearchStats import SearchStats
+from codegrep.SyntaxKindIndex import ONLY_CHOICES
+
+if TYPE_CHECKING:
+    from codegrep.watch_session import WatchSession
+
+# How often files are checked for changes in watch mode
+_WATCH_POLL_SECONDS = 0.5
+
+# Per-process search session, kept warm across all files handled by a pool worker
+_worker_session: SearchSession | None = None
 
-colorama.init()
 
+def create_search_options(args: argparse.Namespace) -> Config:
+    return Config(
+        colors=args.colors,
+        color=args.color,
+        verbose=args.verbose,
+        line_numbers=args.line_numbers,
+        multiline=args.multiline,
+        cache_dir=None if args.no_cache else str(default_cache_dir()),
+        rebuild_cache=args.rebuild_cache,
+        on_demand_context=args.on_demand_context,
+        max_file_mb=args.max_filesize,
+        output_format=args.format,
+        query=args.query,
+        only=args.only,
+        # Listing a file only takes its first match
+        max_count=1 if args.files_with_matches else args.max_count,
+        matches_only=args.files_with_matches or args.count,
+    )
 
-def find_gitignore_path(start: Path) -> Path | None:
-    current_path = start.resolve()
-    print("Searching for .gitignore starting at:", current_path)
 
-    for parent in [current_path] + list(current_path.parents):
-        gitignore_file = parent / ".gitignore"
-        if gitignore_file.exists():
-            return gitignore_file
-    return None
+def create_daemon_request(
+    filenames: list[str], args: argparse.Namespace
+) -> SearchRequest:
+    options = vars(create_search_options(args))
+    return SearchRequest(
+        search_pattern=args.search_pattern,
+        paths=filenames,
+        cwd=os.getcwd(),
+        ignore_case=args.ignore_case,
+        use_index=_use_index(args),
+        options={name: options[name] for name in REQUEST_OPTIONS},
+    )
 
 
-def walk_files(
-    filenames: Iterable[str | Path], ignore_spec: pathspec.PathSpec, apply_ignore=False
-) -> Iterator[Path]:
-    for name in filenames:
-        path = Path(name)
+def create_search_session(
+    args: argparse.Namespace, stats: IStatsRecorder | None = None
+) -> SearchSession:
+    return SearchSession(create_search_options(args), stats=stats)
 
-        if path.name.startswith(".") or (apply_ignore and ignore_spec.match_file(path)):
-            continue
 
-        if path.is_file():
-            yield path
+def process_file(
+    filename: Path,
+    args: argparse.Namespace,
+    session: SearchSession,
+    max_count: int | None = None,
+) -> FileSearchResult | None:
+    def search() -> FileSearchResult:
+        # The result holds no reference to the code, which is unmapped right away
+        with session.read_source(filename) as source:
+            return session.search_source(
+                filename=str(filename),
+                source=source,
+                search_pattern=args.search_pattern,
+                ignore_case=args.ignore_case,
+                max_count=max_count,
+            )
 
-        elif path.is_dir():
-            for child in walk_files(
-                path.iterdir(),
-                ignore_spec,
-                True,
-            ):
-                yield child
+    return search_reporting_errors(filename, args, search, session.stats)
 
 
-def read_file_contents(filename: Path) -> str | None:
+def search_reporting_errors(
+    filename: str | Path,
+    args: argparse.Namespace,
+    search: Callable[[], FileSearchResult],
+    stats: IStatsRecorder | None = None,
+) -> FileSearchResult | None:
+    """
+    Run a search of one file, reporting why it failed instead of raising. Invalid
+    queries are raised: no other file can be searched either.
+    """
     try:
-        return filename.read_text(encoding="utf-8")
-    except UnicodeDecodeError as ude:
-        print(f"Could not read file {filename} due to encoding error: {str(ude)}")
+        return search()
+    except InvalidQueryError:
+        raise
+    except Exception as e:
+        if stats is not None:
+            stats.add_count("files_skipped")
+        message = describe_search_error(filename, e, args.verbose)
+        if message is not None:
+            print(message, file=sys.stderr)
         return None
 
 
+def _init_search_worker(args: argparse.Namespace) -> None:
+    global _worker_session
+    _worker_session = create_search_session(args, SearchStats() if args.stats else None)
+
+
+def _process_file_in_worker(
+    filename: Path, args: argparse.Namespace
+) -> tuple[FileSearchResult | None, Dict[str, Any] | None]:
+    """Search a file, returning its result and the stats recorded meanwhile."""
+    assert _worker_session is not None, "Search worker was not initialized"
+    result = process_file(filename, args, _worker_session)
+    stats = _worker_session.stats
+    if not isinstance(stats, SearchStats):
+        return result, None
+    file_stats = stats.to_dict()
+    stats.clear()
+    return result, file_stats
+
+
+def _use_index(args: argparse.Namespace) -> bool:
+    # Trigram indexes can only rule out files for text patterns
+    return not (args.no_index or args.query)
+
+
+def _read_patterns(pattern_file: str) -> list[str]:
+    """Read the non-blank lines of a pattern file, or of stdin for `-`."""
+    if pattern_file == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(pattern_file, encoding="utf8") as f:
+            lines = f.read().splitlines()
+    return [line for line in lines if line]
+
+
+def _timed_walk(files: Iterable[Path], stats: IStatsRecorder) -> Iterator[Path]:
+    """Yield the selected files, recording the time spent finding each one."""
+    iterator = iter(files)
+    while True:
+        start = time.perf_counter()
+        path = next(iterator, None)
+        stats.add_time("walk", time.perf_counter() - start)
+        if path is None:
+            return
+        stats.add_count("files_walked")
+        yield path
+
+
 class CodeGrepCLI:
 
     def __init__(self) -> None:
         self._parser = argparse.ArgumentParser(
             description="codegrep: A tool to grep code with context-aware analysis.",
         )
+        self._session: SearchSession | None = None
+        self._stats: SearchStats | None = None
 
     def run(self) -> int:
         self._attach_arguments()
         args = self._parser.parse_args()
+        self._resolve_patterns(args)
+        self._check_limits(args)
+        if args.jobs == 0:
+            args.jobs = os.cpu_count() or 1
+        if args.stats:
+            self._stats = SearchStats()
+        if args.colors:
+            # Only needed to translate ANSI codes on Windows consoles
+            import colorama
+
+            colorama.init()
 
+        writer = ResultWriter(sys.stdout, output_format=args.format)
         try:
-            start = time.time()
+            start = time.perf_counter()
 
-            gitignore_path = find_gitignore_path(Path.cwd())
-            print("Gitignore path found at:", gitignore_path)
+            # Keep the given order (minus duplicates) so output is deterministic
+            filenames = list(dict.fromkeys(args.filenames))
+            if args.watch:
+                return self._watch(filenames, args, writer)
 
-            if gitignore_path is None:
-                ignore_specification = pathspec.PathSpec.from_lines(
-                    pathspec.patterns.GitWildMatchPattern, []
+            # A running daemon answers from warm caches, otherwise files are walked,
+            # searched and written one at a time as results arrive
+            # (stats describe work done in this process)
+            use_daemon = not (
+                args.no_daemon or args.rebuild_cache or args.verbose or args.stats
+            )
+            client = DaemonClient.connect() if use_daemon else None
+            # Matching lines left to show before `--max-total` stops the search
+            remaining = args.max_total
+            results: Generator[FileSearchResult | None, None, None]
+            if client is not None:
+                results = client.search(
+                    create_daemon_request(filenames, args),
+                    report=lambda message: print(message, file=sys.stderr),
                 )
             else:
-                with gitignore_path.open("r") as f:
-                    ignore_specification = pathspec.PathSpec.from_lines(
-                        pathspec.patterns.GitWildMatchPattern, f
-                    )
-
-            for file_path in walk_files(set(args.filenames), ignore_specification):
-                result = self._process_file(file_path, args)
-                if result is None or result.strip() == "":
+                results = self._search_locally(filenames, args, lambda: remaining)
+
+            number_of_files = 0
+            time_to_first_result: float | None = None
+            for result in results:
+                number_of_files += 1
+                if result is None or not result.has_matches:
                     continue
+                if remaining is not None and len(result.matched_lines) > remaining:
+                    # Searched ahead (in parallel or by the daemon) without knowing
+                    # how many matches other files had: only the first lines count.
+                    # Files searched one at a time already stop there.
+                    result = self._process_file(Path(result.filename), args, remaining)
+                    if result is None or not result.has_matches:
+                        continue
 
-                print()
-                print(f"File name: {str(file_path)}")
-                print(result)
-                print()
+                if time_to_first_result is None:
+                    time_to_first_result = time.perf_counter() - start
+                self._write_result(writer, result, args)
 
-            end = time.time()
-            print(f"Total time taken: {end - start:.2f} seconds")
+                if remaining is not None:
+                    remaining -= len(result.matched_lines)
+                    if remaining == 0:
+                        # Stops the walk and the searches still in progress
+                        results.close()
+                        break
 
-            number_of_files = len(
-                list(walk_files(set(args.filenames), ignore_specification))
-            )
-            print(f"Unique filenames to process: {set(args.filenames)}")
-            print(f"Number of files processed: {number_of_files}")
+            if client is not None and remaining != 0:
+                # Only files with matches are sent back
+                number_of_files = client.files_searched
+
+            self._write_stats(args)
+            if args.format != "text" or args.files_with_matches or args.count:
+                # Nothing but records, file names or counts, for programs reading
+                # the output
+                return 0
+
+            end = time.perf_counter()
+            writer.write_line(f"Total time taken: {end - start:.2f} seconds")
+            if time_to_first_result is not None:
+                writer.write_line(
+                    f"Time to first result: {time_to_first_result:.2f} seconds"
+                )
+            writer.write_line(f"Unique filenames to process: {set(filenames)}")
+            writer.write_line(f"Number of files processed: {number_of_files}")
 
             return 0
 
         except FileNotFoundError:
             print(f"Error: File '{args.filename}' not found.", file=sys.stderr)
             return 1
+        except InvalidQueryError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
         except KeyboardInterrupt:
             print("Operation cancelled by user.", file=sys.stderr)
             return 1
         except Exception as e:
             print(f"An unexpected error occurred: {e}", file=sys.stderr)
             return 1
+        finally:
+            writer.finish()
+            writer.flush()
 
-    def _process_file(self, filename: Path, args: argparse.Namespace) -> str | None:
-        code = read_file_contents(filename)
-        if code is None:
-            return None
+    def _resolve_patterns(self, args: argparse.Namespace) -> None:
+        """
+        Gather the patterns given with -e and -f into `args.search_pattern`, a list
+        if there are several; the first positional argument is then a file name.
+        """
+        patterns = list(args.patterns or [])
+        for pattern_file in args.pattern_files or []:
+            try:
+                patterns.extend(_read_patterns(pattern_file))
+            except OSError as e:
+                self._parser.error(f"can not read patterns from {pattern_file}: {e}")
+
+        if args.patterns is None and args.pattern_files is None:
+            if args.search_pattern is None:
+                self._parser.error("a search pattern is required (or use -e / -f)")
+        else:
+            if not patterns:
+                self._parser.error("no patterns given in the pattern files")
+            if args.search_pattern is not None:
+                args.filenames.insert(0, args.search_pattern)
+            args.search_pattern = patterns[0] if len(patterns) == 1 else patterns
+        args.filenames = args.filenames or ["."]
+        if args.query and args.ignore_case:
+            self._parser.error(
+                "--ignore-case does not apply to --query, match with a "
+                '(#match? @capture "(?i)...") predicate instead'
+            )
+
+    def _check_limits(self, args: argparse.Namespace) -> None:
+        if args.files_with_matches and args.count:
+            self._parser.error("-l and --count can not be combined")
+        if (args.files_with_matches or args.count) and args.format != "text":
+            self._parser.error("-l and --count print plain text, not --format records")
+        for option, value in (
+            ("--max-count", args.max_count),
+            ("--max-total", args.max_total),
+        ):
+            if value is not None and value < 1:
+                self._parser.error(f"{option} must be at least 1")
+
+    def _write_result(
+        self, writer: ResultWriter, result: FileSearchResult, args: argparse.Namespace
+    ) -> None:
+        if args.files_with_matches:
+            writer.write_line(result.filename)
+        elif args.count:
+            writer.write_line(f"{result.filename}:{len(result.matched_lines)}")
+        else:
+            writer.write_result(result)
+
+    def _write_no_longer_matching(
+        self, writer: ResultWriter, filename: str, args: argparse.Namespace
+    ) -> None:
+        if args.count:
+            writer.write_line(f"{filename}:0")
+        elif args.format != "text" and not args.files_with_matches:
+            # The record of a file without matches
+            writer.write_result(
+                FileSearchResult(
+                    filename=filename,
+                    record={
+                        "file": filename,
+                        "matches": [],
+                        "context": [],
+                        "scopes": [],
+                    },
+                )
+            )
+        else:
+            writer.write_line(f"{filename}: no longer matches")
+
+    def _watch(
+        self, filenames: list[str], args: argparse.Namespace, writer: ResultWriter
+    ) -> int:
+        """
+        Search all files once, then search each file again whenever it changes, until
+        interrupted. Only the files found by the first walk are watched. A file whose
+        matches are all gone is reported once, so earlier output is not left stale.
+        """
+        from codegrep.watch_session import WatchSession
+
+        session = WatchSession(create_search_options(args), stats=self._stats)
+        # Trigram indexes are not used: any file may start to match after an edit
+        files = [str(path) for path in FileWalker().walk(filenames)]
+        # Files whose last search had matches
+        matching: set[str] = set()
+        self._search_watched_files(session, files, args, writer, matching)
 
-        config = Config(
-            filename=str(filename),
-            code=code,
-            colors=args.colors,
-            color=args.color,
-            verbose=args.verbose,
-            line_numbers=args.line_numbers,
-        )
-        application = Application(config=config)
         try:
-            result = application.run(
-                search_pattern=args.search_pattern,
-                ignore_case=args.ignore_case,
+            while True:
+                time.sleep(_WATCH_POLL_SECONDS)
+                changed = session.changed_files(files)
+                if changed:
+                    self._search_watched_files(session, changed, args, writer, matching)
+        except KeyboardInterrupt:
+            return 0
+
+    def _search_watched_files(
+        self,
+        session: "WatchSession",
+        filenames: list[str],
+        args: argparse.Namespace,
+        writer: ResultWriter,
+        matching: set[str],
+    ) -> None:
+        start = time.perf_counter()
+        for filename in filenames:
+            result = search_reporting_errors(
+                filename,
+                args,
+                lambda: session.search(filename, args.search_pattern, args.ignore_case),
+                self._stats,
             )
-            return result
-        except Exception as e:
-            print(
-                f"An error occurred while processing file {filename}: {e}",
-                file=sys.stderr,
+            if result is not None and result.has_matches:
+                matching.add(filename)
+                self._write_result(writer, result, args)
+            elif filename in matching:
+                matching.discard(filename)
+                self._write_no_longer_matching(writer, filename, args)
+
+        elapsed = time.perf_counter() - start
+        if args.format == "text":
+            writer.write_line(
+                f"Searched {len(filenames)} files in {elapsed:.3f} seconds"
             )
-            return None
+        writer.flush()
+        # Stats of every round of searches are reported on their own
+        self._write_stats(args)
+        if self._stats is not None:
+            self._stats.clear()
+
+    def _write_stats(self, args: argparse.Namespace) -> None:
+        """Report the stats of the search to stderr, away from the results."""
+        if self._stats is None:
+            return
+        if args.stats_format == "json":
+            print(json.dumps(self._stats.to_dict()), file=sys.stderr)
+        else:
+            print(self._stats.format_text(), file=sys.stderr)
+        sys.stderr.flush()
+
+    def _search_locally(
+        self,
+        filenames: list[str],
+        args: argparse.Namespace,
+        max_count: Callable[[], int | None] = lambda: None,
+    ) -> Generator[FileSearchResult | None, None, None]:
+        """
+        Yield the result of every selected file, None if it was not searched. Files
+        searched one at a time keep at most `max_count()` matching lines, asked for
+        just before each is searched.
+        """
+        selector = FileSelector(use_index=_use_index(args))
+        files = selector.select(filenames, args.search_pattern, args.ignore_case)
+        if self._stats is not None:
+            files = _timed_walk(files, self._stats)
+        for _, result in self._process_files(files, args, max_count):
+            yield result
+
+    def _process_file(
+        self, filename: Path, args: argparse.Namespace, max_count: int | None = None
+    ) -> FileSearchResult | None:
+        if self._session is None:
+            self._session = create_search_session(args, self._stats)
+        return process_file(filename, args, self._session, max_count)
+
+    def _process_files(
+        self,
+        filenames: Iterable[Path],
+        args: argparse.Namespace,
+        max_count: Callable[[], int | None] = lambda: None,
+    ) -> Iterator[tuple[Path, FileSearchResult | None]]:
+        """
+        Yield (filename, result) pairs in walk order, in parallel if requested.
+        `max_count` only applies to files searched one at a time, see
+        `_search_locally`.
+        """
+        if args.jobs == 1:
+            for filename in filenames:
+                yield filename, self._process_file(filename, args, max_count())
+            return
+
+        from codegrep.cli.ParallelFileProcessor import ParallelFileProcessor
+
+        processor = ParallelFileProcessor(
+            jobs=args.jobs,
+            worker=_process_file_in_worker,
+            initializer=_init_search_worker,
+            initargs=(args,),
+        )
+        for filename, (result, file_stats) in processor.process(filenames, args):
+            if self._stats is not None and file_stats is not None:
+                self._stats.merge(file_stats)
+            yield filename, result
 
     def _attach_arguments(self):
         # Positional arguments
         self._parser.add_argument(
             "search_pattern",
             type=str,
-            help="The pattern to search for in the code.",
+            nargs="?",
+            help="The pattern to search for in the code (a file name instead if "
+            "patterns are given with -e or -f).",
         )
         self._parser.add_argument(
             "filenames",
             nargs="*",
-            default=["."],
+            default=[],
             help="Files or directories to search. (default: current directory).",
         )
 
         # Optional arguments
+        self._parser.add_argument(
+            "-e",
+            "--regexp",
+            dest="patterns",
+            action="append",
+            metavar="PATTERN",
+            help="A pattern to search for; repeat to search for several patterns at "
+            "once, in a single pass over each file.",
+        )
+        self._parser.add_argument(
+            "-f",
+            "--file",
+            dest="pattern_files",
+            action="append",
+            metavar="FILE",
+            help="Read patterns to search for from FILE, one per line (blank lines "
+            "are ignored, - is stdin).",
+        )
+        self._parser.add_argument(
+            "--query",
+            action="store_true",
+            help="The patterns are tree-sitter queries, e.g. "
+            "'(call function: (identifier) @name (#eq? @name \"foo\"))'; the lines of "
+            "the nodes they capture match.",
+        )
+        self._parser.add_argument(
+            "--only",
+            choices=ONLY_CHOICES,
+            default=None,
+            help="Only keep matches in code (outside comments and strings), in "
+            "comments, in string literals or in identifiers.",
+        )
+        self._parser.add_argument(
+            "-l",
+            "--files-with-matches",
+            action="store_true",
+            help="Only print the names of files with matches; each file is only "
+            "scanned up to its first match.",
+        )
+        self._parser.add_argument(
+            "--count",
+            action="store_true",
+            help="Only print the number of matching lines of each file with matches.",
+        )
+        self._parser.add_argument(
+            "-m",
+            "--max-count",
+            type=int,
+            default=None,
+            metavar="N",
+            help="Stop scanning a file after its first N matching lines.",
+        )
+        self._parser.add_argument(
+            "--max-total",
+            type=int,
+            default=None,
+            metavar="N",
+            help="Stop the search once N matching lines were found in all files.",
+        )
         self._parser.add_argument(
             "-i",
             "--ignore-case",
             action="store_true",
             help="Ignore case when searching for the pattern.",
         )
+        self._parser.add_argument(
+            "-U",
+            "--multiline",
+            action="store_true",
+            help="Allow matches to span multiple lines.",
+        )
         self._parser.add_argument(
             "-c",
             "--colors",
@@ -193,3 +591,67 @@ class CodeGrepCLI:
             action="store_true",
             help="Show line numbers in the output.",
         )
+        self._parser.add_argument(
+            "--format",
+            choices=["text", "json", "ndjson"],
+            default="text",
+            help="Output format: formatted text (default), a JSON array of one "
+            "record per file with matches, or one such record per line.",
+        )
+        self._parser.add_argument(
+            "--on-demand-context",
+            action="store_true",
+            help="Find scopes from the matched lines upward instead of analyzing "
+            "whole files.",
+        )
+        self._parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="Keep running and search files again whenever they change.",
+        )
+        self._parser.add_argument(
+            "--max-filesize",
+            type=int,
+            default=None,
+            metavar="MB",
+            help="Skip files larger than MB megabytes (default: no limit).",
+        )
+        self._parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Report time spent in each stage of the search and counters (bytes "
+            "read, lines scanned, nodes visited, cache hits...) to stderr.",
+        )
+        self._parser.add_argument(
+            "--stats-format",
+            choices=["text", "json"],
+            default="text",
+            help="Format of the --stats report: a table (default) or a JSON object.",
+        )
+        self._parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Do not read or write the on-disk syntax analysis cache.",
+        )
+        self._parser.add_argument(
+            "--rebuild-cache",
+            action="store_true",
+            help="Ignore cached syntax analysis and rebuild it for searched files.",
+        )
+        self._parser.add_argument(
+            "--no-daemon",
+            action="store_true",
+            help="Search in this process even if a `codegrep serve` daemon is running.",
+        )
+        self._parser.add_argument(
+            "--no-index",
+            action="store_true",
+            help="Search all files even if a trigram index exists.",
+        )
+        self._parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=1,
+            help="Number of files to process in parallel (default: 1, 0 = all CPUs).",
+        )
@@ -0,0 +1,68 @@
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence
+
+from codegrep.cli.FileWalker import FileWalker
+from codegrep.indexing.TrigramIndex import TrigramIndex
+
+
+class FileSelector:
+    """
+    Picks the files a search reads.
+
+    Directories with a trigram index, or inside an indexed directory, are walked as
+    usual, but of the files indexed with their current modification time and size
+    only those that can match (any of the patterns, for several) are kept; files
+    added or changed since the index was built, and files given explicitly, are
+    always searched.
+    """
+
+    def __init__(self, use_index: bool = True) -> None:
+        self._use_index = use_index
+        self._walker = FileWalker()
+
+    def select(
+        self,
+        paths: Iterable[str | Path],
+        search_pattern: str | Sequence[str],
+        ignore_case: bool,
+    ) -> Iterator[Path]:
+        """Yield the files to search for `search_pattern` under `paths`."""
+        patterns = (
+            [search_pattern] if isinstance(search_pattern, str) else search_pattern
+        )
+        for name in paths:
+            index = (
+                TrigramIndex.load_enclosing(name)
+                if self._use_index and Path(name).is_dir()
+                else None
+            )
+            candidates = (
+                self._candidates(index, name, patterns, ignore_case)
+                if index is not None
+                else None
+            )
+            if index is None or candidates is None:
+                yield from self._walker.walk([name])
+                continue
+            for path in self._walker.walk([name]):
+                if path in candidates or not index.is_current(path):
+                    yield path
+
+    def _candidates(
+        self,
+        index: TrigramIndex,
+        directory: str | Path,
+        patterns: Sequence[str],
+        ignore_case: bool,
+    ) -> set[Path] | None:
+        """
+        Indexed files under `directory` that may match any of the patterns, as its
+        walk yields them, or None to search them all.
+        """
+        candidates: set[Path] = set()
+        for pattern in patterns:
+            pattern_candidates = index.candidates(pattern, ignore_case, directory)
+            if pattern_candidates is None:
+                return None
+            candidates.update(pattern_candidates)
+        return candidates
@@ -0,0 +1,153 @@
+import os
+from operator import attrgetter
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, List
+
+if TYPE_CHECKING:
+    # pathspec is only imported once an ignore file is found
+    import pathspec
+
+IGNORE_FILE_NAMES = (".gitignore", ".ignore")
+
+# An ignore file in effect: length of its directory prefix and its compiled patterns
+_Spec = tuple[int, "pathspec.PathSpec"]
+
+
+class FileWalker:
+    """
+    Walks files and directories with `os.scandir`, honoring nested ignore files.
+
+    - `.gitignore` and `.ignore` files apply to their directory and everything below
+      it; deeper files take precedence, and `.ignore` wins over `.gitignore`
+    - Ignore files above a walked directory apply too, up to the repository root
+    - Ignored directories are pruned without being read
+    - Hidden entries are skipped, paths given explicitly are never ignored
+    - Compiled ignore files are cached per directory for the lifetime of the walker
+    """
+
+    def __init__(self) -> None:
+        self._specs_by_dir: dict[str, "pathspec.PathSpec | None"] = {}
+
+    def walk(self, paths: Iterable[str | Path]) -> Iterator[Path]:
+        """Yield the files under `paths` in sorted depth-first order."""
+        for name in paths:
+            path = Path(name)
+
+            if path.name.startswith("."):
+                continue
+
+            if path.is_file():
+                yield path
+            elif path.is_dir():
+                absolute = os.path.abspath(path)
+                yield from self._walk_directory(
+                    path, absolute, self._inherited_specs(absolute)
+                )
+
+    def _walk_directory(
+        self, root: Path, absolute: str, inherited_specs: List[_Spec]
+    ) -> Iterator[Path]:
+        # Explicit stack of (directory, ignore files in effect, remaining entries)
+        stack = [(root, *self._open_directory(absolute, inherited_specs))]
+
+        while stack:
+            directory, specs, entries = stack[-1]
+            entry = next(entries, None)
+            if entry is None:
+                stack.pop()
+                continue
+
+            if entry.name.startswith("."):
+                continue
+            try:
+                is_dir = entry.is_dir()
+                is_file = not is_dir and entry.is_file()
+            except OSError:
+                continue
+            if not (is_dir or is_file) or self._is_ignored(entry.path, is_dir, specs):
+                continue
+
+            if is_file:
+                yield directory / entry.name
+            else:
+                stack.append(
+                    (directory / entry.name, *self._open_directory(entry.path, specs))
+                )
+
+    def _open_directory(
+        self, absolute: str, specs: List[_Spec]
+    ) -> tuple[List[_Spec], Iterator[os.DirEntry]]:
+        """List a directory and add its own ignore file to the ones in effect."""
+        try:
+            with os.scandir(absolute) as scanner:
+                entries = sorted(scanner, key=attrgetter("name"))
+        except OSError:
+            return specs, iter(())
+
+        names = {entry.name for entry in entries}
+        if any(ignore_file in names for ignore_file in IGNORE_FILE_NAMES):
+            spec = self._directory_spec(absolute)
+            if spec is not None:
+                specs = specs + [(len(os.path.join(absolute, "")), spec)]
+        return specs, iter(entries)
+
+    def _inherited_specs(self, absolute: str) -> List[_Spec]:
+        """Ignore files of the directories above `absolute`, outermost first."""
+        specs: List[_Spec] = []
+        current = absolute
+        while True:
+            parent = os.path.dirname(current)
+            if parent == current or os.path.isdir(os.path.join(current, ".git")):
+                break
+            current = parent
+            spec = self._directory_spec(current)
+            if spec is None:
+                continue
+
+            # A walked directory is given explicitly, so patterns ignoring it (and
+            # with it everything below) do not apply
+            prefix_length = len(os.path.join(current, ""))
+            relative_root = os.path.join(absolute[prefix_length:], "")
+            patterns = [
+                pattern
+                for pattern in spec.patterns
+                if pattern.include is not None and not pattern.match_file(relative_root)
+            ]
+            if patterns:
+                from pathspec import GitIgnoreSpec
+
+                specs.append((prefix_length, GitIgnoreSpec(patterns)))
+        specs.reverse()
+        return specs
+
+    def _directory_spec(self, absolute: str) -> "pathspec.PathSpec | None":
+        if absolute in self._specs_by_dir:
+            return self._specs_by_dir[absolute]
+
+        # Later lines win in gitignore semantics, so .ignore goes last
+        lines: List[str] = []
+        for ignore_file in IGNORE_FILE_NAMES:
+            try:
+                with open(os.path.join(absolute, ignore_file), "r") as f:
+                    lines.extend(f.read().splitlines())
+            except (OSError, UnicodeDecodeError):
+                continue
+
+        spec = None
+        if lines:
+            from pathspec import GitIgnoreSpec
+
+            spec = GitIgnoreSpec.from_lines(lines)
+        self._specs_by_dir[absolute] = spec
+        return spec
+
+    def _is_ignored(self, absolute: str, is_dir: bool, specs: List[_Spec]) -> bool:
+        # The deepest ignore file with a matching pattern decides
+        for prefix_length, spec in reversed(specs):
+            relative = absolute[prefix_length:]
+            if is_dir:
+                relative += "/"
+            ignored = spec.check_file(relative).include
+            if ignored is not None:
+                return ignored
+        return False
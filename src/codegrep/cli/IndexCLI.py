@@ -0,0 +1,68 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from codegrep.cli.FileWalker import FileWalker
+from codegrep.indexing.TrigramIndex import TrigramIndex
+
+
+class IndexCLI:
+    """`codegrep index ...`: manage the trigram index used to pick candidate files."""
+
+    def __init__(self) -> None:
+        self._parser = argparse.ArgumentParser(
+            prog="codegrep index",
+            description="Build or refresh the trigram index of a directory.",
+        )
+
+    def run(self, argv: list[str]) -> int:
+        self._attach_arguments()
+        args = self._parser.parse_args(argv)
+
+        try:
+            start = time.time()
+
+            directory = Path(args.directory)
+            if not directory.is_dir():
+                print(f"Error: '{directory}' is not a directory.", file=sys.stderr)
+                return 1
+
+            index = None if args.rebuild else TrigramIndex.load(directory)
+            if index is None:
+                index = TrigramIndex(directory)
+
+            indexed, removed = index.update(FileWalker().walk([directory]))
+
+            end = time.time()
+            print(
+                f"Indexed {indexed} files, removed {removed} "
+                f"({index.file_count} files in index) in {end - start:.2f} seconds"
+            )
+            return 0
+
+        except KeyboardInterrupt:
+            print("Operation cancelled by user.", file=sys.stderr)
+            return 1
+        except Exception as e:
+            print(f"An unexpected error occurred: {e}", file=sys.stderr)
+            return 1
+
+    def _attach_arguments(self) -> None:
+        subparsers = self._parser.add_subparsers(dest="command", required=True)
+
+        build_parser = subparsers.add_parser(
+            "build",
+            help="Create the index, or update it from file modification times.",
+        )
+        build_parser.add_argument(
+            "directory",
+            nargs="?",
+            default=".",
+            help="Directory to index (default: current directory).",
+        )
+        build_parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Discard the existing index and index every file again.",
+        )
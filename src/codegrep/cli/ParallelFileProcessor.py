@@ -0,0 +1,64 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Deque, Generic, Iterable, Iterator, TypeVar
+
+R = TypeVar("R")
+
+
+class ParallelFileProcessor(Generic[R]):
+    """
+    Runs a per-file worker function in a process pool and yields results in input order.
+
+    - Each worker process is set up once with `initializer` (e.g. a search session)
+    - At most `max_pending` files are in flight or waiting to be emitted, so memory
+      stays flat no matter how many files are processed
+    """
+
+    def __init__(
+        self,
+        jobs: int,
+        worker: Callable[[Path, Any], R],
+        initializer: Callable[..., None] | None = None,
+        initargs: tuple[Any, ...] = (),
+        max_pending: int | None = None,
+    ) -> None:
+        if jobs < 1:
+            raise ValueError(f"Number of jobs must be at least 1, got {jobs}")
+        self._jobs = jobs
+        self._worker = worker
+        self._initializer = initializer
+        self._initargs = initargs
+        # Keep a few tasks queued per worker so no process sits idle
+        self._max_pending = max_pending or jobs * 4
+
+    def process(
+        self, filenames: Iterable[Path], payload: Any
+    ) -> Iterator[tuple[Path, R]]:
+        """
+        Process files in parallel, yielding (filename, result) pairs in the same
+        order as `filenames`.
+        """
+        pending: Deque[tuple[Path, Future[R]]] = deque()
+
+        executor = ProcessPoolExecutor(
+            max_workers=self._jobs,
+            initializer=self._initializer,
+            initargs=self._initargs,
+        )
+        try:
+            for filename in filenames:
+                if len(pending) >= self._max_pending:
+                    # Reorder buffer is full: emit the oldest result before adding more
+                    head_filename, head_future = pending.popleft()
+                    yield head_filename, head_future.result()
+
+                pending.append(
+                    (filename, executor.submit(self._worker, filename, payload))
+                )
+
+            while pending:
+                head_filename, head_future = pending.popleft()
+                yield head_filename, head_future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
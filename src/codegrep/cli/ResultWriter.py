@@ -0,0 +1,73 @@
+import json
+from typing import List, TextIO
+
+from codegrep.contracts.FileSearchResult import FileSearchResult
+
+
+class ResultWriter:
+    """
+    Single buffered writer for search output.
+
+    - Results are appended to an in-memory buffer and written out in large chunks
+    - On a terminal the buffer is flushed after every file, so results show up as
+      soon as they are found
+    - With `output_format` "ndjson" each result is its record on one line, with
+      "json" the records are the items of one array, closed by `finish`
+    """
+
+    def __init__(
+        self,
+        stream: TextIO,
+        buffer_size: int = 64 * 1024,
+        output_format: str = "text",
+    ) -> None:
+        self._stream = stream
+        self._buffer_size = buffer_size
+        self._buffer: List[str] = []
+        self._buffered_chars = 0
+        self._flush_each_result = stream.isatty()
+        self._output_format = output_format
+        self._records_written = 0
+
+    def write_result(self, result: FileSearchResult) -> None:
+        if self._output_format == "text":
+            self._append(f"\nFile name: {result.filename}\n")
+            for line in result.formatted_lines:
+                self._append(line)
+                self._append("\n")
+            self._append("\n")
+        else:
+            self._append_record(result)
+
+        if self._flush_each_result or self._buffered_chars >= self._buffer_size:
+            self.flush()
+
+    def finish(self) -> None:
+        """End the output, after the last result."""
+        if self._output_format == "json":
+            self._append("\n]\n" if self._records_written else "[]\n")
+
+    def write_line(self, line: str) -> None:
+        self._append(line)
+        self._append("\n")
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._stream.write("".join(self._buffer))
+            self._buffer = []
+            self._buffered_chars = 0
+        self._stream.flush()
+
+    def _append_record(self, result: FileSearchResult) -> None:
+        record = json.dumps(result.record, ensure_ascii=False)
+        if self._output_format == "json":
+            self._append(",\n" if self._records_written else "[\n")
+            self._append(record)
+        else:
+            self._append(record)
+            self._append("\n")
+        self._records_written += 1
+
+    def _append(self, text: str) -> None:
+        self._buffer.append(text)
+        self._buffered_chars += len(text)
@@ -0,0 +1,54 @@
+import argparse
+import signal
+import sys
+
+from codegrep.daemon.protocol import DaemonError, default_socket_path
+from codegrep.daemon.SearchDaemon import SearchDaemon
+
+
+class ServeCLI:
+    """`codegrep serve`: run the search daemon until interrupted."""
+
+    def __init__(self) -> None:
+        self._parser = argparse.ArgumentParser(
+            prog="codegrep serve",
+            description="Answer searches from warm caches on a Unix socket. Searches "
+            "run with `codegrep` are forwarded to it while it is running.",
+        )
+
+    def run(self, argv: list[str]) -> int:
+        self._attach_arguments()
+        args = self._parser.parse_args(argv)
+
+        daemon = SearchDaemon(args.socket, max_bytes=args.memory_mb * 1024 * 1024)
+        # Stopped like with Ctrl+C, so the socket is removed
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        try:
+            daemon.listen()
+            print(f"Listening on {daemon.socket_path}", file=sys.stderr)
+            daemon.serve_forever()
+            return 0
+        except KeyboardInterrupt:
+            return 0
+        except DaemonError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        except Exception as e:
+            print(f"An unexpected error occurred: {e}", file=sys.stderr)
+            return 1
+
+    def _attach_arguments(self) -> None:
+        self._parser.add_argument(
+            "--socket",
+            default=str(default_socket_path()),
+            help="Path of the Unix socket to listen on (default: %(default)s, "
+            "set CODEGREP_SOCKET to change it for clients too).",
+        )
+        self._parser.add_argument(
+            "--memory-mb",
+            type=int,
+            default=512,
+            metavar="MB",
+            help="Memory budget of cached file contents and analysis results "
+            "(default: %(default)s).",
+        )
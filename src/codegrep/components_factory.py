@@ -1,11 +1,18 @@
 from codegrep.AnsiCodeFormatter import AnsiCodeFormatter
+from codegrep.caching.SyntaxAnalysisCache import SyntaxAnalysisCache
 from codegrep.config.config import Config
 from codegrep.contracts.ICodeParser import ICodeParser
 from codegrep.formating.contracts.ISpanHighlighter import ISpanHighlighter
 from codegrep.formating.SpanHighlighter import SpanHighlighter
+from codegrep.JsonRecordFormatter import JsonRecordFormatter
 from codegrep.language_detection.LanguageCodeDetector import LanguageCodeDetector
 from codegrep.pattern_matching.contracts.IPatternMatcher import IPatternMatcher
+from codegrep.pattern_matching.contracts.ITreePatternMatcher import (
+    ITreePatternMatcher,
+)
+from codegrep.pattern_matching.LiteralPatternMatcher import LiteralPatternMatcher
 from codegrep.pattern_matching.RegexPatternMatcher import RegexPatternMatcher
+from codegrep.pattern_matching.TreeSitterQueryMatcher import TreeSitterQueryMatcher
 from codegrep.TreeSitterCodeParser import TreeSitterCodeParser
 
 
@@ -20,10 +27,31 @@ class ComponentFactory:
         return TreeSitterCodeParser()
 
     def create_pattern_matcher(self) -> IPatternMatcher:
-        return RegexPatternMatcher()
+        # Literal patterns take the fast path, everything else goes to the regex engine
+        return LiteralPatternMatcher(
+            fallback=RegexPatternMatcher(multiline=self._config.multiline)
+        )
+
+    def create_tree_pattern_matcher(self) -> ITreePatternMatcher | None:
+        # Only queries are matched against syntax trees
+        if not self._config.query:
+            return None
+        return TreeSitterQueryMatcher()
 
     def create_span_highlighter(self) -> ISpanHighlighter:
         return SpanHighlighter(self._config)
 
     def create_code_formatter(self) -> AnsiCodeFormatter:
         return AnsiCodeFormatter(self._config)
+
+    def create_record_formatter(self) -> JsonRecordFormatter:
+        return JsonRecordFormatter()
+
+    def create_analysis_cache(self) -> SyntaxAnalysisCache | None:
+        if self._config.cache_dir is None:
+            return None
+        return SyntaxAnalysisCache(
+            cache_dir=self._config.cache_dir,
+            max_bytes=self._config.cache_max_mb * 1024 * 1024,
+            rebuild=self._config.rebuild_cache,
+        )
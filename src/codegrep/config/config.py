@@ -1,8 +1,8 @@
 class Config:
     def __init__(
         self,
-        filename: str,
-        code: str,
+        filename: str = "",  # per-file, unused by SearchSession options
+        code: str = "",
         colors: bool = False,
         color: str = "red",
         verbose: bool = False,
@@ -15,6 +15,17 @@ class Config:
         header_max: int = 5,  # max number of header lines to show
         show_top_scope: bool = True,
         loi_pad: int = 1,
+        multiline: bool = False,  # let matches span several lines
+        cache_dir: str | None = None,  # persistent analysis cache, off when None
+        rebuild_cache: bool = False,
+        cache_max_mb: int = 256,
+        on_demand_context: bool = False,  # find scopes from matched lines upward
+        max_file_mb: int | None = None,  # larger files are skipped, no limit when None
+        output_format: str = "text",  # or "json"/"ndjson": records, not text
+        query: bool = False,  # patterns are tree-sitter queries, not regexes
+        only: str | None = None,  # "code", "comments", "strings" or "identifiers"
+        max_count: int | None = None,  # matching lines per file, all when None
+        matches_only: bool = False,  # find matching lines, no context or output
     ) -> None:
         self.filename = filename
         self.code = code
@@ -37,3 +48,14 @@ class Config:
         self.show_top_scope = show_top_scope
         # line_of_interest_padding
         self.loi_pad = loi_pad
+        self.multiline = multiline
+        self.cache_dir = cache_dir
+        self.rebuild_cache = rebuild_cache
+        self.cache_max_mb = cache_max_mb
+        self.on_demand_context = on_demand_context
+        self.max_file_mb = max_file_mb
+        self.output_format = output_format
+        self.query = query
+        self.only = only
+        self.max_count = max_count
+        self.matches_only = matches_only
@@ -0,0 +1,23 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+
+@dataclass
+class FileSearchResult:
+    """Outcome of searching one file, produced as soon as the file is done."""
+
+    filename: str
+    # Zero-based numbers of the lines with a match, in order
+    matched_lines: List[int] = field(default_factory=list)
+    # Formatted output with context, one entry per output line
+    formatted_lines: List[str] = field(default_factory=list)
+    # JSON-ready record instead of formatted lines, for structured output formats
+    record: Dict[str, Any] | None = None
+
+    @property
+    def has_matches(self) -> bool:
+        return bool(self.matched_lines)
+
+    @property
+    def output(self) -> str:
+        return "\n".join(self.formatted_lines)
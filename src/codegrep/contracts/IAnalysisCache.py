@@ -0,0 +1,21 @@
+from abc import ABC, abstractmethod
+
+from codegrep.contracts.ScopeIntervals import ScopeIntervals
+
+
+class IAnalysisCache(ABC):
+    """Interface for caches of syntax analysis results, keyed by file and content."""
+
+    @abstractmethod
+    def make_key(
+        self, filename: str, code: str | bytes | memoryview, language: str
+    ) -> str:
+        """Return the key of the analysis of `code`, read from `filename`."""
+
+    @abstractmethod
+    def load(self, key: str) -> ScopeIntervals | None:
+        """Return the cached result for `key`, or None on a miss."""
+
+    @abstractmethod
+    def store(self, key: str, result: ScopeIntervals) -> None:
+        """Store an analysis result under `key`."""
@@ -1,11 +1,25 @@
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
 
-from tree_sitter import Tree
+if TYPE_CHECKING:
+    # tree_sitter is only imported once a file is parsed
+    from tree_sitter import Tree
 
 
 class ICodeParser(ABC):
     """Interface for parsing code into an abstract syntax tree (AST)."""
 
     @abstractmethod
-    def parse(self, code: str, language: str) -> Tree:
+    def parse(
+        self,
+        code: str | bytes | memoryview,
+        language: str,
+        old_tree: "Tree | None" = None,
+    ) -> "Tree":
+        """Parse code, reusing `old_tree` (already edited to match) if given."""
+        pass
+
+    @abstractmethod
+    def check_language(self, language: str) -> None:
+        """Raise ValueError if code in `language` can not be parsed."""
         pass
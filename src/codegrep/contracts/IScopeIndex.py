@@ -0,0 +1,28 @@
+from abc import ABC, abstractmethod
+from typing import Iterator
+
+
+class IScopeIndex(ABC):
+    """Interface for the scope queries HierarchicalContextExtractor makes on a file."""
+
+    # Number of lines of the analyzed code
+    line_count: int
+
+    @abstractmethod
+    def enclosing_scopes(self, line: int) -> Iterator[tuple[int, int]]:
+        """Yield (start line, end line) of every multi-line scope covering `line`."""
+
+    @abstractmethod
+    def scope_end(self, line: int) -> int | None:
+        """Return the end line of the multi-line scope starting on `line`, if any."""
+
+    @abstractmethod
+    def nested_scopes(self, line: int) -> Iterator[tuple[int, int]]:
+        """
+        Yield (start line, end line) of the multi-line scope starting on `line` and of
+        the outermost multi-line scope of every line inside it, in line order.
+        """
+
+    @abstractmethod
+    def node_lines(self, line: int) -> Iterator[int]:
+        """Yield the lines on which nodes of the scope starting on `line` start."""
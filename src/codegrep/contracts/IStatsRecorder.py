@@ -0,0 +1,21 @@
+from abc import ABC, abstractmethod
+
+
+class IStatsRecorder(ABC):
+    """
+    Hook receiving the timings and counters of a search as it runs, to report them
+    (`--stats`) or feed them to a metrics system.
+
+    Stages are "walk", "read", "match", "parse", "filter" (`--only`), "analyze",
+    "extract" and "format"; counters include "bytes_read", "lines_scanned",
+    "nodes_visited", "files_skipped", "cache_hits" and "cache_misses". Nothing is
+    recorded when a search has no recorder.
+    """
+
+    @abstractmethod
+    def add_time(self, stage: str, seconds: float) -> None:
+        """Record `seconds` of wall time spent in `stage`."""
+
+    @abstractmethod
+    def add_count(self, counter: str, amount: int = 1) -> None:
+        """Add `amount` to `counter`."""
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Any, List
+from typing import Any, List, Sequence
 
+from codegrep.contracts.ScopeIntervals import ScopeIntervals
 from codegrep.contracts.SyntaxAnalysisResult import SyntaxAnalysisResult
 
 
@@ -10,3 +11,7 @@ class ISyntaxTreeAnalyzer(ABC):
     @abstractmethod
     def analyze(self, root_node: Any, lines: List[str]) -> SyntaxAnalysisResult:
         pass
+
+    @abstractmethod
+    def analyze_intervals(self, root_node: Any, lines: Sequence[str]) -> ScopeIntervals:
+        pass
@@ -0,0 +1,88 @@
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Iterator
+
+from codegrep.contracts.IScopeIndex import IScopeIndex
+
+
+@dataclass
+class ScopeIntervals(IScopeIndex):
+    """
+    Compact scope data: the same information as SyntaxAnalysisResult, stored as flat
+    int arrays instead of per-line sets and live tree-sitter nodes.
+
+    - Every node of the tree, in pre-order, as (start line, end line, subtree size)
+    - One interval per line that starts a multi-line scope: from that line to the end
+      of the outermost node starting on it, with the index of its enclosing interval
+    """
+
+    line_count: int
+
+    # Pre-order line ranges of all nodes; a subtree size counts the node itself
+    node_start_lines: array
+    node_end_lines: array
+    subtree_sizes: array
+    # For each line (plus one past the last), the pre-order index of its first node
+    node_offsets: array
+
+    # Scope intervals sorted by start line, parents are indices (-1 for none)
+    scope_start_lines: array
+    scope_end_lines: array
+    scope_parents: array
+
+    def enclosing_scopes(self, line: int) -> Iterator[tuple[int, int]]:
+        index = bisect_left(self.scope_start_lines, line)
+        if self._starts_scope(index, line):
+            yield line, self.scope_end_lines[index]
+
+        # Scopes starting before the line are the last one and its ancestors: ends
+        # only grow going up, but a scope may end before the line it is asked about
+        index -= 1
+        while index >= 0:
+            end_line = self.scope_end_lines[index]
+            if end_line >= line:
+                yield self.scope_start_lines[index], end_line
+            index = self.scope_parents[index]
+
+    def scope_end(self, line: int) -> int | None:
+        index = bisect_left(self.scope_start_lines, line)
+        if self._starts_scope(index, line):
+            return self.scope_end_lines[index]
+        return None
+
+    def nested_scopes(self, line: int) -> Iterator[tuple[int, int]]:
+        first = bisect_left(self.scope_start_lines, line)
+        if not self._starts_scope(first, line):
+            return
+        # Scopes starting on the last line begin after this one ends
+        last = bisect_left(self.scope_start_lines, self.scope_end_lines[first])
+        for index in range(first, last):
+            yield self.scope_start_lines[index], self.scope_end_lines[index]
+
+    def node_lines(self, line: int) -> Iterator[int]:
+        nodes = self.nodes_starting_at(line)
+        end_line = self.scope_end(line)
+        if not nodes or end_line is None:
+            return
+        # The nodes start on one line, so their subtrees form a single index run
+        subtree_end = max(node + self.subtree_sizes[node] for node in nodes)
+        for node_line in range(line, min(end_line + 1, self.line_count)):
+            first_node = self.node_offsets[node_line]
+            if (
+                first_node < self.node_offsets[node_line + 1]
+                and first_node < subtree_end
+            ):
+                yield node_line
+
+    def nodes_starting_at(self, line: int) -> range:
+        """Pre-order indices of the nodes starting on `line` (a contiguous run)."""
+        if not 0 <= line < self.line_count:
+            return range(0)
+        return range(self.node_offsets[line], self.node_offsets[line + 1])
+
+    def _starts_scope(self, index: int, line: int) -> bool:
+        return (
+            index < len(self.scope_start_lines)
+            and self.scope_start_lines[index] == line
+        )
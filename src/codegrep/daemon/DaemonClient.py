@@ -0,0 +1,83 @@
+import socket
+from pathlib import Path
+from typing import Callable, Generator
+
+from codegrep.contracts.FileSearchResult import FileSearchResult
+from codegrep.daemon.protocol import (
+    INVALID_QUERY_ERROR,
+    DaemonError,
+    SearchRequest,
+    decode_message,
+    default_socket_path,
+    encode_message,
+    result_from_message,
+)
+from codegrep.pattern_matching.TreeSitterQueryMatcher import InvalidQueryError
+
+# Connecting to a live daemon is immediate; a stuck one is not waited for long
+_CONNECT_TIMEOUT_SECONDS = 0.5
+
+
+class DaemonClient:
+    """
+    Forwards searches to a running `codegrep serve` daemon.
+
+    Each search uses its own connection, which the daemon closes once it has
+    answered.
+    """
+
+    def __init__(self, socket_path: str | Path | None = None) -> None:
+        self._socket_path = Path(socket_path or default_socket_path())
+        # Number of files the daemon searched for the last completed search
+        self.files_searched = 0
+
+    @classmethod
+    def connect(cls, socket_path: str | Path | None = None) -> "DaemonClient | None":
+        """Return a client if a daemon is listening on the socket, None otherwise."""
+        client = cls(socket_path)
+        try:
+            client._open().close()
+        except OSError:
+            return None
+        return client
+
+    def search(
+        self,
+        request: SearchRequest,
+        report: Callable[[str], None],
+    ) -> Generator[FileSearchResult, None, None]:
+        """
+        Yield the results of the files with matches as the daemon sends them, and
+        pass its diagnostics to `report`. Raises InvalidQueryError for a query that
+        can not match, as a local search does, and DaemonError if the search fails.
+        """
+        with self._open() as connection:
+            # Searches take as long as they take once the daemon has the request
+            connection.settimeout(None)
+            connection.sendall(encode_message(request.to_message()))
+            with connection.makefile("rb") as responses:
+                for line in responses:
+                    message = decode_message(line)
+                    if "result" in message:
+                        yield result_from_message(message)
+                    elif "message" in message:
+                        report(message["message"])
+                    elif "done" in message:
+                        self.files_searched = message["done"]["files"]
+                        return
+                    elif "error" in message:
+                        if message.get("kind") == INVALID_QUERY_ERROR:
+                            raise InvalidQueryError(message["error"])
+                        raise DaemonError(message["error"])
+
+        raise DaemonError("The daemon closed the connection before answering")
+
+    def _open(self) -> socket.socket:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(_CONNECT_TIMEOUT_SECONDS)
+        try:
+            connection.connect(str(self._socket_path))
+        except OSError:
+            connection.close()
+            raise
+        return connection
@@ -0,0 +1,153 @@
+import os
+import socket
+import socketserver
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from codegrep.cli.FileSelector import FileSelector
+from codegrep.config.config import Config
+from codegrep.daemon.DaemonClient import DaemonClient
+from codegrep.daemon.protocol import (
+    INVALID_QUERY_ERROR,
+    DaemonError,
+    SearchRequest,
+    decode_message,
+    encode_message,
+    result_message,
+)
+from codegrep.pattern_matching.TreeSitterQueryMatcher import InvalidQueryError
+from codegrep.search_errors import describe_search_error
+from codegrep.serve_session import ServeSession
+
+_Send = Callable[[Dict[str, Any]], None]
+
+
+class SearchDaemon:
+    """
+    `codegrep serve`: answers search requests on a Unix socket from warm caches.
+
+    - Requests are served one at a time, in the working directory of the client
+      that sent them, so relative paths are resolved and reported as given
+    - Parsers, file contents and analysis results live as long as the daemon,
+      within a memory budget (see ServeSession)
+    - The socket is only accessible to the user running the daemon
+    """
+
+    def __init__(self, socket_path: str | Path, max_bytes: int) -> None:
+        self._socket_path = Path(socket_path)
+        self._session = ServeSession(max_bytes)
+        self._server: _UnixServer | None = None
+
+    @property
+    def socket_path(self) -> Path:
+        return self._socket_path
+
+    def listen(self) -> None:
+        """Create the socket, raising DaemonError if another daemon is using it."""
+        if DaemonClient.connect(self._socket_path) is not None:
+            raise DaemonError(f"A daemon is already listening on {self._socket_path}")
+
+        self._socket_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # Left over by a daemon that did not shut down cleanly
+        self._socket_path.unlink(missing_ok=True)
+
+        # Created without access for others, changing its mode afterwards would leave
+        # a window for them to connect
+        umask = os.umask(0o077)
+        try:
+            self._server = _UnixServer(str(self._socket_path), _RequestHandler, self)
+        finally:
+            os.umask(umask)
+
+    def serve_forever(self) -> None:
+        """Answer requests until interrupted, then remove the socket."""
+        if self._server is None:
+            self.listen()
+        assert self._server is not None
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            self._server = None
+            self._socket_path.unlink(missing_ok=True)
+
+    def handle(self, message: Dict[str, Any], send: _Send) -> None:
+        """Run the request in `message`, sending the answer one message at a time."""
+        try:
+            request = SearchRequest.from_message(message)
+            os.chdir(request.cwd)
+        except (DaemonError, KeyError, TypeError) as e:
+            send({"error": f"Invalid request: {e}"})
+            return
+        except OSError as e:
+            send({"error": f"Could not enter {message.get('cwd')}: {e}"})
+            return
+
+        options = Config(**request.options)
+        number_of_files = 0
+
+        def report_error(filename: str, error: Exception) -> None:
+            nonlocal number_of_files
+            number_of_files += 1
+            error_message = describe_search_error(filename, error, options.verbose)
+            if error_message is not None:
+                send({"message": error_message})
+
+        try:
+            files = FileSelector(request.use_index).select(
+                request.paths, request.search_pattern, request.ignore_case
+            )
+            for result in self._session.search_files(
+                files,
+                request.search_pattern,
+                options,
+                request.ignore_case,
+                on_error=report_error,
+            ):
+                number_of_files += 1
+                if result.has_matches:
+                    send(result_message(result))
+        except (BrokenPipeError, ConnectionResetError):
+            raise
+        except InvalidQueryError as e:
+            send({"error": str(e), "kind": INVALID_QUERY_ERROR})
+            return
+        except Exception as e:
+            send({"error": f"Search failed: {e}"})
+            return
+
+        send({"done": {"files": number_of_files}})
+
+
+class _UnixServer(socketserver.UnixStreamServer):
+    def __init__(
+        self,
+        address: str,
+        handler: type[socketserver.BaseRequestHandler],
+        daemon: SearchDaemon,
+    ) -> None:
+        self.daemon = daemon
+        super().__init__(address, handler)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: _UnixServer
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return
+
+        def send(message: Dict[str, Any]) -> None:
+            self.wfile.write(encode_message(message))
+
+        try:
+            try:
+                message = decode_message(line)
+            except ValueError as e:
+                send({"error": f"Invalid request: {e}"})
+                return
+            self.server.daemon.handle(message, send)
+        except (BrokenPipeError, ConnectionResetError, socket.timeout):
+            # The client went away, there is nobody left to answer
+            return
@@ -0,0 +1,121 @@
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List
+
+from codegrep.caching.SyntaxAnalysisCache import default_cache_dir
+from codegrep.contracts.FileSearchResult import FileSearchResult
+
+# A client sends one request line, the daemon answers with one message per line:
+# `result` for each file with matches, `message` for diagnostics meant for stderr,
+# and last either `done` (with the number of files searched) or `error`. Errors
+# the client reports like a local search would carry their `kind`
+PROTOCOL_VERSION = 2
+
+# `kind` of the error sent for a query that can not match in any file
+INVALID_QUERY_ERROR = "invalid_query"
+
+# Search options a request may set, as `Config` arguments. Verbose searches are
+# not forwarded: their debug output would end up in the daemon's terminal
+REQUEST_OPTIONS = (
+    "colors",
+    "color",
+    "line_numbers",
+    "multiline",
+    "max_file_mb",
+    "output_format",
+    "query",
+    "only",
+    "max_count",
+    "matches_only",
+    "on_demand_context",
+)
+
+
+class DaemonError(RuntimeError):
+    """Raised when the daemon rejects a request or the connection breaks."""
+
+
+def default_socket_path() -> Path:
+    """
+    Return `$CODEGREP_SOCKET`, or `codegrep.sock` in `$XDG_RUNTIME_DIR` (or in the
+    cache directory when it is not set).
+    """
+    path = os.environ.get("CODEGREP_SOCKET")
+    if path:
+        return Path(path)
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "codegrep.sock"
+    return default_cache_dir() / "codegrep.sock"
+
+
+@dataclass
+class SearchRequest:
+    """A search run by the daemon on behalf of a client."""
+
+    # One pattern, or a list of patterns matched together
+    search_pattern: str | List[str]
+    paths: List[str]
+    # Relative paths are resolved against it, and reported as given
+    cwd: str
+    ignore_case: bool = False
+    use_index: bool = True
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    def to_message(self) -> Dict[str, Any]:
+        return {"version": PROTOCOL_VERSION, **asdict(self)}
+
+    @classmethod
+    def from_message(cls, message: Dict[str, Any]) -> "SearchRequest":
+        if message.get("version") != PROTOCOL_VERSION:
+            raise DaemonError(
+                f"Unsupported protocol version {message.get('version')!r}, "
+                f"the daemon speaks version {PROTOCOL_VERSION}"
+            )
+        options = message.get("options", {})
+        unknown = set(options) - set(REQUEST_OPTIONS)
+        if unknown:
+            raise DaemonError(f"Unknown search options: {sorted(unknown)}")
+        search_pattern = message["search_pattern"]
+        if not isinstance(search_pattern, str) and not (
+            isinstance(search_pattern, list)
+            and search_pattern
+            and all(isinstance(pattern, str) for pattern in search_pattern)
+        ):
+            raise DaemonError("The search pattern must be a string or list of strings")
+        return cls(
+            search_pattern=search_pattern,
+            paths=list(message["paths"]),
+            cwd=message["cwd"],
+            ignore_case=bool(message.get("ignore_case", False)),
+            use_index=bool(message.get("use_index", True)),
+            options=options,
+        )
+
+
+def encode_message(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode("utf8") + b"\n"
+
+
+def decode_message(line: bytes) -> Dict[str, Any]:
+    message = json.loads(line)
+    if not isinstance(message, dict):
+        raise ValueError("A message must be a JSON object")
+    return message
+
+
+def result_message(result: FileSearchResult) -> Dict[str, Any]:
+    return {
+        "result": {
+            "filename": result.filename,
+            "matched_lines": result.matched_lines,
+            "formatted_lines": result.formatted_lines,
+            "record": result.record,
+        }
+    }
+
+
+def result_from_message(message: Dict[str, Any]) -> FileSearchResult:
+    return FileSearchResult(**message["result"])
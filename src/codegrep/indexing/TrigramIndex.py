@@ -0,0 +1,317 @@
+import json
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from itertools import accumulate
+from operator import sub
+from pathlib import Path
+from typing import BinaryIO, Iterable
+
+from codegrep.indexing.TrigramQuery import (
+    build_trigram_query,
+    fold_text,
+    trigrams_of,
+)
+
+INDEX_DIR_NAME = ".codegrep"
+INDEX_FILE_NAME = "trigrams.idx"
+
+_MAGIC = b"CGTI1"
+_HEADER = struct.Struct("<5sQ")  # magic, length of compressed metadata
+
+# Rebuild from scratch once this share of file ids belongs to changed/removed files
+_MAX_STALE_RATIO = 0.25
+
+
+class TrigramIndex:
+    """
+    Local trigram index of the files under a directory.
+
+    - Stored in `<root>/.codegrep/trigrams.idx`: metadata (files with their mtime and
+      size, posting list locations) followed by one compressed posting list per trigram
+    - Posting lists are read on demand, so a query touches only the trigrams it needs
+    - Updates are incremental: changed files get a new id and their old id is retired,
+      only new or modified files are read
+    """
+
+    def __init__(self, root: str | Path) -> None:
+        self._root = Path(root)
+        self._index_path = self._root / INDEX_DIR_NAME / INDEX_FILE_NAME
+        # Relative path -> (file id, mtime_ns, size) for every live file
+        self._files: dict[str, tuple[int, int, int]] = {}
+        # Relative path of every file id ever assigned, None once retired
+        self._paths_by_id: list[str | None] = []
+        # Trigram -> (offset, length) of its compressed posting list
+        self._postings: dict[str, tuple[int, int]] = {}
+        self._data_offset = 0
+
+    @classmethod
+    def index_path_for(cls, root: str | Path) -> Path:
+        return Path(root) / INDEX_DIR_NAME / INDEX_FILE_NAME
+
+    @classmethod
+    def load(cls, root: str | Path) -> "TrigramIndex | None":
+        """Load the index stored under `root`, or return None if there is none."""
+        index = cls(root)
+        try:
+            with index._index_path.open("rb") as f:
+                magic, metadata_length = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC:
+                    return None
+                metadata = json.loads(zlib.decompress(f.read(metadata_length)))
+        except (OSError, ValueError, struct.error, zlib.error):
+            return None
+
+        index._paths_by_id = metadata["paths_by_id"]
+        index._files = {
+            path: (file_id, mtime_ns, size)
+            for path, file_id, mtime_ns, size in metadata["files"]
+        }
+        index._postings = {
+            trigram: (offset, length)
+            for trigram, offset, length in metadata["postings"]
+        }
+        index._data_offset = _HEADER.size + metadata_length
+        return index
+
+    @classmethod
+    def load_enclosing(cls, directory: str | Path) -> "TrigramIndex | None":
+        """
+        Load the index of `directory`, or else of the nearest directory above it with
+        an index, or return None if there is none.
+        """
+        for root in (Path(directory), *Path(os.path.abspath(directory)).parents):
+            index = cls.load(root)
+            if index is not None:
+                return index
+        return None
+
+    @property
+    def file_count(self) -> int:
+        return len(self._files)
+
+    def is_current(self, path: Path) -> bool:
+        """Tell whether `path` is indexed with its current modification time and size."""
+        entry = self._files.get(os.path.relpath(path, self._root))
+        if entry is None:
+            return False
+        try:
+            stat = path.stat()
+        except OSError:
+            return False
+        return entry[1:] == (stat.st_mtime_ns, stat.st_size)
+
+    def candidates(
+        self,
+        pattern: str,
+        ignore_case: bool,
+        directory: str | Path | None = None,
+    ) -> list[Path] | None:
+        """
+        Return the indexed files that may match `pattern`, in path order, or None if
+        the pattern can not be reduced to trigrams and every file must be searched.
+
+        With `directory`, only files below it are returned, as paths joined to it.
+        """
+        query = build_trigram_query(pattern, ignore_case)
+        if query is None:
+            return None
+
+        matching_ids: set[int] = set()
+        with self._open_data() as data:
+            for clause in query:
+                clause_ids: set[int] | None = None
+                # Intersect the rarest lists first to keep the working set small
+                for trigram in sorted(clause, key=self._posting_length):
+                    posting = set(self._read_posting(data, trigram))
+                    clause_ids = posting if clause_ids is None else clause_ids & posting
+                    if not clause_ids:
+                        break
+                matching_ids |= clause_ids or set()
+
+        paths = (self._paths_by_id[file_id] for file_id in matching_ids)
+        if directory is None:
+            return sorted(self._root / path for path in paths if path is not None)
+
+        subtree = os.path.relpath(
+            os.path.abspath(directory), os.path.abspath(self._root)
+        )
+        # Relative paths of files below `directory` start with this prefix
+        prefix = "" if subtree == os.curdir else os.path.join(subtree, "")
+        return sorted(
+            Path(directory) / path[len(prefix) :]
+            for path in paths
+            if path is not None and path.startswith(prefix)
+        )
+
+    def update(self, files: Iterable[Path]) -> tuple[int, int]:
+        """
+        Bring the index up to date with `files` and write it to disk.
+
+        Returns the number of (re)indexed files and the number of removed files.
+        """
+        current: dict[str, tuple[Path, int, int]] = {}
+        for path in files:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            relative = os.path.relpath(path, self._root)
+            current[relative] = (path, stat.st_mtime_ns, stat.st_size)
+
+        stale = {
+            relative
+            for relative, (_, mtime_ns, size) in self._files.items()
+            if current.get(relative, (None, -1, -1))[1:] != (mtime_ns, size)
+        }
+        removed = sum(relative not in current for relative in stale)
+
+        retired = sum(path is None for path in self._paths_by_id) + len(stale)
+        if retired > _MAX_STALE_RATIO * max(len(self._paths_by_id), 1):
+            # Too many dead ids: start over instead of carrying them forward
+            self._reset()
+        else:
+            for relative in stale:
+                file_id = self._files.pop(relative)[0]
+                self._paths_by_id[file_id] = None
+
+        new = [relative for relative in current if relative not in self._files]
+
+        additions: dict[str, array] = {}
+        indexed = 0
+        for relative in sorted(new):
+            path, mtime_ns, size = current[relative]
+            text = _read_text(path)
+            if text is None:
+                # Not recorded, so searches still read it
+                continue
+            indexed += 1
+            file_id = len(self._paths_by_id)
+            self._paths_by_id.append(relative)
+            self._files[relative] = (file_id, mtime_ns, size)
+            for trigram in trigrams_of(fold_text(text)):
+                additions.setdefault(trigram, array("I")).append(file_id)
+
+        self._write(additions)
+        return indexed, removed
+
+    def _reset(self) -> None:
+        self._files = {}
+        self._paths_by_id = []
+        self._postings = {}
+
+    def _posting_length(self, trigram: str) -> int:
+        return self._postings.get(trigram, (0, 0))[1]
+
+    def _open_data(self) -> "_IndexData":
+        return _IndexData(self._index_path, self._data_offset)
+
+    def _read_posting(self, data: "_IndexData", trigram: str) -> array:
+        location = self._postings.get(trigram)
+        if location is None:
+            return array("I")
+        offset, length = location
+        return _decode_posting(data.read(offset, length))
+
+    def _write(self, additions: dict[str, array]) -> None:
+        blobs: list[bytes] = []
+        postings: list[tuple[str, int, int]] = []
+        offset = 0
+
+        with self._open_data() as data:
+            for trigram in sorted(self._postings.keys() | additions.keys()):
+                location = self._postings.get(trigram)
+                added = additions.get(trigram)
+                if added is None and location is not None:
+                    # Untouched list: copy the compressed bytes as they are
+                    blob = data.read(*location)
+                else:
+                    posting = self._read_posting(data, trigram)
+                    posting.extend(added or array("I"))
+                    blob = _encode_posting(posting)
+                blobs.append(blob)
+                postings.append((trigram, offset, len(blob)))
+                offset += len(blob)
+
+        metadata = zlib.compress(
+            json.dumps(
+                {
+                    "paths_by_id": self._paths_by_id,
+                    "files": [
+                        [relative, file_id, mtime_ns, size]
+                        for relative, (file_id, mtime_ns, size) in self._files.items()
+                    ],
+                    "postings": postings,
+                },
+                separators=(",", ":"),
+            ).encode("utf8")
+        )
+
+        self._index_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self._index_path.with_suffix(f".{os.getpid()}.tmp")
+        with temp_path.open("wb") as f:
+            f.write(_HEADER.pack(_MAGIC, len(metadata)))
+            f.write(metadata)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(temp_path, self._index_path)
+
+        self._postings = {trigram: (o, n) for trigram, o, n in postings}
+        self._data_offset = _HEADER.size + len(metadata)
+
+
+class _IndexData:
+    """Memory-mapped view of the posting list section of an index file."""
+
+    def __init__(self, index_path: Path, data_offset: int) -> None:
+        self._index_path = index_path
+        self._data_offset = data_offset
+        self._file: BinaryIO | None = None
+        self._mmap: mmap.mmap | None = None
+
+    def __enter__(self) -> "_IndexData":
+        try:
+            self._file = self._index_path.open("rb")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # No index on disk yet (or an empty file): nothing to read
+            self._mmap = None
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+        if self._file is not None:
+            self._file.close()
+
+    def read(self, offset: int, length: int) -> bytes:
+        if self._mmap is None:
+            return b""
+        start = self._data_offset + offset
+        return self._mmap[start : start + length]
+
+
+def _encode_posting(posting: array) -> bytes:
+    """Delta-encode sorted file ids and compress them."""
+    deltas = array("I", posting[:1])
+    deltas.extend(map(sub, posting[1:], posting))
+    return zlib.compress(deltas.tobytes())
+
+
+def _decode_posting(blob: bytes) -> array:
+    if not blob:
+        return array("I")
+    deltas = array("I")
+    deltas.frombytes(zlib.decompress(blob))
+    return array("I", accumulate(deltas))
+
+
+def _read_text(path: Path) -> str | None:
+    # Decoded like searched lines, so the trigrams of any non UTF-8 file still
+    # include those of every pattern that can match it
+    try:
+        return path.read_bytes().decode("utf8", errors="replace")
+    except OSError:
+        return None
@@ -0,0 +1,115 @@
+import re
+from itertools import product
+
+# re's own pattern parser; it is private, so any failure falls back to a full scan
+from re import _constants as sre_constants  # type: ignore[attr-defined]
+from re import _parser as sre_parser  # type: ignore[attr-defined]
+from typing import Any, FrozenSet, Set
+
+# Disjunction of conjunctions: a file is a candidate if it contains every trigram
+# of at least one clause. None means the pattern can not be narrowed down.
+TrigramQuery = Set[FrozenSet[str]] | None
+
+# Characters that re.IGNORECASE equates with an ASCII letter but str.lower() does not
+_FOLD_TABLE = str.maketrans({"İ": "i", "ı": "i", "ſ": "s"})
+_MAX_CLAUSES = 64
+
+_REPEAT_OPS = (
+    sre_constants.MAX_REPEAT,
+    sre_constants.MIN_REPEAT,
+    sre_constants.POSSESSIVE_REPEAT,
+)
+
+
+def fold_text(text: str) -> str:
+    """Normalize text so that any case-insensitive match is also a folded substring."""
+    return text.translate(_FOLD_TABLE).lower().replace("ς", "σ")
+
+
+def trigrams_of(folded_text: str) -> Set[str]:
+    """Return the distinct trigrams of already folded text."""
+    return {
+        "".join(trigram)
+        for trigram in set(zip(folded_text, folded_text[1:], folded_text[2:]))
+    }
+
+
+def build_trigram_query(pattern: str, ignore_case: bool) -> TrigramQuery:
+    """
+    Reduce a regex to the trigrams any matching file must contain.
+
+    Literal runs contribute their trigrams, alternations become alternative clauses
+    and anything else (classes, optional parts, ...) simply adds no constraint.
+    """
+    flags = re.IGNORECASE if ignore_case else 0
+    try:
+        parsed = sre_parser.parse(pattern, flags)
+    except Exception:
+        return None
+
+    return _sequence_query(parsed, bool(parsed.state.flags & re.IGNORECASE))
+
+
+def _sequence_query(items: Any, ignore_case: bool) -> TrigramQuery:
+    query: TrigramQuery = None
+    run: list[str] = []
+
+    for op, argument in items:
+        if op is sre_constants.LITERAL:
+            run.append(chr(argument))
+            continue
+
+        query = _and(query, _literal_query("".join(run), ignore_case))
+        run = []
+
+        if op is sre_constants.SUBPATTERN:
+            _, add_flags, _, subpattern = argument
+            sub_ignore_case = ignore_case or bool(add_flags & re.IGNORECASE)
+            query = _and(query, _sequence_query(subpattern, sub_ignore_case))
+        elif op is sre_constants.ATOMIC_GROUP:
+            query = _and(query, _sequence_query(argument, ignore_case))
+        elif op in _REPEAT_OPS:
+            minimum, _, subpattern = argument
+            if minimum > 0:
+                query = _and(query, _sequence_query(subpattern, ignore_case))
+        elif op is sre_constants.BRANCH:
+            _, alternatives = argument
+            query = _and(
+                query,
+                _or([_sequence_query(branch, ignore_case) for branch in alternatives]),
+            )
+
+    return _and(query, _literal_query("".join(run), ignore_case))
+
+
+def _literal_query(literal: str, ignore_case: bool) -> TrigramQuery:
+    trigrams = trigrams_of(fold_text(literal))
+    if ignore_case:
+        # Case-insensitive non-ASCII matching is too irregular to rely on
+        trigrams = {trigram for trigram in trigrams if trigram.isascii()}
+    if not trigrams:
+        return None
+    return {frozenset(trigrams)}
+
+
+def _and(left: TrigramQuery, right: TrigramQuery) -> TrigramQuery:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    combined = {a | b for a, b in product(left, right)}
+    # Too many alternatives to be useful: keep the smaller side only
+    if len(combined) > _MAX_CLAUSES:
+        return left if len(left) <= len(right) else right
+    return combined
+
+
+def _or(queries: list[TrigramQuery]) -> TrigramQuery:
+    combined: Set[FrozenSet[str]] = set()
+    for query in queries:
+        if query is None:
+            return None
+        combined |= query
+    if len(combined) > _MAX_CLAUSES:
+        return None
+    return combined
@@ -0,0 +1,78 @@
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Sequence
+
+# Bytes split at a time by LazyLineOffsetIndex
+_SCAN_CHUNK = 64 * 1024
+
+
+class LineOffsetIndex:
+    """
+    Maps offsets in a newline-joined buffer (of text or bytes) back to line numbers.
+
+    Line start offsets are computed once; each lookup is a binary search.
+    """
+
+    def __init__(self, lines: Sequence[str] | Sequence[bytes]) -> None:
+        # One entry per line plus a sentinel one past the end of the buffer
+        self._line_starts: list[int] = list(
+            accumulate(map((1).__add__, map(len, lines)), initial=0)
+        )
+
+    def line_of(self, offset: int) -> int:
+        """Return the line containing the given buffer offset."""
+        return bisect_right(self._line_starts, offset) - 1
+
+    def line_start(self, line_number: int) -> int:
+        """Return the buffer offset of the first character of a line."""
+        return self._line_starts[line_number]
+
+    def line_length(self, line_number: int) -> int:
+        """Return the length of a line without its trailing newline."""
+        return self._line_starts[line_number + 1] - self._line_starts[line_number] - 1
+
+
+class LazyLineOffsetIndex(LineOffsetIndex):
+    """
+    LineOffsetIndex of a bytes buffer whose line starts are found as lookups reach
+    them, a chunk at a time: lookups near the start never split the whole buffer.
+    """
+
+    def __init__(self, buffer: bytes | memoryview) -> None:
+        self._buffer = buffer
+        self._line_starts = [0]
+        self._scanned = 0
+        self._complete = not buffer
+
+    def line_of(self, offset: int) -> int:
+        while not self._complete and self._line_starts[-1] <= offset:
+            self._scan_chunk()
+        return super().line_of(offset)
+
+    def line_start(self, line_number: int) -> int:
+        self._scan_to_line(line_number)
+        return super().line_start(line_number)
+
+    def line_length(self, line_number: int) -> int:
+        self._scan_to_line(line_number + 1)
+        return super().line_length(line_number)
+
+    def _scan_to_line(self, line_number: int) -> None:
+        while not self._complete and len(self._line_starts) <= line_number:
+            self._scan_chunk()
+
+    def _scan_chunk(self) -> None:
+        start = self._scanned
+        chunk = bytes(self._buffer[start : start + _SCAN_CHUNK])
+        # Every piece but the last ends with a newline, a line starts after each
+        newline_ends = accumulate(
+            map((1).__add__, map(len, chunk.split(b"\n")[:-1])), initial=start
+        )
+        next(newline_ends)
+        self._line_starts.extend(newline_ends)
+
+        self._scanned = start + len(chunk)
+        if self._scanned == len(self._buffer):
+            # Sentinel one past the end, as for a complete index
+            self._line_starts.append(len(self._buffer) + 1)
+            self._complete = True
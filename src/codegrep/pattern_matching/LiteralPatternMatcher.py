@@ -0,0 +1,335 @@
+import heapq
+import itertools
+from typing import AnyStr, Callable, Iterator, Sequence
+
+from codegrep.pattern_matching.contracts.IPatternMatcher import IPatternMatcher
+from codegrep.pattern_matching.contracts.models import (
+    LineMatch,
+    MatchSpan,
+    PatternMatchResult,
+)
+from codegrep.pattern_matching.LineOffsetIndex import LineOffsetIndex
+from codegrep.SourceBuffer import SourceBuffer
+
+_REGEX_SPECIAL_CHARACTERS = frozenset(".^$*+?{}[]()")
+
+# Anything with `find(sub, start)`: text, bytes or a source buffer
+_Searchable = str | bytes | SourceBuffer
+# A match: its start and end offsets, and the position of its pattern
+_Offsets = tuple[int, int, int]
+# Matches within one line of a source buffer, offsets relative to its start
+_FindInLine = Callable[[int], Iterator[_Offsets]]
+
+
+def extract_literals(pattern: str) -> list[str] | None:
+    """
+    Return the literals of a pattern that is a plain string or an alternation of
+    plain strings (e.g. `foo`, `foo|bar\\.baz`), or None for any other regex.
+    """
+    literals: list[str] = []
+    current: list[str] = []
+    escaped = False
+
+    for char in pattern:
+        if escaped:
+            # Escaped letters and digits are character classes or backreferences
+            if char.isalnum() or char.isspace():
+                return None
+            current.append(char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == "|":
+            literals.append("".join(current))
+            current = []
+        elif char in _REGEX_SPECIAL_CHARACTERS:
+            return None
+        else:
+            current.append(char)
+
+    if escaped:
+        return None
+    literals.append("".join(current))
+
+    if any(not literal or "\n" in literal for literal in literals):
+        return None
+    return literals
+
+
+class LiteralPatternMatcher(IPatternMatcher):
+    """
+    Fast path for patterns that are a literal or an alternation of literals.
+
+    - Literals are located with `find` over the whole buffer, not the regex engine;
+      source buffers are searched as raw bytes, UTF-8 literals match the same there
+    - Alternations are scanned once per literal and merged leftmost-first, exactly
+      like the equivalent regex alternation; several literal patterns are matched
+      the same way, as one alternation of all their literals
+    - Occurrences are found lazily; with a limit on matching lines, the last line
+      within it is searched on its own and nothing after it is scanned
+    - Any other pattern (or one with too many alternatives) goes to the fallback matcher
+    """
+
+    def __init__(self, fallback: IPatternMatcher, max_literals: int = 32) -> None:
+        self._fallback = fallback
+        self._max_literals = max_literals
+
+    def match(
+        self, pattern: str, lines: list[str], ignore_case: bool
+    ) -> PatternMatchResult:
+        """Match a literal pattern against a list of code lines.
+
+        Args:
+            pattern (str): The literal (or alternation of literals) to match.
+            lines (list[str]): The list of code lines to search.
+            ignore_case (bool): Whether to ignore case when matching.
+
+        Returns:
+            PatternMatchResult: The detailed pattern match result.
+        """
+        literals = extract_literals(pattern)
+        if literals is None or len(literals) > self._max_literals:
+            return self._fallback.match(pattern, lines, ignore_case)
+
+        buffer = "\n".join(lines)
+        if ignore_case:
+            # Only ASCII lowercasing is guaranteed to agree with re.IGNORECASE
+            if not (buffer.isascii() and all(lit.isascii() for lit in literals)):
+                return self._fallback.match(pattern, lines, ignore_case)
+            buffer = buffer.lower()
+            literals = [literal.lower() for literal in literals]
+
+        if len(literals) == 1:
+            offsets = self._find_literal(buffer, literals[0])
+        else:
+            offsets = self._find_any_literal(buffer, literals)
+
+        return PatternMatchResult(
+            pattern=pattern, matches=self._to_line_matches(offsets, lines)
+        )
+
+    def match_source(
+        self,
+        pattern: str,
+        source: SourceBuffer,
+        ignore_case: bool,
+        max_lines: int | None = None,
+    ) -> PatternMatchResult:
+        literals = extract_literals(pattern)
+        if not self._can_find(literals):
+            return self._fallback.match_source(pattern, source, ignore_case, max_lines)
+        assert literals is not None
+
+        found = self._find_in_source(source, literals, None, ignore_case)
+        if found is None:
+            return super().match_source(pattern, source, ignore_case, max_lines)
+        return PatternMatchResult(
+            pattern=pattern,
+            matches=self._to_source_line_matches(*found, source, max_lines),
+        )
+
+    def match_patterns(
+        self,
+        patterns: Sequence[str],
+        source: SourceBuffer,
+        ignore_case: bool,
+        max_lines: int | None = None,
+    ) -> PatternMatchResult:
+        literals: list[str] = []
+        owners: list[int] = []
+        for index, pattern in enumerate(patterns):
+            pattern_literals = extract_literals(pattern)
+            if pattern_literals is None:
+                # Matched with the regex engine, in one scan as well
+                return self._fallback.match_patterns(
+                    patterns, source, ignore_case, max_lines
+                )
+            literals.extend(pattern_literals)
+            owners.extend([index] * len(pattern_literals))
+        if not self._can_find(literals):
+            return self._fallback.match_patterns(
+                patterns, source, ignore_case, max_lines
+            )
+
+        found = self._find_in_source(source, literals, owners, ignore_case)
+        if found is None:
+            return self._fallback.match_patterns(
+                patterns, source, ignore_case, max_lines
+            )
+        return PatternMatchResult(
+            pattern="|".join(patterns),
+            matches=self._to_source_line_matches(*found, source, max_lines),
+        )
+
+    def _can_find(self, literals: list[str] | None) -> bool:
+        return (
+            literals is not None
+            and len(literals) <= self._max_literals
+            # Carriage returns are not part of the displayed lines
+            and not any("\r" in literal for literal in literals)
+        )
+
+    def _find_in_source(
+        self,
+        source: SourceBuffer,
+        literals: list[str],
+        owners: list[int] | None,
+        ignore_case: bool,
+    ) -> tuple[Iterator[_Offsets], _FindInLine] | None:
+        """
+        Find the literals in the raw bytes of a source buffer, along with a function
+        finding them in one of its lines, or return None if they can not be searched
+        there without decoding.
+        """
+        encoded_literals = [literal.encode("utf8") for literal in literals]
+        buffer: SourceBuffer | bytes = source
+        if ignore_case:
+            if not (source.is_plain_ascii and all(lit.isascii() for lit in literals)):
+                return None
+            buffer = bytes(source.view).lower()
+            encoded_literals = [literal.lower() for literal in encoded_literals]
+
+        def find(searched: _Searchable) -> Iterator[_Offsets]:
+            if len(encoded_literals) == 1:
+                return self._find_literal(searched, encoded_literals[0])
+            return self._find_any_literal(searched, encoded_literals, owners)
+
+        def find_in_line(line_number: int) -> Iterator[_Offsets]:
+            line = source.raw_line(line_number)
+            return find(line.lower() if ignore_case else line)
+
+        return find(buffer), find_in_line
+
+    def _find_literal(self, buffer: _Searchable, literal: AnyStr) -> Iterator[_Offsets]:
+        position = buffer.find(literal)
+        while position != -1:
+            end = position + len(literal)
+            yield position, end, 0
+            position = buffer.find(literal, end)
+
+    def _find_any_literal(
+        self,
+        buffer: _Searchable,
+        literals: list[AnyStr],
+        owners: list[int] | None = None,
+    ) -> Iterator[_Offsets]:
+        """
+        Non-overlapping leftmost matches of any literal; on a tie the literal listed
+        first wins, as in a regex alternation. Each match is tagged with the owner of
+        its literal (its pattern), 0 without owners.
+        """
+        # Next occurrence of every literal, ordered by (position, alternative index)
+        candidates = [
+            (position, index)
+            for index, literal in enumerate(literals)
+            if (position := buffer.find(literal)) != -1
+        ]
+        heapq.heapify(candidates)
+        cursor = 0
+
+        while candidates:
+            position, index = candidates[0]
+            literal = literals[index]
+            if position < cursor:
+                # Overlaps the previous match: look for the next occurrence instead
+                position = buffer.find(literal, cursor)
+                if position == -1:
+                    heapq.heappop(candidates)
+                else:
+                    heapq.heapreplace(candidates, (position, index))
+                continue
+
+            cursor = position + len(literal)
+            yield position, cursor, owners[index] if owners else 0
+            position = buffer.find(literal, cursor)
+            if position == -1:
+                heapq.heappop(candidates)
+            else:
+                heapq.heapreplace(candidates, (position, index))
+
+    def _to_line_matches(
+        self, offsets: Iterator[_Offsets], lines: list[str]
+    ) -> list[LineMatch]:
+        first = next(offsets, None)
+        if first is None:
+            return []
+
+        return self._group_by_line(
+            itertools.chain([first], offsets), LineOffsetIndex(lines)
+        )
+
+    def _to_source_line_matches(
+        self,
+        offsets: Iterator[_Offsets],
+        find_in_line: _FindInLine,
+        source: SourceBuffer,
+        max_lines: int | None,
+    ) -> list[LineMatch]:
+        # The line index is only built for files with matches
+        first = next(offsets, None)
+        if first is None:
+            return []
+        line_matches = self._group_by_line(
+            itertools.chain([first], offsets),
+            source.line_index if max_lines is None else source.lazy_line_index,
+            max_lines,
+            find_in_line,
+        )
+
+        # Byte columns become character columns, for non-ASCII lines only
+        return [
+            LineMatch(
+                line_number=line_match.line_number,
+                spans=[
+                    MatchSpan(
+                        start=source.byte_to_char_offset(
+                            line_match.line_number, span.start
+                        ),
+                        end=source.byte_to_char_offset(
+                            line_match.line_number, span.end
+                        ),
+                        pattern_index=span.pattern_index,
+                    )
+                    for span in line_match.spans
+                ],
+            )
+            for line_match in line_matches
+        ]
+
+    def _group_by_line(
+        self,
+        offsets: Iterator[_Offsets],
+        line_index: LineOffsetIndex,
+        max_lines: int | None = None,
+        find_in_line: _FindInLine | None = None,
+    ) -> list[LineMatch]:
+        """Group matches by line; `find_in_line` is required with `max_lines`."""
+        spans_by_line: dict[int, list[MatchSpan]] = {}
+        for start, end, pattern_index in offsets:
+            line_number = line_index.line_of(start)
+            if (
+                max_lines is not None
+                and line_number not in spans_by_line
+                and len(spans_by_line) == max_lines - 1
+            ):
+                # Offsets come in order: the last line within the limit is searched
+                # on its own, without scanning for occurrences past it
+                assert find_in_line is not None
+                spans_by_line[line_number] = [
+                    MatchSpan(start=line_start, end=line_end, pattern_index=index)
+                    for line_start, line_end, index in find_in_line(line_number)
+                ]
+                break
+            line_start = line_index.line_start(line_number)
+            spans_by_line.setdefault(line_number, []).append(
+                MatchSpan(
+                    start=start - line_start,
+                    end=end - line_start,
+                    pattern_index=pattern_index,
+                )
+            )
+
+        return [
+            LineMatch(line_number=line_number, spans=spans)
+            for line_number, spans in spans_by_line.items()
+        ]
@@ -1,4 +1,5 @@
 import re
+from typing import AnyStr, Callable, Sequence
 
 from codegrep.pattern_matching.contracts.IPatternMatcher import IPatternMatcher
 from codegrep.pattern_matching.contracts.models import (
@@ -6,9 +7,67 @@ from codegrep.pattern_matching.contracts.models import (
     MatchSpan,
     PatternMatchResult,
 )
+from codegrep.pattern_matching.LineOffsetIndex import LineOffsetIndex
+from codegrep.SourceBuffer import SourceBuffer
+
+# Constructs whose meaning depends on where the searched string ends, so they
+# behave differently on a whole buffer than on a single line
+_LINE_BOUNDARY_SENSITIVE_TOKENS = ("(?=", "(?!", "(?<", "\\A", "\\B", "\\Z")
+# References to groups by number or name, which wrapping patterns in groups breaks
+_GROUP_REFERENCE = re.compile(r"\\\d|\(\?P=|\(\?\(")
+
+# Capturing group of each pattern in an alternation of patterns -> pattern position
+_GroupPatterns = dict[int, int]
+
+
+def combine_patterns(patterns: Sequence[str]) -> tuple[str, _GroupPatterns] | None:
+    """
+    Join patterns into one alternation, each in a capturing group that tells which
+    pattern matched. Returns None if a pattern does not compile, refers to its own
+    groups, or can not be part of a larger pattern (global flags, named groups
+    used by another pattern).
+    """
+    wrapped: list[str] = []
+    group_patterns: _GroupPatterns = {}
+    group = 1
+    for index, pattern in enumerate(patterns):
+        try:
+            groups = re.compile(pattern).groups
+        except re.error:
+            return None
+        if groups and _GROUP_REFERENCE.search(pattern):
+            return None
+        wrapped.append(f"({pattern})")
+        group_patterns[group] = index
+        group += groups + 1
+
+    combined = "|".join(wrapped)
+    try:
+        re.compile(combined)
+    except re.error:
+        return None
+    return combined, group_patterns
 
 
 class RegexPatternMatcher(IPatternMatcher):
+    """
+    Matches a regex against the whole code buffer in a single scan.
+
+    - Lines are joined once and searched with one `finditer` over a precompiled pattern
+    - Plain ASCII source buffers are searched as raw bytes with the pattern encoded,
+      which matches the same as on text there
+    - Match offsets are mapped back to line/column through a line-offset index
+    - In multiline mode a match may span several lines and is reported on each of them;
+      otherwise results are the same as matching every line on its own
+    - Several patterns are matched in the same scan, as one alternation of groups;
+      the outermost group of a match tells which pattern it belongs to
+    - With a limit on matching lines, the last line within it is matched on its own
+      and nothing after it is scanned (in multiline mode, the scan stops at the
+      first match past it)
+    """
+
+    def __init__(self, multiline: bool = False) -> None:
+        self._multiline = multiline
 
     def match(
         self, pattern: str, lines: list[str], ignore_case: bool
@@ -23,19 +82,251 @@ class RegexPatternMatcher(IPatternMatcher):
         Returns:
             PatternMatchResult: The detailed pattern match result.
         """
+        return self._match_lines(pattern, lines, ignore_case, None, None)
+
+    def match_source(
+        self,
+        pattern: str,
+        source: SourceBuffer,
+        ignore_case: bool,
+        max_lines: int | None = None,
+    ) -> PatternMatchResult:
+        return self._match_source(pattern, source, ignore_case, None, max_lines)
+
+    def match_patterns(
+        self,
+        patterns: Sequence[str],
+        source: SourceBuffer,
+        ignore_case: bool,
+        max_lines: int | None = None,
+    ) -> PatternMatchResult:
+        combined = combine_patterns(patterns)
+        if combined is None:
+            return super().match_patterns(patterns, source, ignore_case, max_lines)
+        pattern, group_patterns = combined
+        return self._match_source(
+            pattern, source, ignore_case, group_patterns, max_lines
+        )
+
+    def _match_lines(
+        self,
+        pattern: str,
+        lines: list[str],
+        ignore_case: bool,
+        group_patterns: _GroupPatterns | None,
+        max_lines: int | None,
+    ) -> PatternMatchResult:
         flags = re.IGNORECASE if ignore_case else 0
-        matches = self._find_matches(pattern, lines, flags)
+        if self._needs_per_line_matching(pattern):
+            matches = self._find_matches_per_line(
+                pattern, lines, flags, group_patterns, max_lines
+            )
+        elif not lines:
+            matches = []
+        else:
+            matches = self._find_matches(
+                re.compile(pattern, flags | re.MULTILINE),
+                "\n".join(lines),
+                lines.__getitem__,
+                lambda: LineOffsetIndex(lines),
+                group_patterns,
+                max_lines,
+            )
         return PatternMatchResult(pattern=pattern, matches=matches)
 
+    def _match_source(
+        self,
+        pattern: str,
+        source: SourceBuffer,
+        ignore_case: bool,
+        group_patterns: _GroupPatterns | None,
+        max_lines: int | None,
+    ) -> PatternMatchResult:
+        if (
+            self._needs_per_line_matching(pattern)
+            or not pattern.isascii()
+            or not source.is_plain_ascii
+        ):
+            return self._match_lines(
+                pattern, list(source), ignore_case, group_patterns, max_lines
+            )
+
+        flags = re.IGNORECASE if ignore_case else 0
+        try:
+            compiled = re.compile(pattern.encode("ascii"), flags | re.MULTILINE)
+        except re.error:
+            # Syntax only valid in text patterns, like `\u00e9`
+            return self._match_lines(
+                pattern, list(source), ignore_case, group_patterns, max_lines
+            )
+
+        matches: list[LineMatch] = []
+        if source.view:
+            matches = self._find_matches(
+                compiled,
+                source.view,
+                source.raw_line,
+                lambda: (
+                    source.line_index if max_lines is None else source.lazy_line_index
+                ),
+                group_patterns,
+                max_lines,
+            )
+        return PatternMatchResult(pattern=pattern, matches=matches)
+
+    def _needs_per_line_matching(self, pattern: str) -> bool:
+        return not self._multiline and any(
+            token in pattern for token in _LINE_BOUNDARY_SENSITIVE_TOKENS
+        )
+
     def _find_matches(
-        self, pattern: str, lines: list[str], flags: int
+        self,
+        compiled: re.Pattern[AnyStr],
+        buffer: AnyStr | memoryview,
+        line_at: Callable[[int], AnyStr],
+        make_line_index: Callable[[], LineOffsetIndex],
+        group_patterns: _GroupPatterns | None,
+        max_lines: int | None,
+    ) -> list[LineMatch]:
+        spans_by_line: dict[int, list[MatchSpan]] = {}
+        line_index: LineOffsetIndex | None = None
+
+        position = 0
+        while position <= len(buffer):
+            resume_at = None
+            for match in compiled.finditer(buffer, position):
+                if line_index is None:
+                    # Built on the first hit, files without matches never pay for it
+                    line_index = make_line_index()
+
+                start_line = line_index.line_of(match.start())
+                if (
+                    max_lines is not None
+                    and len(spans_by_line) >= max_lines
+                    and start_line not in spans_by_line
+                ):
+                    # Every later match is on a line past the limit
+                    break
+                end_line = line_index.line_of(match.end())
+
+                if self._multiline:
+                    self._add_match_spans(
+                        match,
+                        start_line,
+                        end_line,
+                        line_index,
+                        spans_by_line,
+                        _pattern_index(match, group_patterns),
+                    )
+                    continue
+
+                is_last_line = (
+                    max_lines is not None
+                    and start_line not in spans_by_line
+                    and len(spans_by_line) == max_lines - 1
+                )
+                if start_line == end_line and not is_last_line:
+                    self._add_match_spans(
+                        match,
+                        start_line,
+                        end_line,
+                        line_index,
+                        spans_by_line,
+                        _pattern_index(match, group_patterns),
+                    )
+                    continue
+
+                # A line-by-line search can not match across lines, and the last
+                # line within the limit is complete without scanning past it: redo
+                # the line on its own and continue the buffer scan from the next one
+                spans_by_line.pop(start_line, None)
+                line_spans = self._line_spans(
+                    compiled, line_at(start_line), group_patterns
+                )
+                if line_spans:
+                    spans_by_line[start_line] = line_spans
+                if len(spans_by_line) != max_lines:
+                    resume_at = line_index.line_start(start_line + 1)
+                break
+
+            if resume_at is None:
+                break
+            position = resume_at
+
+        # Multiline matches may have gone past the limit
+        return [
+            LineMatch(line_number=line_number, spans=spans)
+            for line_number, spans in spans_by_line.items()
+        ][:max_lines]
+
+    def _line_spans(
+        self,
+        compiled: re.Pattern[AnyStr],
+        line: AnyStr,
+        group_patterns: _GroupPatterns | None,
+    ) -> list[MatchSpan]:
+        return [
+            MatchSpan(
+                start=match.start(),
+                end=match.end(),
+                pattern_index=_pattern_index(match, group_patterns),
+            )
+            for match in compiled.finditer(line)
+        ]
+
+    def _add_match_spans(
+        self,
+        match: re.Match[AnyStr],
+        start_line: int,
+        end_line: int,
+        line_index: LineOffsetIndex,
+        spans_by_line: dict[int, list[MatchSpan]],
+        pattern_index: int,
+    ) -> None:
+        """Record a match as one span on every line it covers."""
+        for line_number in range(start_line, end_line + 1):
+            line_start = line_index.line_start(line_number)
+            line_length = line_index.line_length(line_number)
+
+            start = match.start() - line_start if line_number == start_line else 0
+            end = match.end() - line_start if line_number == end_line else line_length
+
+            if line_number > start_line and end == 0:
+                # Match ends right after the previous line's newline
+                continue
+
+            spans_by_line.setdefault(line_number, []).append(
+                MatchSpan(start=start, end=end, pattern_index=pattern_index)
+            )
+
+    def _find_matches_per_line(
+        self,
+        pattern: str,
+        lines: list[str],
+        flags: int,
+        group_patterns: _GroupPatterns | None,
+        max_lines: int | None,
     ) -> list[LineMatch]:
+        compiled = re.compile(pattern, flags)
         matches: list[LineMatch] = []
         for i, line in enumerate(lines):
+            if len(matches) == max_lines:
+                break
             spans: list[MatchSpan] = [
-                MatchSpan(start=match.start(), end=match.end())
-                for match in re.finditer(pattern, line, flags)
+                MatchSpan(
+                    start=match.start(),
+                    end=match.end(),
+                    pattern_index=_pattern_index(match, group_patterns),
+                )
+                for match in compiled.finditer(line)
             ]
             if spans:
                 matches.append(LineMatch(line_number=i, spans=spans))
         return matches
+
+
+def _pattern_index(match: re.Match, group_patterns: _GroupPatterns | None) -> int:
+    # The group of a pattern encloses its own groups, so it is the last one closed
+    if group_patterns is None or match.lastindex is None:
+        return 0
+    return group_patterns[match.lastindex]
@@ -0,0 +1,138 @@
+from typing import TYPE_CHECKING, Iterable
+
+from codegrep.language_detection.LanguageCode import LanguageCode
+from codegrep.pattern_matching.contracts.IPatternMatcher import merge_spans
+from codegrep.pattern_matching.contracts.ITreePatternMatcher import (
+    ITreePatternMatcher,
+)
+from codegrep.pattern_matching.contracts.models import (
+    LineMatch,
+    MatchSpan,
+    PatternMatchResult,
+)
+from codegrep.SourceBuffer import SourceBuffer
+
+if TYPE_CHECKING:
+    from tree_sitter import Node, Query, Tree
+
+# Queries naming node types or fields a grammar does not have are written for
+# another language: files of that language have no match instead of failing
+_OTHER_LANGUAGE_ERRORS = ("Invalid node type", "Invalid field")
+
+
+class InvalidQueryError(Exception):
+    """Raised for queries that can not match in any file: the whole search stops."""
+
+
+class TreeSitterQueryMatcher(ITreePatternMatcher):
+    """
+    Matches tree-sitter queries (S-expressions such as
+    `(call function: (identifier) @name (#eq? @name "foo"))`) against syntax trees.
+
+    - Every captured node is a match; a node spanning several lines matches each
+      of them, so queries should capture the nodes to show, not whole scopes
+    - Queries are compiled once per language, then reused for every file
+    - Queries using node types or fields unknown to a language match nothing in
+      its files, as long as some supported language has them; other invalid
+      queries raise InvalidQueryError
+    """
+
+    def __init__(self) -> None:
+        # None for queries that can not match in a language
+        self._queries: dict[tuple[str, str], "Query | None"] = {}
+        # Whether any supported language accepts a query rejected by another one
+        self._accepted_elsewhere: dict[str, bool] = {}
+
+    def match_tree(
+        self, pattern: str, tree: "Tree", language: str, source: SourceBuffer
+    ) -> PatternMatchResult:
+        query = self._compile(pattern, tree, language)
+        if query is None:
+            return PatternMatchResult(pattern=pattern, matches=[])
+
+        from tree_sitter import QueryCursor
+
+        captures = QueryCursor(query).captures(tree.root_node)
+        nodes = (node for captured in captures.values() for node in captured)
+        return PatternMatchResult(
+            pattern=pattern, matches=self._to_line_matches(nodes, source)
+        )
+
+    def _compile(self, pattern: str, tree: "Tree", language: str) -> "Query | None":
+        key = (language, pattern)
+        if key in self._queries:
+            return self._queries[key]
+
+        from tree_sitter import Query, QueryError
+
+        try:
+            query: "Query | None" = Query(tree.language, pattern)
+        except QueryError as e:
+            if not str(e).startswith(_OTHER_LANGUAGE_ERRORS):
+                raise InvalidQueryError(f"Invalid query: {e}") from e
+            if not self._accepted_by_any_language(pattern):
+                raise InvalidQueryError(
+                    f"Invalid query: {e} (in every supported language)"
+                ) from e
+            query = None
+        if query is not None and query.capture_count == 0:
+            raise InvalidQueryError(
+                "Invalid query: it captures no nodes, name those to match with @name"
+            )
+        self._queries[key] = query
+        return query
+
+    def _accepted_by_any_language(self, pattern: str) -> bool:
+        """
+        Whether the grammar of some supported language accepts `pattern`. Grammars
+        are only loaded to compile it, once per query.
+        """
+        if pattern in self._accepted_elsewhere:
+            return self._accepted_elsewhere[pattern]
+
+        from tree_sitter import Query, QueryError
+        from tree_sitter_language_pack import get_language
+
+        accepted = False
+        for language in LanguageCode:
+            try:
+                Query(get_language(language.value), pattern)
+            except (LookupError, QueryError):
+                # No grammar (plain text), or not one with these node types
+                continue
+            accepted = True
+            break
+        self._accepted_elsewhere[pattern] = accepted
+        return accepted
+
+    def _to_line_matches(
+        self, nodes: Iterable["Node"], source: SourceBuffer
+    ) -> list[LineMatch]:
+        spans_by_line: dict[int, list[MatchSpan]] = {}
+        raw_lines = source.raw_lines
+        for node in nodes:
+            (start_row, start_column), (end_row, end_column) = (
+                node.start_point,
+                node.end_point,
+            )
+            for row in range(start_row, min(end_row, len(raw_lines) - 1) + 1):
+                # Byte columns, the lines in between are matched whole
+                start = start_column if row == start_row else 0
+                end = (
+                    end_column
+                    if row == end_row
+                    else len(raw_lines[row].removesuffix(b"\r"))
+                )
+                if start >= end:
+                    continue
+                spans_by_line.setdefault(row, []).append(
+                    MatchSpan(
+                        start=source.byte_to_char_offset(row, start),
+                        end=source.byte_to_char_offset(row, end),
+                    )
+                )
+
+        return [
+            LineMatch(line_number=line_number, spans=merge_spans(spans))
+            for line_number, spans in sorted(spans_by_line.items())
+        ]
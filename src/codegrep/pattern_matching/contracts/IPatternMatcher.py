@@ -1,6 +1,13 @@
 from abc import ABC, abstractmethod
+from dataclasses import replace
+from typing import Sequence
 
-from codegrep.pattern_matching.contracts.models import PatternMatchResult
+from codegrep.pattern_matching.contracts.models import (
+    LineMatch,
+    MatchSpan,
+    PatternMatchResult,
+)
+from codegrep.SourceBuffer import SourceBuffer
 
 
 class IPatternMatcher(ABC):
@@ -11,3 +18,74 @@ class IPatternMatcher(ABC):
         self, pattern: str, lines: list[str], ignore_case: bool
     ) -> PatternMatchResult:
         pass
+
+    def match_source(
+        self,
+        pattern: str,
+        source: SourceBuffer,
+        ignore_case: bool,
+        max_lines: int | None = None,
+    ) -> PatternMatchResult:
+        """
+        Match a pattern against the code of a source buffer. Matchers that can search
+        the raw bytes override this; by default every line is decoded for `match`.
+
+        With `max_lines`, only the first `max_lines` matching lines are returned;
+        matchers overriding this stop scanning once they are found.
+        """
+        return first_lines(self.match(pattern, list(source), ignore_case), max_lines)
+
+    def match_patterns(
+        self,
+        patterns: Sequence[str],
+        source: SourceBuffer,
+        ignore_case: bool,
+        max_lines: int | None = None,
+    ) -> PatternMatchResult:
+        """
+        Match any of several patterns, each span tagged with the position of its
+        pattern. Spans are non-overlapping and leftmost-first, like those of an
+        alternation of the patterns where earlier patterns win ties.
+
+        Matchers that can search for all patterns at once override this; by
+        default the code is searched once per pattern and the spans are merged.
+        `max_lines` limits the matching lines as in `match_source`.
+        """
+        spans_by_line: dict[int, list[MatchSpan]] = {}
+        for index, pattern in enumerate(patterns):
+            # Every pattern is searched in full: a later one may match earlier lines
+            for line_match in self.match_source(pattern, source, ignore_case).matches:
+                spans_by_line.setdefault(line_match.line_number, []).extend(
+                    replace(span, pattern_index=index) for span in line_match.spans
+                )
+
+        return first_lines(
+            PatternMatchResult(
+                pattern="|".join(patterns),
+                matches=[
+                    LineMatch(line_number=line_number, spans=merge_spans(spans))
+                    for line_number, spans in sorted(spans_by_line.items())
+                ],
+            ),
+            max_lines,
+        )
+
+
+def first_lines(
+    result: PatternMatchResult, max_lines: int | None
+) -> PatternMatchResult:
+    """Keep the first `max_lines` matching lines of a result, all of them if None."""
+    if max_lines is None or len(result.matches) <= max_lines:
+        return result
+    return replace(result, matches=result.matches[:max_lines])
+
+
+def merge_spans(spans: list[MatchSpan]) -> list[MatchSpan]:
+    """Keep the leftmost of overlapping spans, or the one of the earliest pattern."""
+    merged: list[MatchSpan] = []
+    end = -1
+    for span in sorted(spans, key=lambda span: (span.start, span.pattern_index)):
+        if span.start >= end:
+            merged.append(span)
+            end = span.end
+    return merged
@@ -0,0 +1,56 @@
+from abc import ABC, abstractmethod
+from dataclasses import replace
+from typing import TYPE_CHECKING, Sequence
+
+from codegrep.pattern_matching.contracts.IPatternMatcher import merge_spans
+from codegrep.pattern_matching.contracts.models import (
+    LineMatch,
+    MatchSpan,
+    PatternMatchResult,
+)
+from codegrep.SourceBuffer import SourceBuffer
+
+if TYPE_CHECKING:
+    from tree_sitter import Tree
+
+
+class ITreePatternMatcher(ABC):
+    """
+    Interface for matching patterns against the syntax tree of code instead of its
+    text. Results are line matches, like those of IPatternMatcher, so matched lines
+    get the same context and formatting.
+    """
+
+    @abstractmethod
+    def match_tree(
+        self, pattern: str, tree: "Tree", language: str, source: SourceBuffer
+    ) -> PatternMatchResult:
+        """Match a pattern against `tree`, parsed from `source` in `language`."""
+        pass
+
+    def match_tree_patterns(
+        self,
+        patterns: Sequence[str],
+        tree: "Tree",
+        language: str,
+        source: SourceBuffer,
+    ) -> PatternMatchResult:
+        """
+        Match any of several patterns, each span tagged with the position of its
+        pattern and overlapping spans merged as by `IPatternMatcher.match_patterns`.
+        """
+        spans_by_line: dict[int, list[MatchSpan]] = {}
+        for index, pattern in enumerate(patterns):
+            result = self.match_tree(pattern, tree, language, source)
+            for line_match in result.matches:
+                spans_by_line.setdefault(line_match.line_number, []).extend(
+                    replace(span, pattern_index=index) for span in line_match.spans
+                )
+
+        return PatternMatchResult(
+            pattern="\n".join(patterns),
+            matches=[
+                LineMatch(line_number=line_number, spans=merge_spans(spans))
+                for line_number, spans in sorted(spans_by_line.items())
+            ],
+        )
@@ -5,6 +5,8 @@ from dataclasses import dataclass
 class MatchSpan:
     start: int
     end: int
+    # Position of the matching pattern in a multi-pattern search
+    pattern_index: int = 0
 
 
 @dataclass(frozen=True)
@@ -12,6 +14,11 @@ class LineMatch:
     line_number: int
     spans: list[MatchSpan]
 
+    @property
+    def pattern_indexes(self) -> list[int]:
+        """Positions of the patterns matching this line, in order."""
+        return sorted({span.pattern_index for span in self.spans})
+
 
 @dataclass(frozen=True)
 class PatternMatchResult:
@@ -0,0 +1,18 @@
+from pathlib import Path
+
+from .SourceBuffer import BinaryFileError, FileTooLargeError
+
+
+def describe_search_error(
+    filename: str | Path, error: Exception, verbose: bool
+) -> str | None:
+    """
+    Return the message reporting why a file could not be searched, or None if it
+    is skipped silently.
+    """
+    if isinstance(error, (BinaryFileError, FileTooLargeError)):
+        # Skipped like any other file that is not code, mentioned only when verbose
+        return f"Skipping {filename}: {error}" if verbose else None
+    if isinstance(error, OSError):
+        return f"Could not read file {filename}: {error}"
+    return f"An error occurred while processing file {filename}: {error}"
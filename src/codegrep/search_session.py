@@ -0,0 +1,206 @@
+import copy
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence, Set
+
+from .AnsiCodeFormatter import AnsiCodeFormatter
+from .CodeContextAnalyzer import CodeContextAnalyzer
+from .components_factory import ComponentFactory
+from .config.config import Config
+from .contracts.FileSearchResult import FileSearchResult
+from .contracts.IAnalysisCache import IAnalysisCache
+from .contracts.ICodeParser import ICodeParser
+from .contracts.IStatsRecorder import IStatsRecorder
+from .formating.contracts.ISpanHighlighter import ISpanHighlighter
+from .JsonRecordFormatter import JsonRecordFormatter
+from .language_detection.LanguageCodeDetector import LanguageCodeDetector
+from .pattern_matching.contracts.IPatternMatcher import IPatternMatcher
+from .pattern_matching.contracts.ITreePatternMatcher import ITreePatternMatcher
+from .SourceBuffer import SourceBuffer
+
+
+class SearchSession:
+    """
+    Reusable search context for many files.
+
+    Components (language detector, code parser with its per-language parser cache,
+    pattern matcher, highlighter, formatter, analysis cache) are created once from
+    the search options. Each search only brings a file name and its code, so a
+    multi-file search builds every tree-sitter parser once per process.
+
+    The `filename` and `code` of the options config are ignored. An `analysis_cache`
+    given explicitly is used instead of the one configured by the options. With
+    `stats`, every search records its stage timings and counters there.
+    """
+
+    def __init__(
+        self,
+        options: Config,
+        analysis_cache: IAnalysisCache | None = None,
+        stats: IStatsRecorder | None = None,
+    ) -> None:
+        self._options = options
+        self.stats = stats
+        component_factory = ComponentFactory(options)
+
+        self.language_detector: LanguageCodeDetector = (
+            component_factory.create_language_detector()
+        )
+        self.code_parser: ICodeParser = component_factory.create_code_parser()
+        self.pattern_matcher: IPatternMatcher = (
+            component_factory.create_pattern_matcher()
+        )
+        self.tree_pattern_matcher: ITreePatternMatcher | None = (
+            component_factory.create_tree_pattern_matcher()
+        )
+        self.span_highlighter: ISpanHighlighter = (
+            component_factory.create_span_highlighter()
+        )
+        self.code_formatter: AnsiCodeFormatter = (
+            component_factory.create_code_formatter()
+        )
+        self.record_formatter: JsonRecordFormatter = (
+            component_factory.create_record_formatter()
+        )
+        self.analysis_cache: IAnalysisCache | None = (
+            analysis_cache or component_factory.create_analysis_cache()
+        )
+
+    def create_analyzer(
+        self,
+        filename: str,
+        code: str,
+        source: SourceBuffer | None = None,
+        code_parser: ICodeParser | None = None,
+    ) -> CodeContextAnalyzer:
+        """
+        Create a per-file analyzer backed by the session's shared components. The
+        code is taken from `source` and parsed with `code_parser` when given.
+        """
+        file_config = copy.copy(self._options)
+        file_config.filename = filename
+        file_config.code = code
+
+        return CodeContextAnalyzer(
+            config=file_config,
+            language_detector=self.language_detector,
+            code_parser=code_parser or self.code_parser,
+            pattern_matcher=self.pattern_matcher,
+            span_highlighter=self.span_highlighter,
+            code_formatter=self.code_formatter,
+            analysis_cache=self.analysis_cache,
+            source=source,
+            record_formatter=self.record_formatter,
+            stats=self.stats,
+            tree_pattern_matcher=self.tree_pattern_matcher,
+        )
+
+    def search(
+        self,
+        filename: str,
+        code: str,
+        search_pattern: str | Sequence[str],
+        ignore_case: bool = False,
+    ) -> str:
+        """Search one file and return its formatted output (empty if no match)."""
+        return self.search_file(filename, code, search_pattern, ignore_case).output
+
+    def search_file(
+        self,
+        filename: str,
+        code: str,
+        search_pattern: str | Sequence[str],
+        ignore_case: bool = False,
+    ) -> FileSearchResult:
+        """Search one file and return its matched lines and formatted output."""
+        return self.search_source(
+            filename, SourceBuffer.from_text(code), search_pattern, ignore_case
+        )
+
+    def search_source(
+        self,
+        filename: str,
+        source: SourceBuffer,
+        search_pattern: str | Sequence[str],
+        ignore_case: bool = False,
+        max_count: int | None = None,
+    ) -> FileSearchResult:
+        """
+        Like `search_file`, for code already loaded into a source buffer. At most
+        `max_count` matching lines are found, if given (see `Config.max_count`).
+        """
+        analyzer = self.create_analyzer(filename, "", source)
+        matched_lines = analyzer.grep(search_pattern, ignore_case, max_count)
+        return self.create_result(filename, analyzer, matched_lines)
+
+    def create_result(
+        self, filename: str, analyzer: CodeContextAnalyzer, matched_lines: Set[int]
+    ) -> FileSearchResult:
+        """
+        Collect the result of an analyzer that has searched a file: formatted lines,
+        a record if the options ask for a structured output format, or only the
+        matched lines with `matches_only`.
+        """
+        if self._options.matches_only:
+            return FileSearchResult(
+                filename=filename, matched_lines=sorted(matched_lines)
+            )
+        if self._options.output_format != "text":
+            return FileSearchResult(
+                filename=filename,
+                matched_lines=sorted(matched_lines),
+                record=analyzer.get_record(),
+            )
+        return FileSearchResult(
+            filename=filename,
+            matched_lines=sorted(matched_lines),
+            formatted_lines=list(analyzer.iter_formatted_lines()),
+        )
+
+    def read_source(
+        self, filename: str | Path, memory_map: bool = True
+    ) -> SourceBuffer:
+        """
+        Load a file to search, raising OSError if it can not be read, BinaryFileError
+        if it looks binary and FileTooLargeError if it is over `max_file_mb`.
+        """
+        max_file_mb = self._options.max_file_mb
+        max_bytes = None if max_file_mb is None else max_file_mb * 1024 * 1024
+        start = time.perf_counter()
+        source = SourceBuffer.from_file(filename, max_bytes, memory_map)
+        if self.stats is not None:
+            self.stats.add_time("read", time.perf_counter() - start)
+            self.stats.add_count("bytes_read", source.size)
+        return source
+
+    def search_files(
+        self,
+        filenames: Iterable[str | Path],
+        search_pattern: str | Sequence[str],
+        ignore_case: bool = False,
+        max_total: int | None = None,
+    ) -> Iterator[FileSearchResult]:
+        """
+        Search files one after the other, yielding each result as soon as it is ready.
+
+        `filenames` is consumed lazily, so it can be a directory walk still in
+        progress. Files that can not be read, look binary, are over the size limit,
+        or whose language is not supported, are skipped. With `max_total`, the search
+        stops once that many matching lines were found in all files together.
+        """
+        remaining = max_total
+        for filename in filenames:
+            if remaining == 0:
+                return
+            try:
+                with self.read_source(filename) as source:
+                    result = self.search_source(
+                        str(filename), source, search_pattern, ignore_case, remaining
+                    )
+            except (OSError, ValueError):
+                if self.stats is not None:
+                    self.stats.add_count("files_skipped")
+                continue
+            if remaining is not None:
+                remaining -= len(result.matched_lines)
+            yield result
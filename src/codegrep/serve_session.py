@@ -0,0 +1,102 @@
+import copy
+import os
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Sequence
+
+from .caching.MemoryCache import MemoryAnalysisCache, MemoryCache
+from .config.config import Config
+from .contracts.FileSearchResult import FileSearchResult
+from .pattern_matching.TreeSitterQueryMatcher import InvalidQueryError
+from .search_session import SearchSession
+from .SourceBuffer import BinaryFileError, SourceBuffer
+
+
+class ServeSession:
+    """
+    Search context of a long-running process, kept warm across searches.
+
+    - One tree-sitter parser per language serves every search
+    - File contents and analysis results share one in-memory LRU cache with a byte
+      budget; contents are reused while a file keeps its size and modification
+      time, analysis results while the analyzed code is the same
+    - Searches with different options each get a SearchSession, created once
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self._cache: MemoryCache = MemoryCache(max_bytes)
+        self._analysis_cache = MemoryAnalysisCache(self._cache)
+        self._sessions: dict[tuple, SearchSession] = {}
+        self._code_parser = self._session(Config()).code_parser
+
+    def search_files(
+        self,
+        filenames: Iterable[str | Path],
+        search_pattern: str | Sequence[str],
+        options: Config,
+        ignore_case: bool = False,
+        on_error: Callable[[str, Exception], None] | None = None,
+    ) -> Iterator[FileSearchResult]:
+        """
+        Search files with the given options, yielding the result of each one as soon
+        as it is ready. Files that can not be searched (see
+        `SearchSession.search_files`) are passed to `on_error` instead; an invalid
+        query stops the search.
+        """
+        session = self._session(options)
+        max_file_mb = options.max_file_mb
+        max_bytes = None if max_file_mb is None else max_file_mb * 1024 * 1024
+
+        for filename in filenames:
+            key = str(filename)
+            try:
+                source = self._read_source(session, key, max_bytes)
+                analyzer = session.create_analyzer(key, "", source, self._code_parser)
+                matched_lines = analyzer.grep(search_pattern, ignore_case)
+                result = session.create_result(key, analyzer, matched_lines)
+            except InvalidQueryError:
+                raise
+            except Exception as e:
+                if on_error is not None:
+                    on_error(key, e)
+                continue
+            yield result
+
+    def _session(self, options: Config) -> SearchSession:
+        # Analysis results are cached in memory instead of on disk; on-demand
+        # searches still use the full analyses cached by other searches
+        session_options = copy.copy(options)
+        session_options.cache_dir = None
+
+        key = tuple(vars(session_options).items())
+        session = self._sessions.get(key)
+        if session is None:
+            session = SearchSession(session_options, self._analysis_cache)
+            self._sessions[key] = session
+        return session
+
+    def _read_source(
+        self, session: SearchSession, filename: str, max_bytes: int | None
+    ) -> SourceBuffer:
+        stat = os.stat(filename)
+        if max_bytes is not None and stat.st_size > max_bytes:
+            # Raises FileTooLargeError
+            return session.read_source(filename)
+
+        key = ("source", os.path.abspath(filename))
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == version:
+            source = cached[1]
+            if source is None:
+                raise BinaryFileError(f"File {filename} looks binary")
+            return source
+
+        try:
+            # Never memory-mapped: the cached copy must not change with the file
+            source = session.read_source(filename, memory_map=False)
+        except BinaryFileError:
+            self._cache.put(key, (version, None), 0)
+            raise
+        # The bytes, and about as much again for their lines once they are split
+        self._cache.put(key, (version, source), 2 * len(source.view))
+        return source
@@ -0,0 +1,76 @@
+import copy
+import os
+from pathlib import Path
+from typing import Iterable, List, Sequence
+
+from .config.config import Config
+from .contracts.FileSearchResult import FileSearchResult
+from .contracts.IStatsRecorder import IStatsRecorder
+from .IncrementalCodeParser import IncrementalCodeParser
+from .search_session import SearchSession
+
+
+class WatchSession:
+    """
+    Search context for re-running a search as files change.
+
+    - Each file keeps its last parsed tree; a new version is parsed incrementally
+      against it, so only the edited region is reparsed
+    - Scopes are looked up on demand in the updated tree instead of analyzing the
+      whole file again (and the analysis cache is not used)
+    - Changes are detected by polling file size and modification time
+    """
+
+    def __init__(self, options: Config, stats: IStatsRecorder | None = None) -> None:
+        watch_options = copy.copy(options)
+        watch_options.on_demand_context = True
+        watch_options.cache_dir = None
+        self._session = SearchSession(watch_options, stats=stats)
+
+        self._parsers: dict[str, IncrementalCodeParser] = {}
+        # (modification time, size) of each file when it was last searched
+        self._stats: dict[str, tuple[int, int]] = {}
+
+    def search(
+        self,
+        filename: str | Path,
+        search_pattern: str | Sequence[str],
+        ignore_case: bool = False,
+    ) -> FileSearchResult:
+        """
+        Search the current content of a file, raising like `SearchSession.read_source`
+        if it can not be searched.
+        """
+        key = str(filename)
+        self._stats[key] = self._stat(key)
+
+        # Never memory-mapped: the next version is diffed against this one
+        source = self._session.read_source(key, memory_map=False)
+        parser = self._parsers.get(key)
+        if parser is None:
+            parser = IncrementalCodeParser(self._session.code_parser)
+            self._parsers[key] = parser
+
+        analyzer = self._session.create_analyzer(key, "", source, parser)
+        matched_lines = analyzer.grep(search_pattern, ignore_case)
+        return self._session.create_result(key, analyzer, matched_lines)
+
+    def changed_files(self, filenames: Iterable[str | Path]) -> List[str]:
+        """Return the files whose size or modification time changed since searched."""
+        changed = []
+        for filename in filenames:
+            key = str(filename)
+            try:
+                stat = self._stat(key)
+            except OSError:
+                # Deleted: its tree is of no use anymore
+                self._parsers.pop(key, None)
+                self._stats.pop(key, None)
+                continue
+            if self._stats.get(key) != stat:
+                changed.append(key)
+        return changed
+
+    def _stat(self, filename: str) -> tuple[int, int]:
+        stat = os.stat(filename)
+        return stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from codegrep.async_application import AsyncApplication
+from codegrep.config.config import Config
+
+
+def write_files(tmp_path, sizes):
+    paths = []
+    for i, size in enumerate(sizes):
+        path = tmp_path / f"f{i}.py"
+        path.write_text("x = 1\n" * size)
+        paths.append(path)
+    return paths
+
+
+def test_results_follow_the_input_order(tmp_path):
+    # The first file takes the longest, later ones finish before it
+    paths = write_files(tmp_path, [20_000, 10, 10, 10, 10])
+    paths.insert(2, tmp_path / "missing.py")
+
+    async def search():
+        async with AsyncApplication(Config(), max_pending=4) as app:
+            return [result async for result in app.search(paths, "x =")]
+
+    results = asyncio.run(search())
+    assert [Path(result.filename).name for result in results] == [
+        "f0.py",
+        "f1.py",
+        "f2.py",
+        "f3.py",
+        "f4.py",
+    ]
+    assert all(result.has_matches for result in results)
+
+
+def test_closing_a_search_cancels_the_files_not_started(tmp_path):
+    paths = write_files(tmp_path, [10] * 6)
+    started: list[str] = []
+    release = threading.Event()
+
+    class RecordingExecutor(ThreadPoolExecutor):
+        def submit(self, fn, /, *args, **kwargs):
+            def run():
+                filename = Path(args[1]).name
+                started.append(filename)
+                if filename == "f1.py":
+                    release.wait(5)
+                return fn(*args, **kwargs)
+
+            return super().submit(run)
+
+    executor = RecordingExecutor(max_workers=1)
+
+    async def search():
+        app = AsyncApplication(Config(), executor=executor, max_pending=4)
+        results = app.search(paths, "x =")
+        first = await results.__anext__()
+        await results.aclose()
+        return first
+
+    first = asyncio.run(search())
+    release.set()
+    executor.shutdown(wait=True)
+
+    assert Path(first.filename).name == "f0.py"
+    # f1.py may have started before the search was closed, nothing after it did
+    assert started[0] == "f0.py"
+    assert set(started) <= {"f0.py", "f1.py"}
@@ -0,0 +1,170 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+import codegrep
+from codegrep.__main__ import main
+from codegrep.cli.CodeGrepCLI import CodeGrepCLI
+from codegrep.daemon.DaemonClient import DaemonClient
+from codegrep.daemon.protocol import (
+    INVALID_QUERY_ERROR,
+    PROTOCOL_VERSION,
+    DaemonError,
+    SearchRequest,
+)
+from codegrep.daemon.SearchDaemon import SearchDaemon
+from codegrep.indexing.TrigramIndex import TrigramIndex
+from codegrep.pattern_matching.TreeSitterQueryMatcher import InvalidQueryError
+
+CODE = "def greet(name):\n    return 'hi ' + name\n\n\nclass Greeter:\n    name = 1\n"
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    (tmp_path / "a.py").write_text(CODE)
+    (tmp_path / "b.py").write_text("x = 1\n")
+    (tmp_path / "notes.txt").write_text("name\n")
+    monkeypatch.chdir(tmp_path)
+    # No daemon of the machine running the tests is ever used
+    monkeypatch.setenv("CODEGREP_SOCKET", str(tmp_path / "codegrep.sock"))
+    return tmp_path
+
+
+@pytest.fixture
+def daemon(tree):
+    """A `codegrep serve` process listening on the socket of the test."""
+    socket_path = tree / "codegrep.sock"
+    env = dict(os.environ, PYTHONPATH=str(Path(codegrep.__file__).parents[1]))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "codegrep", "serve"],
+        env=env,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    deadline = time.monotonic() + 10
+    while DaemonClient.connect(socket_path) is None:
+        assert process.poll() is None, process.stderr.read()
+        assert time.monotonic() < deadline, "the daemon did not start"
+        time.sleep(0.05)
+
+    yield socket_path
+
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(10) == 0
+    process.stderr.close()
+    assert not socket_path.exists()
+
+
+def run_cli(monkeypatch, capsys, *arguments):
+    monkeypatch.setattr(sys, "argv", ["codegrep", "--no-cache", *arguments])
+    status = CodeGrepCLI().run()
+    output = capsys.readouterr()
+    # Timings differ from one run to the next
+    lines = [
+        line
+        for line in output.out.splitlines()
+        if not line.startswith(("Total time taken", "Time to first result"))
+    ]
+    return status, lines, output.err
+
+
+def request(tree, pattern, **options):
+    return SearchRequest(
+        search_pattern=pattern, paths=["."], cwd=str(tree), options=options
+    )
+
+
+def test_requests_survive_the_protocol():
+    message = SearchRequest(
+        search_pattern=["a", "b"],
+        paths=["src"],
+        cwd="/tmp",
+        ignore_case=True,
+        options={"query": True, "max_count": 2},
+    ).to_message()
+    assert message["version"] == PROTOCOL_VERSION
+    assert SearchRequest.from_message(message).to_message() == message
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"version": PROTOCOL_VERSION - 1},
+        {"options": {"verbose": True}},
+        {"search_pattern": []},
+        {"search_pattern": 1},
+    ],
+)
+def test_invalid_requests_are_rejected(change):
+    message = request(Path("/tmp"), "x").to_message()
+    with pytest.raises(DaemonError):
+        SearchRequest.from_message({**message, **change})
+
+
+def test_daemon_answers_with_results_then_done(tree):
+    daemon = SearchDaemon(tree / "unused.sock", max_bytes=1024 * 1024)
+    messages = []
+    daemon.handle(request(tree, "name").to_message(), messages.append)
+
+    *answers, done = messages
+    results = [answer["result"] for answer in answers if "result" in answer]
+    assert [result["filename"] for result in results] == ["a.py"]
+    assert results[0]["matched_lines"] == [0, 1, 5]
+    # notes.txt has no grammar: it counts as searched, its error goes to stderr
+    [diagnostic] = [answer["message"] for answer in answers if "message" in answer]
+    assert "notes.txt" in diagnostic
+    assert done == {"done": {"files": 3}}
+
+
+def test_daemon_reports_invalid_requests_and_queries(tree):
+    daemon = SearchDaemon(tree / "unused.sock", max_bytes=1024 * 1024)
+    messages = []
+    daemon.handle({"version": PROTOCOL_VERSION}, messages.append)
+    assert messages[-1]["error"].startswith("Invalid request")
+
+    messages = []
+    daemon.handle(
+        request(tree, "(identifier", query=True).to_message(), messages.append
+    )
+    assert messages == [
+        {"error": "Invalid query: Unexpected EOF", "kind": INVALID_QUERY_ERROR}
+    ]
+
+
+def test_forwarded_searches_print_what_local_searches_print(
+    daemon, monkeypatch, capsys
+):
+    for arguments in [
+        ["name", "-ln"],
+        ["-e", "NAME", "-e", "x =", "-i", "--format", "ndjson"],
+        ["--count", "name"],
+        ["--query", "(class_definition name: (identifier) @name)"],
+    ]:
+        local = run_cli(monkeypatch, capsys, "--no-daemon", *arguments)
+        forwarded = run_cli(monkeypatch, capsys, *arguments)
+        assert forwarded == local
+        assert local[0] == 0 and local[1]
+
+
+def test_invalid_queries_fail_alike_with_and_without_daemon(
+    daemon, monkeypatch, capsys
+):
+    client = DaemonClient.connect(daemon)
+    with pytest.raises(InvalidQueryError):
+        list(client.search(request(Path.cwd(), "(identifier", query=True), print))
+
+    local = run_cli(monkeypatch, capsys, "--no-daemon", "--query", "(identifier")
+    forwarded = run_cli(monkeypatch, capsys, "--query", "(identifier")
+    assert forwarded == local == (1, [], "Error: Invalid query: Unexpected EOF\n")
+
+
+def test_index_command_builds_the_index(tree, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["codegrep", "index", "build", str(tree)])
+    assert main() == 0
+    assert capsys.readouterr().out.startswith("Indexed 3 files")
+    assert TrigramIndex.load(tree).file_count == 3
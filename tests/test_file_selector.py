@@ -0,0 +1,82 @@
+import os
+
+from codegrep.cli.FileSelector import FileSelector
+from codegrep.cli.FileWalker import FileWalker
+from codegrep.indexing.TrigramIndex import TrigramIndex
+
+
+def build_index(root):
+    TrigramIndex(root).update(FileWalker().walk([root]))
+
+
+def select(root, pattern):
+    return sorted(path.name for path in FileSelector().select([root], pattern, False))
+
+
+def test_index_narrows_down_indexed_files(tmp_path):
+    (tmp_path / "a.py").write_text("def needle(): pass\n")
+    (tmp_path / "b.py").write_text("def other(): pass\n")
+    build_index(tmp_path)
+
+    assert select(tmp_path, "needle") == ["a.py"]
+
+
+def test_files_added_after_the_build_are_searched(tmp_path):
+    (tmp_path / "a.py").write_text("def needle(): pass\n")
+    build_index(tmp_path)
+    (tmp_path / "c.py").write_text("def other(): pass\n")
+
+    assert select(tmp_path, "needle") == ["a.py", "c.py"]
+
+
+def test_files_edited_after_the_build_are_searched(tmp_path):
+    (tmp_path / "a.py").write_text("def needle(): pass\n")
+    (tmp_path / "b.py").write_text("def other(): pass\n")
+    build_index(tmp_path)
+    edited = tmp_path / "b.py"
+    edited.write_text("def needle_too(): pass\n")
+    stat = edited.stat()
+    os.utime(edited, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert select(tmp_path, "needle") == ["a.py", "b.py"]
+
+
+def test_files_deleted_after_the_build_are_not_searched(tmp_path):
+    (tmp_path / "a.py").write_text("def needle(): pass\n")
+    build_index(tmp_path)
+    (tmp_path / "a.py").unlink()
+
+    assert select(tmp_path, "needle") == []
+
+
+def test_subdirectories_of_an_indexed_tree_use_its_index(tmp_path, monkeypatch):
+    sub = tmp_path / "src" / "sub"
+    sub.mkdir(parents=True)
+    (sub / "a.py").write_text("def needle(): pass\n")
+    (sub / "b.py").write_text("def other(): pass\n")
+    (tmp_path / "src" / "c.py").write_text("def needle(): pass\n")
+    build_index(tmp_path)
+    (sub / "d.py").write_text("def other(): pass\n")
+
+    assert select(sub, "needle") == ["a.py", "d.py"]
+    assert select(tmp_path / "src", "needle") == ["a.py", "c.py", "d.py"]
+
+    # Paths are yielded as the walk of the given path spells them
+    monkeypatch.chdir(tmp_path / "src")
+    selected = FileSelector().select(["sub", "."], "needle", False)
+    assert [str(path) for path in selected] == [
+        os.path.join("sub", "a.py"),
+        os.path.join("sub", "d.py"),
+        "c.py",
+        os.path.join("sub", "a.py"),
+        os.path.join("sub", "d.py"),
+    ]
+
+
+def test_files_given_explicitly_are_always_searched(tmp_path):
+    (tmp_path / "a.py").write_text("def needle(): pass\n")
+    (tmp_path / "b.py").write_text("def other(): pass\n")
+    build_index(tmp_path)
+
+    selected = FileSelector().select([tmp_path / "b.py"], "needle", False)
+    assert [path.name for path in selected] == ["b.py"]
@@ -0,0 +1,97 @@
+import pytest
+
+from codegrep.IncrementalCodeParser import IncrementalCodeParser, compute_edit
+from codegrep.TreeSitterCodeParser import TreeSitterCodeParser
+
+CODE = "".join(
+    f"def f{i}(x):\n    return x + {i}  # é{i}\n\n\n" for i in range(500)
+).encode("utf8")
+MIDDLE = CODE.index(b"def f250")
+
+
+def nodes(tree):
+    """Every node of a tree with its position, in document order."""
+    cursor = tree.walk()
+    found = []
+    while True:
+        node = cursor.node
+        found.append(
+            (
+                node.type,
+                node.start_byte,
+                node.end_byte,
+                tuple(node.start_point),
+                tuple(node.end_point),
+                node.has_error,
+            )
+        )
+        if cursor.goto_first_child() or cursor.goto_next_sibling():
+            continue
+        while cursor.goto_parent():
+            if cursor.goto_next_sibling():
+                break
+        else:
+            return found
+
+
+def edited(code, start, end, text):
+    return code[:start] + text.encode("utf8") + code[end:]
+
+
+EDITS = {
+    "insert at start": lambda code: edited(code, 0, 0, "import os\n"),
+    "insert in middle": lambda code: edited(code, MIDDLE, MIDDLE, "y = [\n1,\n"),
+    "insert at end": lambda code: code + b"class C:\n    pass\n",
+    "delete at start": lambda code: code[len(b"def f0(x):\n") :],
+    "delete in middle": lambda code: edited(code, MIDDLE, MIDDLE + 20, ""),
+    "delete at end": lambda code: code[:-30],
+    "replace at start": lambda code: edited(code, 0, 3, "async def"),
+    "replace in middle": lambda code: edited(code, MIDDLE + 4, MIDDLE + 9, "g_ü"),
+    "replace at end": lambda code: code[:-10] + "ñ = 'ö'\n".encode("utf8"),
+    "non-ASCII in middle": lambda code: edited(code, MIDDLE, MIDDLE, "# ünïcödé 🙂\n"),
+    "CRLF line endings": lambda code: code.replace(b"\n", b"\r\n"),
+    "CRLF insert": lambda code: edited(
+        code.replace(b"\n", b"\r\n"), MIDDLE, MIDDLE, "x = 1\r\ny = 2\r\n"
+    ),
+}
+
+
+@pytest.mark.parametrize("edit", sorted(EDITS))
+def test_reparsed_tree_equals_a_fresh_parse(edit):
+    old = CODE
+    if edit == "CRLF insert":
+        old = CODE.replace(b"\n", b"\r\n")
+    new = EDITS[edit](CODE)
+
+    parser = IncrementalCodeParser(TreeSitterCodeParser())
+    parser.parse(old, "python")
+    reparsed = parser.parse(new, "python")
+
+    fresh = TreeSitterCodeParser().parse(new, "python")
+    assert nodes(reparsed) == nodes(fresh)
+    assert str(reparsed.root_node) == str(fresh.root_node)
+
+
+@pytest.mark.parametrize("edit", sorted(EDITS))
+def test_edit_covers_exactly_the_changed_bytes(edit):
+    new = EDITS[edit](CODE)
+    change = compute_edit(CODE, new)
+    assert change is not None
+
+    replaced = new[change.start_byte : change.new_end_byte]
+    assert CODE[: change.start_byte] + replaced + CODE[change.old_end_byte :] == new
+    # Points count rows and UTF-8 byte columns
+    for source, offset, point in [
+        (CODE, change.start_byte, change.start_point),
+        (CODE, change.old_end_byte, change.old_end_point),
+        (new, change.new_end_byte, change.new_end_point),
+    ]:
+        before = source[:offset]
+        assert point == (before.count(b"\n"), len(before.rsplit(b"\n", 1)[-1]))
+
+
+def test_unchanged_code_keeps_its_tree():
+    parser = IncrementalCodeParser(TreeSitterCodeParser())
+    tree = parser.parse(CODE, "python")
+    assert compute_edit(CODE, CODE) is None
+    assert parser.parse(bytes(CODE), "python") is tree
@@ -0,0 +1,64 @@
+import io
+import json
+
+from codegrep.cli.ResultWriter import ResultWriter
+from codegrep.config.config import Config
+from codegrep.search_session import SearchSession
+
+CODE = 'import os\n\n\ndef greet():\n    s = "é" + needle\n    return s\n'
+
+
+def search(code, pattern, output_format="ndjson"):
+    session = SearchSession(Config(output_format=output_format))
+    return session.search_file("a.py", code, pattern)
+
+
+def test_record_describes_matches_with_character_spans():
+    result = search(CODE, "needle")
+    record = result.record
+    assert result.formatted_lines == []
+    assert record["file"] == "a.py"
+    assert record["language"] == "python"
+
+    [match] = record["matches"]
+    assert match["line"] == 5
+    assert match["text"] == '    s = "é" + needle'
+    # Characters, not bytes: "é" is two bytes in UTF-8
+    assert match["spans"] == [[14, 20]]
+    start, end = match["spans"][0]
+    assert match["text"][start:end] == "needle"
+    assert 4 in match["scopes"]
+
+    assert record["context"] == [[1, 6]]
+    assert {"start": 4, "end": 6, "header": "def greet():"} in record["scopes"]
+    assert match["scopes"] == [scope["start"] for scope in record["scopes"]]
+
+
+def test_writer_streams_json_records_as_one_array():
+    results = [search(CODE, "needle", "json"), search(CODE, "greet", "json")]
+
+    stream = io.StringIO()
+    writer = ResultWriter(stream, output_format="json")
+    for result in results:
+        writer.write_result(result)
+    writer.finish()
+    writer.flush()
+    assert json.loads(stream.getvalue()) == [result.record for result in results]
+
+    stream = io.StringIO()
+    writer = ResultWriter(stream, output_format="ndjson")
+    for result in results:
+        writer.write_result(result)
+    writer.finish()
+    writer.flush()
+    lines = stream.getvalue().splitlines()
+    assert [json.loads(line) for line in lines] == [r.record for r in results]
+    assert "é" in lines[0]
+
+
+def test_json_output_without_results_is_an_empty_array():
+    stream = io.StringIO()
+    writer = ResultWriter(stream, output_format="json")
+    writer.finish()
+    writer.flush()
+    assert json.loads(stream.getvalue()) == []
@@ -0,0 +1,34 @@
+from pathlib import Path
+
+import pytest
+
+from codegrep.config.config import Config
+from codegrep.search_session import SearchSession
+
+
+@pytest.fixture
+def files(tmp_path):
+    names = ["a.py", "b.txt", "c.py"]
+    for name in names:
+        (tmp_path / name).write_text("x = 1\nx = 2\n")
+    return [tmp_path / name for name in names]
+
+
+def search(files, **options):
+    session = SearchSession(Config(**options))
+    return {
+        Path(result.filename).name: result.matched_lines
+        for result in session.search_files(files, "x =")
+    }
+
+
+def test_matches_only_skips_the_files_a_full_search_skips(files):
+    assert search(files) == {"a.py": [0, 1], "c.py": [0, 1]}
+    assert search(files, matches_only=True) == {"a.py": [0, 1], "c.py": [0, 1]}
+
+
+def test_files_with_matches_limit_each_file_to_one_line(files):
+    assert search(files, matches_only=True, max_count=1) == {
+        "a.py": [0],
+        "c.py": [0],
+    }
@@ -0,0 +1,64 @@
+from codegrep.pattern_matching.LiteralPatternMatcher import LiteralPatternMatcher
+from codegrep.pattern_matching.RegexPatternMatcher import RegexPatternMatcher
+from codegrep.SourceBuffer import SourceBuffer
+
+# A match on the first line and another one a megabyte further
+CODE = b"needle = 1\n" + b"x = 2\n" * 200_000 + b"needle = 3\n"
+
+
+class RecordingSourceBuffer(SourceBuffer):
+    """Source buffer remembering where the literal matcher searched."""
+
+    def __init__(self, data: bytes) -> None:
+        super().__init__(data)
+        self.found: list[int] = []
+
+    def find(self, sub: bytes, start: int = 0) -> int:
+        position = super().find(sub, start)
+        self.found.append(position)
+        return position
+
+
+def matcher():
+    return LiteralPatternMatcher(RegexPatternMatcher())
+
+
+def test_literal_scan_stops_at_the_first_matching_line():
+    source = RecordingSourceBuffer(CODE)
+
+    result = matcher().match_source("needle", source, False, max_lines=1)
+
+    assert [m.line_number for m in result.matches] == [0]
+    assert source.found == [0]
+    assert source._raw_lines is None
+
+
+def test_regex_scan_does_not_split_the_whole_file():
+    source = SourceBuffer(CODE)
+
+    result = matcher().match_source("need+le", source, False, max_lines=1)
+
+    assert [m.line_number for m in result.matches] == [0]
+    assert source._raw_lines is None
+
+
+def test_last_line_within_the_limit_keeps_all_its_spans():
+    source = SourceBuffer(b"a = b\nab ab ab\nab\n")
+
+    for pattern in ("ab", "a+b"):
+        result = matcher().match_source(pattern, source, False, max_lines=2)
+
+        assert [(m.line_number, len(m.spans)) for m in result.matches] == [
+            (1, 3),
+            (2, 1),
+        ]
+
+
+def test_limited_results_are_the_first_lines_of_a_full_search():
+    source = SourceBuffer(b"foo bar\nbar\nfoo\nfoo foo bar\n")
+
+    for patterns in (["foo"], ["foo", "bar"], ["fo+", "ba?r"]):
+        full = matcher().match_patterns(patterns, source, False)
+        for max_lines in range(1, 5):
+            limited = matcher().match_patterns(patterns, source, False, max_lines)
+            assert limited.matches == full.matches[:max_lines]
@@ -0,0 +1,13 @@
+from codegrep.caching.MemoryCache import MemoryAnalysisCache, MemoryCache
+
+
+def test_analysis_keys_follow_the_analyzed_code(tmp_path):
+    path = tmp_path / "a.py"
+    path.write_text("x = 1\n")
+    cache = MemoryAnalysisCache(MemoryCache(1024))
+
+    # The file is left as it is: only the code given matters
+    key = cache.make_key(str(path), b"x = 1\n", "python")
+    assert cache.make_key(str(path), memoryview(b"x = 1\n"), "python") == key
+    assert cache.make_key(str(path), b"x = 2\n", "python") != key
+    assert cache.make_key(str(tmp_path / "b.py"), b"x = 1\n", "python") != key
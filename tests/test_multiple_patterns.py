@@ -0,0 +1,54 @@
+import json
+import sys
+
+import pytest
+
+from codegrep.cli.CodeGrepCLI import CodeGrepCLI
+
+CODE = "Foo = 1\nbar = 2\nBAZZ = 3\nqux = FOO + BAR\n"
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.py").write_text(CODE)
+    (tmp_path / "patterns.txt").write_text("BAR\nba+z\n")
+    return tmp_path
+
+
+def run(monkeypatch, capsys, *arguments):
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["codegrep", "--format", "ndjson", "--no-daemon", "--no-cache", "--no-index"]
+        + list(arguments)
+        + ["a.py"],
+    )
+    assert CodeGrepCLI().run() == 0
+    output = capsys.readouterr().out
+    return {
+        match["line"]: match["patterns"]
+        for line in output.splitlines()
+        for match in json.loads(line)["matches"]
+    }
+
+
+def test_patterns_from_options_and_files_ignore_case(source, monkeypatch, capsys):
+    assert run(monkeypatch, capsys, "-e", "foo", "-f", "patterns.txt", "-i") == {
+        1: ["foo"],
+        2: ["BAR"],
+        3: ["ba+z"],
+        4: ["foo", "BAR"],
+    }
+
+
+def test_patterns_are_case_sensitive_without_ignore_case(source, monkeypatch, capsys):
+    assert run(monkeypatch, capsys, "-e", "foo", "-f", "patterns.txt") == {4: ["BAR"]}
+
+
+def test_literal_patterns_ignore_case(source, monkeypatch, capsys):
+    assert run(monkeypatch, capsys, "-e", "FOO", "-e", "baz", "-i") == {
+        1: ["FOO"],
+        3: ["baz"],
+        4: ["FOO"],
+    }
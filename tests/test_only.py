@@ -0,0 +1,48 @@
+import pytest
+
+from codegrep.config.config import Config
+from codegrep.search_session import SearchSession
+
+# "needle" in a string and a comment on line 1, as an identifier on line 2
+SOURCES = {
+    "a.py": 'x = "needle"  # needle\nneedle = 1\n',
+    "a.js": "const x = 'needle'; // needle\nlet needle = 1;\n",
+    "a.ts": "const x: string = `needle`; /* needle */\nlet needle = 1;\n",
+    "a.rs": 'let x = "needle"; // needle\nlet needle = 1;\n',
+    "a.c": 'char *x = "needle"; /* needle */\nint needle = 1;\n',
+    "a.go": 'var x = "needle" // needle\nvar needle = 1\n',
+}
+
+
+def spans(filename, only):
+    session = SearchSession(Config(only=only, output_format="ndjson"))
+    result = session.search_file(filename, SOURCES[filename], "needle")
+    if result.record is None:
+        return {}
+    return {
+        match["line"]: [tuple(span) for span in match["spans"]]
+        for match in result.record["matches"]
+    }
+
+
+def span(filename, line, occurrence=1):
+    text = SOURCES[filename].splitlines()[line - 1]
+    column = -1
+    for _ in range(occurrence):
+        column = text.index("needle", column + 1)
+    return (column, column + len("needle"))
+
+
+@pytest.mark.parametrize("filename", sorted(SOURCES))
+def test_only_keeps_matches_in_the_kind_of_code_asked_for(filename):
+    assert spans(filename, "strings") == {1: [span(filename, 1)]}
+    assert spans(filename, "comments") == {1: [span(filename, 1, 2)]}
+    assert spans(filename, "code") == {2: [span(filename, 2)]}
+    assert spans(filename, "identifiers") == {2: [span(filename, 2)]}
+
+
+def test_without_only_every_match_is_kept():
+    assert spans("a.py", None) == {
+        1: [span("a.py", 1), span("a.py", 1, 2)],
+        2: [span("a.py", 2)],
+    }
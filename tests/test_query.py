@@ -0,0 +1,63 @@
+import sys
+
+import pytest
+
+from codegrep.__main__ import main
+from codegrep.config.config import Config
+from codegrep.pattern_matching.TreeSitterQueryMatcher import InvalidQueryError
+from codegrep.search_session import SearchSession
+
+CODE = 'x = 1\ny = f(\n    "é",\n    2)\n'
+
+
+def spans(filename, code, query):
+    session = SearchSession(Config(query=True, output_format="ndjson"))
+    result = session.search_file(filename, code, query)
+    if result.record is None:
+        return {}
+    return {
+        match["line"]: [tuple(span) for span in match["spans"]]
+        for match in result.record["matches"]
+    }
+
+
+def test_captures_spanning_lines_match_each_line():
+    # From the start of the call to its end, in characters: "é" is two bytes
+    assert spans("a.py", CODE, "(call) @call") == {
+        2: [(4, 6)],
+        3: [(0, 8)],
+        4: [(0, 6)],
+    }
+    assert spans("a.py", CODE, "(string) @s") == {3: [(4, 7)]}
+
+
+def test_queries_for_another_language_match_nothing():
+    assert spans("a.py", CODE, "(function_item name: (identifier) @name)") == {}
+
+
+@pytest.mark.parametrize(
+    "query, error",
+    [
+        ("(call)", "it captures no nodes"),
+        ("(call", "Unexpected EOF"),
+        ("(bogus", "Invalid node type"),
+        ("(call bogus: (identifier)) @c", "Invalid field"),
+    ],
+)
+def test_queries_that_can_not_match_stop_the_search(query, error):
+    with pytest.raises(InvalidQueryError, match=error):
+        spans("a.py", CODE, query)
+
+
+def test_cli_reports_queries_no_language_accepts(tmp_path, monkeypatch, capsys):
+    (tmp_path / "a.py").write_text(CODE)
+    (tmp_path / "b.rs").write_text("fn main() {}\n")
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["codegrep", "--no-daemon", "--no-cache", "--query", "(bogus", str(tmp_path)],
+    )
+    assert main() == 1
+    output = capsys.readouterr()
+    assert output.err.startswith("Error: Invalid query: Invalid node type")
+    assert "File name" not in output.out
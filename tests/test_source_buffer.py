@@ -0,0 +1,43 @@
+import mmap
+
+import pytest
+
+from codegrep.config.config import Config
+from codegrep.search_session import SearchSession
+from codegrep.SourceBuffer import BinaryFileError, SourceBuffer
+
+# Over the size from which files are memory-mapped
+LARGE_CODE = "def f():\n    return 1\n" * 10_000 + "needle = 1\n"
+
+
+def test_leaving_the_with_block_unmaps_the_file(tmp_path):
+    path = tmp_path / "large.py"
+    path.write_text(LARGE_CODE)
+
+    with SourceBuffer.from_file(path) as source:
+        data = source._data
+        assert isinstance(data, mmap.mmap)
+        assert source[-1] == "needle = 1"
+
+    assert data.closed
+    with pytest.raises(ValueError):
+        source.view.tobytes()
+
+
+def test_binary_files_are_unmapped(tmp_path):
+    path = tmp_path / "large.bin"
+    path.write_bytes(b"\0" + LARGE_CODE.encode())
+
+    with pytest.raises(BinaryFileError):
+        SourceBuffer.from_file(path)
+
+
+def test_memory_mapped_files_are_searched_before_being_closed(tmp_path):
+    path = tmp_path / "large.py"
+    path.write_text(LARGE_CODE)
+
+    session = SearchSession(Config(line_numbers=True))
+    [result] = session.search_files([path], "needle")
+
+    assert result.matched_lines == [20_000]
+    assert any("needle = 1" in line for line in result.formatted_lines)
@@ -0,0 +1,25 @@
+from codegrep.cli.FileWalker import FileWalker
+from codegrep.indexing.TrigramIndex import TrigramIndex
+
+
+def test_non_utf8_files_are_indexed(tmp_path):
+    (tmp_path / "utf8.py").write_text("needle = 'café'\n", encoding="utf-8")
+    (tmp_path / "latin1.py").write_text("needle = 'café'\n", encoding="latin-1")
+    index = TrigramIndex(tmp_path)
+
+    indexed, removed = index.update(FileWalker().walk([tmp_path]))
+
+    assert (indexed, removed, index.file_count) == (2, 0, 2)
+    assert [path.name for path in index.candidates("needle", False)] == [
+        "latin1.py",
+        "utf8.py",
+    ]
+
+
+def test_unchanged_files_are_not_indexed_again(tmp_path):
+    (tmp_path / "latin1.py").write_text("needle = 'café'\n", encoding="latin-1")
+    TrigramIndex(tmp_path).update(FileWalker().walk([tmp_path]))
+    index = TrigramIndex.load(tmp_path)
+
+    assert index.update(FileWalker().walk([tmp_path])) == (0, 0)
+    assert index.file_count == 1
@@ -0,0 +1,57 @@
+import json
+import sys
+import time
+
+import pytest
+
+from codegrep.cli.CodeGrepCLI import CodeGrepCLI
+
+
+@pytest.fixture
+def watch(tmp_path, monkeypatch, capsys):
+    """Run `codegrep --watch` over a.py, editing it between two polls."""
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "a.py"
+
+    def run(*arguments, before="x = needle\n", after="x = 1\n"):
+        path.write_text(before)
+        versions = [after]
+
+        def poll(seconds):
+            if not versions:
+                raise KeyboardInterrupt
+            # A new size, so the change is seen whatever the mtime resolution
+            path.write_text(versions.pop())
+
+        monkeypatch.setattr(time, "sleep", poll)
+        monkeypatch.setattr(
+            sys, "argv", ["codegrep", "--watch", "--no-cache", *arguments, "a.py"]
+        )
+        assert CodeGrepCLI().run() == 0
+        # Without the summary of each round, which has timings
+        return [
+            line
+            for line in capsys.readouterr().out.splitlines()
+            if not line.startswith("Searched 1 files in ")
+        ]
+
+    return run
+
+
+def test_files_whose_matches_are_gone_are_reported(watch):
+    output = watch("needle")
+    assert "File name: a.py" in output
+    assert output[-1] == "a.py: no longer matches"
+    assert watch("--count", "needle") == ["a.py:1", "a.py:0"]
+    assert watch("-l", "needle") == ["a.py", "a.py: no longer matches"]
+
+
+def test_files_that_never_matched_are_not_reported(watch):
+    assert watch("--count", "needle", before="x = 1\n", after="y = 2\n") == []
+
+
+def test_structured_output_reports_an_empty_record(watch):
+    records = [json.loads(line) for line in watch("--format", "ndjson", "needle")]
+    assert [record["file"] for record in records] == ["a.py", "a.py"]
+    assert len(records[0]["matches"]) == 1
+    assert records[1] == {"file": "a.py", "matches": [], "context": [], "scopes": []}